@@ -0,0 +1,621 @@
+# -*- coding: utf-8 -*-
+# Офлайн-проверки поведения библиотеки на поддельном WebDriver-е (см. fake_driver) и на локальных тестовых
+# http-серверах, без браузера:
+#
+#     python -m unittest bench.checks
+import asyncio
+import gc
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import lxml.html
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
+
+from lib.condition import visible
+from lib.core import driver
+from lib.core.async_driver import AsyncElement, AsyncExtendedDriver, AsyncHttpClient
+from lib.core.compiler import compile_locator_list
+from lib.core.config import Config
+from lib.core.extract import attr
+from lib.core.finder import s, ss
+from lib.core.http_driver import HttpDriver
+from lib.core.multi_wait import wait_any
+from lib.core.pool import SessionPool, _Session
+from lib.core.selectivity import scoped_check, stats, url_pattern
+from lib.core.service import interaction
+from lib.core.transport import PooledRemoteConnection, close_connections
+from lib.core.wait import Wait
+
+from .fake_driver import fake_driver, synthetic_page
+
+
+class StubServer:
+    """
+        Локальный http-сервер в отдельном потоке: pages - {путь: html}, handler - функция (запрос) -> (код,
+        заголовки, тело) для остальных путей (None - разорвать соединение без ответа). Запросы записываются в requests
+    """
+
+    def __init__(self, pages=None, handler=None):
+        self.pages = pages or {}
+        self.handler = handler
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _reply(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                stub.requests.append((self.command, self.path, body))
+                if self.path in stub.pages:
+                    code, headers, data = 200, {'Content-Type': 'text/html; charset=utf-8'}, stub.pages[self.path]
+                else:
+                    reply = stub.handler(self) if stub.handler else (404, {}, '')
+                    if reply is None:
+                        self.close_connection = True
+                        return
+                    code, headers, data = reply
+                data = data.encode('utf-8') if isinstance(data, str) else data
+                self.send_response(code)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_DELETE = _reply
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:%d' % self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeDriverCase(unittest.TestCase):
+    """ Свежий поддельный драйвер с синтетической страницей для каждой проверки """
+
+    latency = 0.0
+
+    def setUp(self):
+        self.driver = driver.replace_current_driver(fake_driver(self.latency))
+        self.driver.raw_get('http://bench.local/')
+        self.executor = self.driver.driver.command_executor
+        self.dom = self.executor.dom
+
+
+def _even(el):
+    return int(el.attr('data-id')) % 2 == 0
+
+
+def _odd(el):
+    return int(el.attr('data-id')) % 2 == 1
+
+
+class LocatorCacheTest(FakeDriverCase):
+
+    def setUp(self):
+        super().setUp()
+        self.driver.use_locator_cache()
+
+    def test_filter_and_size_are_part_of_the_key(self):
+        first = ss(class_name='product')[0].attr('data-id')
+        even = ss(class_name='product', filter=_even)[0].attr('data-id')
+        odd = ss(class_name='product', filter=_odd)[0].attr('data-id')
+        self.assertEqual((first, even, odd), ('1', '2', '1'))
+        self.assertEqual(ss(class_name='product', filter=_even)[1].attr('data-id'), '4')
+
+    def test_signature_differs_by_filter_and_size(self):
+        plain, sized = ss(class_name='product')[0], ss(class_name='product', size=50)[0]
+        self.assertNotEqual(plain.locator._cache_key(), sized.locator._cache_key())
+        self.assertNotEqual(str(plain.locator), str(sized.locator))
+        self.assertIn('filter=bench.checks._even', str(ss(class_name='product', filter=_even)[0].locator))
+
+    def test_lambda_filter_has_no_timing_signature(self):
+        old, Config.adaptive_wait = Config.adaptive_wait, True
+        try:
+            self.assertIsNotNone(ss(class_name='product', filter=_even)[0].locator._signature())
+            self.assertIsNone(ss(class_name='product', filter=lambda el: True)[0].locator._signature())
+        finally:
+            Config.adaptive_wait = old
+
+
+class DriverWrapTest(FakeDriverCase):
+
+    def test_use_driver_reuses_wrapper(self):
+        # временный with use_driver(...) работает с той же оберткой: кэш, номер страницы и флаги не теряются
+        raw = self.driver.driver
+        self.driver.async_scripts = False
+        with driver.use_driver(raw) as current:
+            self.assertIs(current, self.driver)
+        self.assertIs(driver.replace_current_driver(raw), self.driver)
+        del current
+        gc.collect()
+        self.assertIs(driver.extended(raw), self.driver)
+
+
+class CompilerTest(unittest.TestCase):
+    """ Объединение критериев поиска в один запрос """
+
+    @staticmethod
+    def _compile(*locators, prefix='//*'):
+        return compile_locator_list(prefix, [{'type': by, 'value': value} for by, value in locators])
+
+    def test_single_criterion(self):
+        self.assertEqual(self._compile(('id', 'main')), [('id', 'main')])
+
+    def test_merges_into_css(self):
+        self.assertEqual(self._compile(('class_name', 'a'), ('xpath', "//*[@type='text']")),
+                         [('css selector', '*[class~="a"][type="text"]')])
+
+    def test_merges_into_xpath(self):
+        self.assertEqual(self._compile(('xpath', "//*[@type='text']"), ('xpath', "//*[contains(@href, 'x')]")),
+                         [('xpath', "//*[@type='text'][contains(@href, 'x')]")])
+
+    def test_keeps_separate_queries(self):
+        self.assertEqual(self._compile(('tag_name', 'a'), ('text', 'Product 7')),
+                         [('tag name', 'a'), ('link text', 'Product 7')])
+
+    def test_positional_predicates_are_not_merged(self):
+        # [1] у отдельного запроса - первый ребенок, а дописанный к другим условиям - первый из подходящих под них
+        for xpath in ('//*[1]', '//*[last()]', "//*[@type='text'][last()]", '//*[position() > 2]', '//*[ 2 ]'):
+            self.assertEqual(self._compile(('class_name', 'a'), ('xpath', xpath)),
+                             [('class name', 'a'), ('xpath', xpath)])
+            self.assertEqual(self._compile(('xpath', "//*[@id='x']"), ('xpath', xpath)),
+                             [('xpath', "//*[@id='x']"), ('xpath', xpath)])
+            self.assertIsNone(scoped_check(('xpath', xpath))['pred'])
+        self.assertEqual(self._compile(('class_name', 'a'), ('xpath', '//*[li[1]]')),
+                         [('xpath', ".//*[contains(concat(' ', normalize-space(@class), ' '), ' a ')][li[1]]")])
+
+
+class SelectivityTest(FakeDriverCase):
+    """ Поиск по нескольким критериям, начиная с самого избирательного (кандидаты проверяются скриптом) """
+
+    def setUp(self):
+        super().setUp()
+        self.selectivity, Config.selectivity = Config.selectivity, True
+        stats.clear()
+
+    def tearDown(self):
+        Config.selectivity = self.selectivity
+        stats.clear()
+
+    def _measured(self, locator, counts):
+        pattern = url_pattern(self.driver.page_url)
+        for query, count in zip(locator.queries, counts):
+            stats.record(pattern, query, count)
+        return locator
+
+    def test_filters_candidates(self):
+        element = s(tag_name='a', text='Product 7', wait=0)
+        self._measured(element.locator, [1, 5])
+        self.assertEqual(element.text, 'Product 7')
+
+    def test_missing_criterion_is_not_found(self):
+        # ссылок мало, а текст по статистике встречался чаще - но на этой странице его нет совсем
+        element = s(tag_name='a', text='Nothing', wait=0)
+        self._measured(element.locator, [1, 5])
+        with self.assertRaises(NoSuchElementException):
+            element.reload()
+        self.assertEqual(len(ss(tag_name='a', text='Nothing', wait=0)), len(ss(tag_name='a', wait=0)))
+
+
+class _FlakyPool(SessionPool):
+    """ Пул поддельных драйверов, у которого запуск каждого второго браузера падает """
+
+    def __init__(self, size):
+        super().__init__('fake', size)
+        self.created = 0
+        self.quit = 0
+
+    def _create(self):
+        self.created += 1
+        if self.created % 2 == 0:
+            raise WebDriverException('browser did not start')
+        return _Session(fake_driver())
+
+    def _quit(self, session):
+        self.quit += 1
+
+
+class SessionPoolTest(unittest.TestCase):
+
+    def test_warm_failure_keeps_capacity(self):
+        pool = _FlakyPool(3)
+        with self.assertRaises(WebDriverException):
+            pool.warm()
+        self.assertEqual((pool._starting, len(pool._idle)), (0, 2))
+        # освободившееся место занимает новая сессия, а не ожидание до таймаута
+        leased = [pool.lease(timeout=1), pool.lease(timeout=1)]
+        self.assertRaises(WebDriverException, pool.lease, timeout=1)
+        self.assertEqual(pool._starting, 0)
+        self.assertTrue(pool.lease(timeout=1))
+        self.assertEqual(len(pool), 3)
+        for our_driver in leased:
+            pool.release(our_driver)
+
+    def test_session_of_one_site_is_reused(self):
+        pool = _FlakyPool(1)
+        our_driver = pool.lease(timeout=1)
+        our_driver.raw_get('http://shop.local/catalog')
+        our_driver.raw_get('http://shop.local/cart')
+        pool.release(our_driver)
+        self.assertEqual((len(pool._idle), pool.quit), (1, 0))
+        self.assertEqual(our_driver.origins, set())
+
+    def test_session_of_several_sites_is_recycled(self):
+        # куки и хранилища очищаются только у текущего сайта - состояние другого досталось бы следующему тесту
+        pool = _FlakyPool(1)
+        our_driver = pool.lease(timeout=1)
+        our_driver.raw_get('http://shop.local/catalog')
+        our_driver.raw_get('http://pay.local/checkout')
+        pool.release(our_driver)
+        self.assertEqual((len(pool._idle), pool.quit), (0, 1))
+
+    def test_warm_after_close_quits_sessions(self):
+        pool = _FlakyPool(1)
+        pool.close()
+        pool.warm()
+        self.assertEqual((len(pool._idle), pool.quit), (0, 1))
+
+
+class MutationWaitTest(FakeDriverCase):
+
+    def test_element_scoped_wait_uses_browser(self):
+        # ожидание от элемента WebDriver-а (уровни цепочки локаторов) прерывается мутацией DOM в его браузере
+        raw = self.driver.driver.find_element('id', 'nested')
+        commands = self.executor.commands
+        self.assertFalse(Wait(raw, 0.3, backend='mutation').bool(lambda _: False))
+        self.assertGreater(self.executor.commands - commands, 0)
+        self.assertIsNot(self.driver.async_scripts, False)
+
+    def test_busy_page_keeps_minimal_pause(self):
+        # страница меняется каждые 5 мс (спиннер) - проверки все равно не чаще доли шага ожидания
+        for i in range(200):
+            self.dom.schedule(0.005 * i, lambda dom: dom.mutated())
+        checks = []
+        Wait(self.driver, 0.5, 0.2, backend='mutation').bool(lambda _: checks.append(1))
+        self.assertLessEqual(len(checks), 0.5 / (0.2 * Config.mutation_min_pause) + 2)
+
+    def test_transient_error_keeps_async_scripts(self):
+        # переход на другую страницу во время паузы - разовый сбой, сессия по-прежнему выполняет асинхронные скрипты
+        for error in ('javascript error', 'stale element reference', 'no such window'):
+            self.executor.fail('w3cExecuteScriptAsync', error)
+            Wait(self.driver, 0.1, 0.05, backend='mutation').bool(lambda _: False)
+            self.assertIsNot(self.driver.async_scripts, False, error)
+        self.executor.fail('w3cExecuteScriptAsync', 'script timeout')
+        Wait(self.driver, 0.1, 0.05, backend='mutation').bool(lambda _: False)
+        self.assertIs(self.driver.async_scripts, False)
+
+
+class ActionabilityTest(FakeDriverCase):
+
+    def test_transient_error_keeps_async_scripts(self):
+        self.executor.fail('w3cExecuteScriptAsync', 'javascript error')
+        self.assertTrue(s(id='go').actionability()['ok'])
+        self.assertIsNot(self.driver.async_scripts, False)
+        self.executor.fail('w3cExecuteScriptAsync', 'unknown command')
+        self.assertTrue(s(id='go').actionability()['ok'])
+        self.assertIs(self.driver.async_scripts, False)
+
+    def tearDown(self):
+        Config.strict_actions = False
+
+    def test_click_reports_reason(self):
+        # в строгом режиме действие с неготовым элементом не выполняется, а ошибка называет причину
+        Config.strict_actions = True
+        self.dom.root.find_class('buy')[0].set('hidden', '')
+        with self.assertRaises(TimeoutException) as error:
+            s(class_name='buy', wait=0.3).click()
+        self.assertIn("s(class_name='buy')", str(error.exception))
+        self.assertIn('reason: not visible', str(error.exception))
+        self.assertEqual(self.dom.root.get_element_by_id('cart-count').text, '0')
+
+    def test_not_ready_element_is_still_acted_on(self):
+        # по умолчанию, как и раньше, после ожидания действие все равно выполняется - решает сам WebDriver
+        self.dom.root.find_class('buy')[0].set('hidden', '')
+        s(class_name='buy', wait=0.3).click()
+        self.assertEqual(self.dom.root.get_element_by_id('cart-count').text, '1')
+
+    def test_input_covered_by_label(self):
+        # вводу не нужна свободная точка клика: поле под плавающей подписью заполняется без ожидания
+        Config.strict_actions = True
+        self.dom.root.get_element_by_id('search').set('data-covered-by', 'label.floating')
+        start = time.time()
+        s(id='search', wait=2).set('phone')
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(self.dom.root.get_element_by_id('search').get('value'), 'phone')
+        with self.assertRaises(TimeoutException) as error:
+            s(id='search', wait=0.3).click()
+        self.assertIn('covered_by: label.floating', str(error.exception))
+
+    def test_zero_wait_checks_once(self):
+        self.assertEqual(interaction(s(id='go'), 0), {'ok': True})
+        self.dom.root.get_element_by_id('go').set('hidden', '')
+        self.assertEqual(interaction(s(id='go'), 0)['reason'], 'not visible')
+
+
+class ExistTest(FakeDriverCase):
+
+    def test_bool_waits_for_element(self):
+        # if s(...) - как и раньше, с ожиданием появления элемента
+        self.dom.schedule(0.2, lambda dom: dom.root.get_element_by_id('cart').addnext(
+            dom.root.makeelement('div', {'id': 'late-banner'})))
+        self.assertTrue(s(id='late-banner', wait=2))
+
+    def test_negative_check_does_not_wait(self):
+        # быстрая отрицательная проверка - одна попытка поиска, а не ожидание всего таймаута локатора
+        start = time.time()
+        self.assertTrue(s(id='missing', wait=5).not_exist())
+        self.assertFalse(s(id='missing', wait=5).exist(0))
+        self.assertLess(time.time() - start, 1)
+
+    def test_wait_gone_keeps_async_scripts(self):
+        self.executor.fail('w3cExecuteScriptAsync', 'javascript error')
+        s(id='missing').wait_not_exist(0.1)
+        self.assertIsNot(self.driver.async_scripts, False)
+
+
+class FrozenListTest(FakeDriverCase):
+
+    def test_memory_reads_without_commands(self):
+        products = ss(class_name='product').freeze()
+        commands = self.executor.commands
+        self.assertEqual((len(products), len(products[10:20])), (50, 10))
+        self.assertEqual(self.executor.commands, commands)
+
+    def test_navigation_by_action_refreezes(self):
+        products = ss(class_name='product').freeze()
+        self.assertEqual(len(products), 50)
+        # действие, после которого загрузилась другая страница (например, клик по ссылке)
+        s(id='search').set('phone')
+        self.dom.load(synthetic_page(products=3))
+        self.assertEqual(len(products), 3)
+        self.assertEqual(products[2].s(class_name='price').text, '30')
+
+
+    def _rerender(self, products):
+        # перерисовка каталога на той же странице (документ тот же, элементы новые)
+        catalog = self.dom.root.find_class('catalog')[0]
+        for node in list(catalog):
+            catalog.remove(node)
+        for i in range(1, products + 1):
+            catalog.append(lxml.html.fragment_fromstring(
+                '<div class="product" data-id="%d"><span class="price">%d</span></div>' % (i, i * 100)))
+        self.dom.mutated()
+
+    def test_rerender_after_action_refreezes(self):
+        products = ss(class_name='product').freeze()
+        s(id='search').set('phone')
+        self._rerender(5)
+        self.assertEqual(len(products), 5)
+        self.assertEqual([el.s(class_name='price').text for el in products], ['100', '200', '300', '400', '500'])
+
+    def test_stale_element_refreezes(self):
+        # перерисовка без действий замечается по исчезнувшему элементу списка
+        products = ss(class_name='product').freeze()
+        first = products[0]
+        self._rerender(5)
+        self.assertEqual(first.attr('data-id'), '1')
+        self.assertEqual(len(products), 5)
+
+
+class MultiWaitTest(FakeDriverCase):
+
+    def test_empty_list_is_not_found(self):
+        # пустой список не выполняет условие "все элементы видимы" - выигрывает вторая ветка
+        index, target = wait_any((ss(class_name='no-results-yet'), visible), (s(id='cart'), visible), wait=1)
+        self.assertEqual(index, 1)
+        self.assertEqual(target.text, 'cart: 0')
+
+    def test_failed_python_check_does_not_stop_others(self):
+        # условие на python у ненайденного элемента падает, но вторая ветка все равно проверяется
+        index, target = wait_any((s(id='missing'), lambda el: el.is_visible()),
+                                 (s(id='cart'), lambda el: el.is_visible()), wait=1)
+        self.assertEqual(index, 1)
+
+    def test_list_appears_later(self):
+        def add_results(dom):
+            dom.root.get_element_by_id('cart').addprevious(
+                dom.root.makeelement('div', {'class': 'no-results-yet'}))
+            dom.root.get_element_by_id('cart').set('hidden', '')
+
+        self.dom.root.get_element_by_id('cart').set('hidden', '')
+        self.dom.schedule(0.2, add_results)
+        index, target = wait_any((ss(class_name='no-results-yet'), visible), (s(id='cart'), visible), wait=2)
+        self.assertEqual(index, 0)
+        self.assertEqual(len(target), 1)
+
+
+class HttpDriverListTest(unittest.TestCase):
+    """ Списки элементов на драйвере без javascript читают значения обычными командами """
+
+    page = ('<html><head><title>static</title></head><body>'
+            '<div class="x"><a href="/a">first</a></div><div class="x" hidden><a href="/b">second</a></div>'
+            '<div class="x"><a href="/c">third</a></div></body></html>')
+
+    def setUp(self):
+        self.server = StubServer({'/': self.page})
+        driver.replace_current_driver(HttpDriver()).get(self.server.url + '/')
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_columns(self):
+        self.assertEqual(ss(class_name='x').texts(), ['first', 'second', 'third'])
+        self.assertEqual(ss(class_name='x').is_visible_list(), [True, False, True])
+        self.assertFalse(ss(class_name='x').is_visible())
+        self.assertTrue(ss(class_name='x')[::2].is_visible())
+        self.assertEqual(ss(tag_name='a').attrs('href'), ['/a', '/b', '/c'])
+
+    def test_extract(self):
+        rows = ss(class_name='x').extract({'link': s(tag_name='a'), 'cls': attr('class'), 'missing': s(tag_name='b')})
+        self.assertEqual([row['link'] for row in rows], ['first', 'second', 'third'])
+        self.assertEqual([row['cls'] for row in rows], ['x'] * 3)
+        self.assertEqual([row['missing'] for row in rows], [None] * 3)
+
+
+class TransportTest(unittest.TestCase):
+    """ Разделение времени команд на сервер и сеть на локальном сервере с известным временем обработки """
+
+    server_time = 0.05
+
+    def _handle(self, request):
+        self.attempts[request.path] = self.attempts.get(request.path, 0) + 1
+        if request.path in self.drop and self.attempts[request.path] == 1:
+            return None
+        if request.path == '/session/s1/url':
+            time.sleep(self.server_time)
+            return 200, {'Content-Type': 'application/json'}, json.dumps({'value': 'about:blank'})
+        if request.path == '/session/s1/title':
+            time.sleep(self.server_time)
+            return 200, {'Content-Type': 'application/json', 'Server-Timing': 'cmd;dur=42'}, json.dumps({'value': ''})
+        return 200, {'Content-Type': 'application/json'}, json.dumps({'value': {'ready': True}})
+
+    def setUp(self):
+        self.attempts, self.drop = {}, set()
+        self.server = StubServer(handler=self._handle)
+        self.connection = PooledRemoteConnection(self.server.url)
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.close()
+
+    def test_server_and_wire_split(self):
+        self.connection.execute('getCurrentUrl', {'sessionId': 's1'})
+        self.connection.execute('getTitle', {'sessionId': 's1'})
+        self.assertEqual([(method, path) for method, path, _ in self.server.requests],
+                         [('GET', '/status')] * 3 + [('GET', '/session/s1/url'), ('GET', '/session/s1/title')])
+        self.assertIsNotNone(self.connection.stats.rtt)
+        report = {item['command']: item for item in self.connection.stats.report()}
+        url = report['getCurrentUrl']
+        self.assertGreaterEqual(url['server'], self.server_time * 0.9)
+        self.assertGreaterEqual(url['wire'], 0)
+        self.assertAlmostEqual(url['server'] + url['wire'], url['total'])
+        self.assertAlmostEqual(report['getTitle']['server'], 0.042)
+
+    def test_unknown_rtt(self):
+        self.connection._pinged = True      # задержка не оценивалась
+        self.connection.execute('getCurrentUrl', {'sessionId': 's1'})
+        item = self.connection.stats.report()[0]
+        self.assertEqual((item['server'], item['wire']), (None, None))
+        self.assertIn('-', str(self.connection.stats))
+
+    def test_unknown_samples_are_skipped(self):
+        self.connection._pinged = True
+        self.connection.execute('getCurrentUrl', {'sessionId': 's1'})
+        self.connection.stats.rtt = 0.001
+        self.connection.execute('getCurrentUrl', {'sessionId': 's1'})
+        item = self.connection.stats.report()[0]
+        self.assertEqual(item['count'], 2)
+        self.assertGreaterEqual(item['server'], self.server_time * 0.9)
+        self.assertLess(item['server'] + item['wire'], item['total'])
+
+    def test_dropped_get_is_repeated(self):
+        self.connection._pinged = True
+        self.drop.add('/session/s1/url')
+        self.assertEqual(self.connection.execute('getCurrentUrl', {'sessionId': 's1'})['value'], 'about:blank')
+        self.assertEqual(self.attempts['/session/s1/url'], 2)
+
+    def test_dropped_post_is_not_repeated(self):
+        self.connection._pinged = True
+        self.drop.add('/session/s1/element/e1/click')
+        with self.assertRaises(Exception):
+            self.connection.execute('clickElement', {'sessionId': 's1', 'id': 'e1'})
+        self.assertEqual(self.attempts['/session/s1/element/e1/click'], 1)
+
+    def test_quit_closes_connections(self):
+        self.connection.execute('getCurrentUrl', {'sessionId': 's1'})
+        self.assertTrue(self.connection._conn.pools.keys())
+        close_connections(type('Remote', (), {'command_executor': self.connection})())
+        self.assertFalse(self.connection._conn.pools.keys())
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class AsyncTransportTest(unittest.TestCase):
+    """ Повтор команд асинхронного драйвера на новом соединении, когда сервер закрыл соединение пула """
+
+    def _handle(self, request):
+        self.attempts[request.path] = self.attempts.get(request.path, 0) + 1
+        if request.path in self.drop and self.attempts[request.path] == 1:
+            return None
+        if request.path == '/session/s1/title':
+            request.close_connection = self.close_idle
+        return 200, {'Content-Type': 'application/json'}, json.dumps({'value': 'ok'})
+
+    def setUp(self):
+        self.attempts, self.drop, self.close_idle = {}, set(), False
+        self.server = StubServer(handler=self._handle)
+
+    def tearDown(self):
+        self.server.close()
+
+    def _run(self, *commands):
+        async def run():
+            browser = AsyncExtendedDriver(AsyncHttpClient(self.server.url), 's1')
+            try:
+                await browser.title()               # соединение остается в пуле
+                await asyncio.sleep(0.05)
+                for method, path in commands:
+                    await browser.execute(method, path, {} if method == 'POST' else None)
+            finally:
+                await browser.client.close()
+        asyncio.run(run())
+
+    def test_sent_post_is_not_repeated(self):
+        self.drop.add('/session/s1/element/e1/click')
+        with self.assertRaises((ConnectionError, asyncio.IncompleteReadError)):
+            self._run(('POST', '/element/e1/click'))
+        self.assertEqual(self.attempts['/session/s1/element/e1/click'], 1)
+
+    def test_get_is_repeated(self):
+        self.drop.add('/session/s1/url')
+        self._run(('GET', '/url'))
+        self.assertEqual(self.attempts['/session/s1/url'], 2)
+
+    def test_post_on_closed_idle_connection(self):
+        self.close_idle = True
+        self._run(('POST', '/element/e1/click'))
+        self.assertEqual(self.attempts['/session/s1/element/e1/click'], 1)
+
+    def test_click_waits_for_interaction(self):
+        # клик отправляется только после того, как элемент стал видим и доступен
+        def handle(request):
+            if request.path == '/session/s1/execute/sync':
+                checks.append(request.path)
+                ready = len(checks) > 2
+                value = {'tag': 'button', 'text': '', 'rect': {'x': 0, 'y': 0, 'width': 10, 'height': 10},
+                         'displayed': ready, 'enabled': True, 'selected': False, 'checked': False, 'value': '',
+                         'attributes': {}}
+                return 200, {'Content-Type': 'application/json'}, json.dumps({'value': value})
+            return self._handle(request)
+
+        async def run():
+            browser = AsyncExtendedDriver(AsyncHttpClient(self.server.url), 's1')
+            try:
+                await AsyncElement(browser, element_id='e1').click()
+            finally:
+                await browser.client.close()
+
+        checks = []
+        self.server.handler = handle
+        asyncio.run(run())
+        self.assertEqual(len(checks), 3)
+        self.assertEqual([path for _, path, _ in self.server.requests][-1], '/session/s1/element/e1/click')
+
+    def test_nested_list_matches_sync_api(self):
+        element = AsyncElement(None, s(id='main').locator)
+        self.assertEqual(element.ss(xpath_text='item').locator.queries,
+                         s(id='main').ss(xpath_text='item').locator.queries)
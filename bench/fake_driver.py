@@ -0,0 +1,470 @@
+# -*- coding: utf-8 -*-
+# Поддельный WebDriver в том же процессе: настоящий selenium-овский RemoteWebDriver (W3C), у которого вместо HTTP
+# исполнитель команд работает с синтетическим DOM (lxml) и добавляет к каждой команде заданную задержку. Скрипты
+# библиотеки (lib.core.scripts) и используемые selenium-ом атомы распознаются и выполняются на python
+import re
+import time
+
+import lxml.html
+from selenium.webdriver.remote import webelement
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+from lib.core import scripts
+from lib.core.snapshot import find_nodes, _normalize
+
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+ROW_HEIGHT = 20                 # условная высота строки "раскладки"
+WINDOW = {'x': 0, 'y': 0, 'width': 1280, 'height': 800}
+
+
+def synthetic_page(products=50, depth=8):
+    """ Синтетическая страница: вложенные блоки глубины depth, каталог из products товаров, форма и скрытый блок """
+    nested = ''.join('<div class="level level-%d">' % i for i in range(1, depth + 1)) + \
+        '<span class="leaf">deep leaf</span>' + '</div>' * depth
+    items = ''.join(
+        '<div class="product" data-id="%d"><a class="title" href="/product/%d">Product %d</a>'
+        '<span class="price">%d</span><button class="buy">Buy</button></div>' % (i, i, i, i * 10)
+        for i in range(1, products + 1))
+    return ('<html><head><title>Synthetic catalog</title></head><body>'
+            '<div id="nested">%s</div>'
+            '<form id="search-form"><input id="search" name="q" value=""><button id="go">Go</button></form>'
+            '<div id="cart">cart: <span id="cart-count">0</span></div>'
+            '<div class="catalog">%s</div>'
+            '<div id="late" hidden>late content</div>'
+            '</body></html>' % (nested, items))
+
+
+class FakeDom:
+    """ Документ страницы, реестр выданных ссылок на элементы и отложенные мутации """
+
+    def __init__(self, html):
+        self.load(html)
+
+    def load(self, html):
+        self.root = lxml.html.document_fromstring(html)
+        self.tree = self.root.getroottree()
+        self.refs = {}              # id ссылки -> узел (после загрузки новой страницы все ссылки устаревают)
+        self.pending = []           # [(время, функция)] отложенные изменения DOM
+        self.generation = 0
+        self.document_id = id(self.root)
+        self.scroll_y = 0
+
+    def ref(self, node):
+        key = 'n%d' % id(node)
+        self.refs[key] = node
+        return {ELEMENT_KEY: key}
+
+    def node(self, ref):
+        key = ref[ELEMENT_KEY] if isinstance(ref, dict) else ref
+        node = self.refs.get(key)
+        # узел убранной страницы или вырезанный из нее (lxml оставляет такой узел в том же документе)
+        if node is None or node is not self.root and self.root not in node.iterancestors():
+            return None
+        return node
+
+    def schedule(self, delay, fn):
+        """ Изменение DOM через delay секунд (применяется при первой команде после этого момента) """
+        self.pending.append((time.perf_counter() + delay, fn))
+        self.pending.sort(key=lambda item: item[0])
+
+    def tick(self):
+        now = time.perf_counter()
+        while self.pending and self.pending[0][0] <= now:
+            _, fn = self.pending.pop(0)
+            fn(self)
+            self.generation += 1
+
+    def mutated(self):
+        self.generation += 1
+
+    # "раскладка" #####################################################################################################
+
+    def displayed(self, node):
+        for item in [node] + list(node.iterancestors()):
+            style = (item.get('style') or '').replace(' ', '').lower()
+            if item.get('hidden') is not None or 'display:none' in style or 'visibility:hidden' in style:
+                return False
+        return True
+
+    def rect(self, node):
+        if not self.displayed(node):
+            return {'x': 0, 'y': 0, 'width': 0, 'height': 0}
+        index = sum(1 for _ in node.itersiblings(preceding=True)) + sum(1 for _ in node.iterancestors())
+        return {'x': 0, 'y': index * ROW_HEIGHT, 'width': 100, 'height': ROW_HEIGHT}
+
+    def text(self, node):
+        if not self.displayed(node):
+            return ''
+        return _normalize(''.join(node.xpath('.//text()[not(ancestor::script or ancestor::style)]')))
+
+    def value(self, node, field):
+        """ Аналог __value из scripts.ELEMENT_FUNCTIONS """
+        if field.get('sel'):
+            found = find_nodes(node, 'css selector', field['sel'])
+            if not found:
+                return None
+            node = found[0]
+        get = field['get']
+        if get == 'text':
+            return self.text(node)
+        if get in ('attr', 'prop'):
+            return node.get(field['name'])
+        if get == 'tag':
+            return node.tag
+        if get == 'rect':
+            return self.rect(node)
+        if get == 'inner_html':
+            return (node.text or '') + ''.join(lxml.html.tostring(c, encoding='unicode') for c in node)
+        if get == 'html':
+            return lxml.html.tostring(node, encoding='unicode', with_tail=False)
+        if get == 'enabled':
+            return node.get('disabled') is None
+        visible = self.displayed(node) and self.rect(node)['width'] > 0
+        if get == 'visible':
+            return visible
+        if get == 'interaction':
+            return visible and node.get('disabled') is None
+        raise ValueError(get)
+
+    def state(self, node):
+        """ Аналог scripts.ELEMENT_STATE """
+        return {'tag': node.tag, 'text': self.text(node), 'rect': self.rect(node), 'displayed': self.displayed(node),
+                'enabled': node.get('disabled') is None, 'selected': False, 'checked': node.get('checked') is not None,
+                'value': node.get('value'), 'attributes': dict(node.attrib)}
+
+
+class FakeExecutor:
+    """ Исполнитель команд RemoteWebDriver-а: задержка latency сек. на каждую команду и счетчик команд """
+
+    def __init__(self, dom, latency=0.0, url='http://bench.local/'):
+        self.dom = dom
+        self.latency = latency
+        self.url = url
+        self.commands = 0
+        self.w3c = True
+        self.errors = []            # [(команда, W3C-код ошибки)] ошибки, которые вернут ближайшие такие команды
+
+    def fail(self, command, error, times=1):
+        """ Следующие times команд command завершатся W3C-ошибкой error (например, 'script timeout') """
+        self.errors.extend([(command, error)] * times)
+
+    def execute(self, command, params):
+        self.commands += 1
+        if self.latency:
+            time.sleep(self.latency)
+        self.dom.tick()
+        params = dict(params or {})
+        params.pop('sessionId', None)
+        handler = getattr(self, '_' + command, None)
+        if handler is None:
+            return {'value': None}
+        try:
+            for item in self.errors:
+                if item[0] == command:
+                    self.errors.remove(item)
+                    raise _Error(item[1])
+            return {'value': handler(params)}
+        except _Error as e:
+            return {'status': 404, 'value': '{"value": {"error": "%s", "message": "%s"}}' % (e.error, e.error)}
+
+    def _element(self, params):
+        node = self.dom.node(params['id'])
+        if node is None:
+            raise _Error('stale element reference')
+        return node
+
+    # Сессия и навигация ###############################################################################################
+
+    def _newSession(self, params):
+        return {'sessionId': 'bench', 'capabilities': {'browserName': 'fake', 'browserVersion': '1',
+                                                       'platformName': 'any'}}
+
+    def _get(self, params):
+        self.url = params['url']
+        self.dom.load(lxml.html.tostring(self.dom.root, encoding='unicode'))
+
+    def _getCurrentUrl(self, params):
+        return self.url
+
+    def _w3cGetWindowHandles(self, params):
+        return ['main']
+
+    def _w3cGetCurrentWindowHandle(self, params):
+        return 'main'
+
+    def _getTitle(self, params):
+        return _normalize(self.dom.root.findtext('.//title'))
+
+    def _getPageSource(self, params):
+        return lxml.html.tostring(self.dom.root, encoding='unicode')
+
+    def _getWindowRect(self, params):
+        return dict(WINDOW)
+
+    # Поиск ############################################################################################################
+
+    def _find(self, params, context=None):
+        context = self.dom.tree if context is None else context
+        return find_nodes(context, params['using'], params['value'], document=context is self.dom.tree)
+
+    def _findElements(self, params):
+        return [self.dom.ref(node) for node in self._find(params)]
+
+    def _findElement(self, params):
+        found = self._find(params)
+        if not found:
+            raise _Error('no such element')
+        return self.dom.ref(found[0])
+
+    def _findChildElements(self, params):
+        return [self.dom.ref(node) for node in self._find(params, self._element(params))]
+
+    def _findChildElement(self, params):
+        found = self._find(params, self._element(params))
+        if not found:
+            raise _Error('no such element')
+        return self.dom.ref(found[0])
+
+    # Элементы #########################################################################################################
+
+    def _getElementText(self, params):
+        return self.dom.text(self._element(params))
+
+    def _getElementTagName(self, params):
+        return self._element(params).tag
+
+    def _getElementRect(self, params):
+        return self.dom.rect(self._element(params))
+
+    def _getElementProperty(self, params):
+        return self._element(params).get(params['name'])
+
+    def _getElementValueOfCssProperty(self, params):
+        return ''
+
+    def _isElementEnabled(self, params):
+        return self._element(params).get('disabled') is None
+
+    def _isElementSelected(self, params):
+        return self._element(params).get('checked') is not None
+
+    def _clickElement(self, params):
+        node = self._element(params)
+        if 'buy' in (node.get('class') or ''):
+            counter = self.dom.root.get_element_by_id('cart-count')
+            counter.text = str(int(counter.text) + 1)
+            self.dom.mutated()
+
+    def _sendKeysToElement(self, params):
+        node = self._element(params)
+        node.set('value', (node.get('value') or '') + params.get('text', ''))
+        self.dom.mutated()
+
+    def _clearElement(self, params):
+        self._element(params).set('value', '')
+        self.dom.mutated()
+
+    # Скрипты ##########################################################################################################
+
+    def _w3cExecuteScript(self, params):
+        return self._script(params['script'], params.get('args', []))
+
+    def _w3cExecuteScriptAsync(self, params):
+        return self._script(params['script'], params.get('args', []))
+
+    def _script(self, script, args):
+        dom = self.dom
+        if script == scripts.ELEMENT_STATE:
+            return dom.state(self._element({'id': args[0]}))
+        if script == scripts.ACTIONABILITY:
+            node = self._element({'id': args[0]})
+            if not dom.displayed(node):
+                return {'ok': False, 'reason': 'not visible'}
+            if args[2] and node.get('data-covered-by'):
+                # перекрытие в точке клика проверяется только для клика
+                return {'ok': False, 'reason': 'covered', 'covered_by': node.get('data-covered-by')}
+            return {'ok': True}
+        if script == scripts.EXTRACT_COLUMNS:
+            nodes = [self._element({'id': ref}) for ref in args[0]]
+            return {name: [dom.value(node, field) for node in nodes] for name, field in args[1].items()}
+        if script == scripts.CHECK_CONDITION:
+            target = args[0]
+            if isinstance(target, list):
+                target = [self._element({'id': ref}) for ref in target]
+            elif target is not None:
+                target = self._element({'id': target})
+            actual = {}
+            return {'ok': self._condition(target, args[1], actual), 'actual': actual}
+        if script == scripts.CHECK_CONDITIONS:
+            results = []
+            for item in args[0]:
+                target = item['target']
+                if item['steps']:
+                    target = self._resolve(item['steps'])
+                    if target is None or target == []:
+                        results.append({'ok': False, 'found': False, 'actual': {}})
+                        continue
+                elif target is not None:
+                    target = self._element({'id': target})
+                actual = {}
+                results.append({'ok': self._condition(target, item['spec'], actual), 'found': True, 'actual': actual})
+            return results
+        if script == scripts.RESOLVE_CHAIN:
+            target = self._resolve(args[1])
+            if target is None:
+                return {'ok': False}
+            return {'ok': True, 'value': [dom.ref(n) for n in target] if isinstance(target, list) else dom.ref(target)}
+        if script == scripts.WAIT_GONE:
+            # проверка сразу и после каждой отложенной мутации, но не дольше таймаута
+            end = time.perf_counter() + args[1] / 1000.0
+            while True:
+                target = self._resolve(args[0])
+                if target is None or target == []:
+                    return True
+                if not dom.pending or dom.pending[0][0] > end:
+                    time.sleep(max(end - time.perf_counter(), 0))
+                    dom.tick()
+                    target = self._resolve(args[0])
+                    return target is None or target == []
+                time.sleep(max(dom.pending[0][0] - time.perf_counter(), 0))
+                dom.tick()
+        if script == scripts.FILTER_CANDIDATES:
+            base = None if args[1] is None else self._element({'id': args[1]})
+            nodes = [self._element({'id': ref}) for ref in args[0]]
+            for i, check in enumerate(args[2]):
+                filtered = [node for node in nodes if self._matches(node, base, check)]
+                if filtered or not nodes or self._find({'using': check['by'], 'value': check['value']}, base):
+                    nodes = filtered
+                elif args[3]:
+                    return {'url': self.url, 'value': [], 'missing': i}
+            return {'url': self.url, 'value': [dom.ref(node) for node in nodes], 'missing': None}
+        if script == scripts.DOM_TOKEN:
+            return '%s:%s' % (dom.document_id, dom.generation)
+        if script == scripts.FROZEN_STATE:
+            return ['%s:%s' % (dom.document_id, dom.generation), all(dom.node(ref) is not None for ref in args[0])]
+        if script == scripts.WAIT_MUTATION:
+            # ждем ближайшую отложенную мутацию, но не дольше таймаута
+            timeout = args[0] / 1000.0
+            left = dom.pending[0][0] - time.perf_counter() if dom.pending else timeout
+            time.sleep(max(min(left, timeout), 0))
+            generation = dom.generation
+            dom.tick()
+            return dom.generation != generation
+        if webelement.isDisplayed_js in script:
+            return dom.displayed(self._element({'id': args[0]}))
+        if webelement.getAttribute_js in script:
+            node = self._element({'id': args[0]})
+            return node.get(args[1])
+
+        match = re.match(r'\s*(?:window\.)?scroll(To|By)\(\s*-?\d+,\s*(window\.pageYOffset)?\s*([+-]?\s*\d+)?\s*\)',
+                         script)
+        if match:
+            y = int((match.group(3) or '0').replace(' ', ''))
+            if match.group(1) == 'By' or match.group(2):
+                y += dom.scroll_y
+            dom.scroll_y = max(y, 0)
+            return None
+        if 'scrollHeight' in script:
+            return len(dom.root.xpath('//*')) * ROW_HEIGHT
+        if 'pageYOffset' in script:
+            return dom.scroll_y
+        return None
+
+    def _matches(self, node, base, check):
+        """ Аналог __matches из scripts.FILTER_CANDIDATES """
+        if check['rel'] and base is not None and (node is base or base not in node.iterancestors()):
+            return False
+        by, value = check['by'], check['value']
+        if by == 'class name':
+            return value in (node.get('class') or '').split()
+        if by == 'tag name':
+            return node.tag == value.lower()
+        if by == 'id':
+            return node.get('id') == value
+        if by == 'name':
+            return node.get('name') == value
+        if check['pred']:
+            return node.xpath('boolean(self::*%s)' % check['pred'])
+        return node in self._find({'using': by, 'value': value}, base)
+
+    def _resolve(self, steps):
+        """ Аналог __resolveChain из scripts.FIND_FUNCTIONS (без признака pending); None - цель не найдена """
+        def find(base, queries):
+            elements = None
+            for by, value in queries:
+                found = self._find({'using': by, 'value': value}, base)
+                elements = found if elements is None else [node for node in elements if node in found]
+            return elements or []
+
+        target = None
+        for step in steps:
+            if step['op'] == 's':
+                found = find(target, step['q'])
+                if not found:
+                    return None
+                target = found[0]
+            elif step['op'] == 'ss':
+                target = find(target, step['q'])
+            elif step['op'] == 'ss_s':
+                found = [find(node, step['q']) for node in target]
+                if not all(found):
+                    return None
+                target = [nodes[0] for nodes in found]
+            elif step['op'] == 'slice':
+                target = target[slice(step['start'], step['stop'], step['step'])]
+            elif step['op'] == 'index':
+                if not -len(target) <= step['index'] < len(target):
+                    return None
+                target = target[step['index']]
+        return target
+
+    def _condition(self, target, spec, actual):
+        """ Аналог __check из scripts.CHECK_CONDITION """
+        dom = self.dom
+
+        def read(name):
+            if name not in actual:
+                if name == 'title':
+                    actual[name] = self._getTitle({})
+                elif name == 'url':
+                    actual[name] = self.url
+                elif name == 'length':
+                    actual[name] = len(target) if isinstance(target, list) else int(target is not None)
+                elif isinstance(target, list):
+                    actual[name] = [dom.value(node, {'get': name}) for node in target]
+                else:
+                    actual[name] = None if target is None else dom.value(target, {'get': name})
+            return actual[name]
+
+        def every(name, test):
+            value = read(name)
+            return all(test(v) for v in value) if isinstance(target, list) else test(value)
+
+        op = spec['op']
+        if op in ('and', 'or'):
+            results = [self._condition(target, arg, actual) for arg in spec['args']]
+            return all(results) if op == 'and' else any(results)
+        if op == 'not':
+            return not self._condition(target, spec['arg'], actual)
+        if op == 'text':
+            return every('text', lambda v: v == spec['value'])
+        if op == 'text_contains':
+            return every('text', lambda v: v is not None and spec['value'] in v)
+        if op in ('visible', 'enabled', 'interaction'):
+            return every(op, lambda v: v is True)
+        if op == 'length':
+            return read('length') == spec['value']
+        read('url')
+        value = read('title' if op.startswith('title') else 'url')
+        return spec['value'] in value if op.endswith('_contains') else value == spec['value']
+
+
+class _Error(Exception):
+    def __init__(self, error):
+        self.error = error
+
+
+def fake_driver(latency=0.0, html=None):
+    """ RemoteWebDriver поверх FakeExecutor; executor доступен как driver.command_executor """
+    executor = FakeExecutor(FakeDom(html or synthetic_page()), latency)
+    return RemoteWebDriver(command_executor=executor, desired_capabilities={'browserName': 'fake'})
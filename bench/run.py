@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# Набор офлайн-бенчмарков: типовые операции библиотеки на поддельном WebDriver-е (см. fake_driver) с заданной
+# задержкой каждой команды. Для каждого сценария измеряются время, число обращений к драйверу и накладные расходы
+# python (время за вычетом задержек команд). Результаты записываются в json для сравнения между версиями:
+#
+#     python -m bench.run --latency 2 --out bench-results.json
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import selenium
+
+from lib.condition import visible
+from lib.core import driver
+from lib.core.config import Config
+from lib.core.elementList import ElementList
+from lib.core.finder import Locator, s, ss
+
+from .fake_driver import fake_driver
+
+SCENARIOS = []
+
+
+def scenario(name, iterations=None, config=None, setup=None, prepare=None):
+    """
+        Регистрация сценария: функция без аргументов, выполняющая измеряемую операцию на текущем драйвере.
+        prepare - подготовка драйвера один раз перед прогревом, setup - перед каждым замером
+    """
+    def register(fn):
+        SCENARIOS.append({'name': name, 'fn': fn, 'iterations': iterations, 'config': config or {}, 'setup': setup,
+                          'prepare': prepare})
+        return fn
+    return register
+
+
+@contextmanager
+def _config(**values):
+    old = {name: getattr(Config, name) for name in values}
+    for name, value in values.items():
+        setattr(Config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in old.items():
+            setattr(Config, name, value)
+
+
+# Сценарии #############################################################################################################
+
+DEPTH = 8
+WAIT_DELAY = 0.2        # через сколько секунд появляется ожидаемый элемент
+
+
+def _deep_chain():
+    el = s(class_name='level-1')
+    for level in range(2, DEPTH + 1):
+        el = el.s(class_name='level-%d' % level)
+    return el.s(class_name='leaf').text
+
+
+scenario('deep_chain')(_deep_chain)
+# кэш устанавливается один раз: замеры идут на прогретом кэше
+scenario('deep_chain_cached', prepare=lambda: driver.current.use_locator_cache())(_deep_chain)
+scenario('deep_chain_state_ttl', config={'state_ttl': 1})(_deep_chain)
+
+
+@scenario('ss_iterate')
+def _ss_iterate():
+    return [el.text for el in ss(class_name='title')]
+
+
+@scenario('ss_texts')
+def _ss_texts():
+    return ss(class_name='title').texts()
+
+
+@scenario('ss_frozen_index')
+def _ss_frozen_index():
+    products = ss(class_name='product').freeze()
+    return [products[i].s(class_name='price').text for i in range(0, len(products), 10)]
+
+
+@scenario('ss_s')
+def _ss_s():
+    # s() от списка: первый элемент внутри каждого элемента списка
+    prices = Locator('s', ((), {'class_name': 'price'}), Config.wait_timeout, './/*', chain=ss(class_name='product').locator)
+    return ElementList(prices).texts()
+
+
+def _multi_criteria():
+    # критерии не сводятся в один селектор: все ссылки страницы и ссылка с текстом
+    return s(tag_name='a', text='Product 7').text
+
+
+scenario('multi_criteria')(_multi_criteria)
+scenario('multi_criteria_selective', config={'selectivity': True})(_multi_criteria)
+
+
+def _schedule_late():
+    late = driver.current.driver.command_executor.dom
+    late.root.get_element_by_id('late').set('hidden', '')
+    late.schedule(WAIT_DELAY, lambda dom: dom.root.get_element_by_id('late').attrib.pop('hidden', None))
+
+
+@scenario('wait_appear_poll', iterations=5, config={'wait_backend': 'poll'}, setup=_schedule_late)
+def _wait_appear_poll():
+    return s(id='late').wait(visible)
+
+
+@scenario('wait_appear_mutation', iterations=5, config={'wait_backend': 'mutation'}, setup=_schedule_late)
+def _wait_appear_mutation():
+    return s(id='late').wait(visible)
+
+
+@scenario('click_actionable')
+def _click():
+    return s(class_name='product').s(class_name='buy').click()
+
+
+@scenario('set_text')
+def _set():
+    return s(id='search').set('phone')
+
+
+@scenario('scroll_loop')
+def _scroll_loop():
+    return driver.current.scroll_down_loop(20, tsleep=0)
+
+
+@scenario('scroll_full')
+def _scroll_full():
+    return driver.current.scroll_top().scroll_down_full(step=400, tsleep=0)
+
+
+# Запуск ###############################################################################################################
+
+def run_scenario(item, latency, iterations):
+    """ Выполняет сценарий на свежем драйвере; возвращает словарь с результатами """
+    iterations = item['iterations'] or iterations
+    with _config(**item['config']):
+        our_driver = driver.replace_current_driver(fake_driver(latency))
+        our_driver.raw_get('http://bench.local/')
+        executor = our_driver.driver.command_executor
+        if item['prepare']:
+            item['prepare']()
+        if item['setup']:
+            item['setup']()
+        item['fn']()   # прогрев (кэши, ленивые импорты)
+
+        times, round_trips = [], []
+        for _ in range(iterations):
+            if item['setup']:
+                item['setup']()
+            commands = executor.commands
+            start = time.perf_counter()
+            item['fn']()
+            times.append(time.perf_counter() - start)
+            round_trips.append(executor.commands - commands)
+
+    wall = statistics.mean(times)
+    trips = statistics.mean(round_trips)
+    return {
+        'name': item['name'],
+        'iterations': iterations,
+        'config': item['config'],
+        'wall_ms': round(wall * 1000, 3),
+        'wall_ms_min': round(min(times) * 1000, 3),
+        'wall_ms_max': round(max(times) * 1000, 3),
+        'round_trips': trips,
+        'overhead_ms': round((wall - trips * latency) * 1000, 3),
+    }
+
+
+def _revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline benchmarks on a fake WebDriver')
+    parser.add_argument('--latency', type=float, default=1.0, help='latency of every command, ms')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--only', nargs='*', help='scenario names to run')
+    parser.add_argument('--out', default='bench-results.json', help='json file for the results')
+    args = parser.parse_args(argv)
+
+    latency = args.latency / 1000
+    results = []
+    for item in SCENARIOS:
+        if args.only and item['name'] not in args.only:
+            continue
+        rz = run_scenario(item, latency, args.iterations)
+        results.append(rz)
+        print('%-24s %9.2f ms %7.1f trips %9.2f ms overhead' % (rz['name'], rz['wall_ms'], rz['round_trips'],
+                                                                 rz['overhead_ms']))
+
+    report = {
+        'meta': {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'revision': _revision(), 'latency_ms': args.latency,
+                 'python': platform.python_version(), 'selenium': selenium.__version__, 'platform': sys.platform},
+        'results': results,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
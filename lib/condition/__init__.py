@@ -1 +1,2 @@
 from .condition import text, text_contains, visible, invisible, interaction, enable, disable, title_contains, length
+from .condition import And, Or, Not
@@ -3,15 +3,38 @@ from selenium.common.exceptions import StaleElementReferenceException, NoSuchEle
 
 
 class BaseCondition:
-    """ Базовое ожидание """
+    """
+        Базовое ожидание.
+
+        Условие описывается деревом для js-предиката (to_js). Цель ожидания, умеющая проверять такие описания (элемент,
+        список элементов или драйвер - метод check_condition), проверяет условие со всеми его составными частями одним
+        скриптом и в том же вызове возвращает наблюдаемые значения для сообщения об ошибке. Иначе условие проверяется
+        на python (apply). Условия комбинируются операторами & (и), | (или) и ~ (не)
+    """
+
+    _observed = None        # значения свойств, полученные при последней проверке скриптом
 
     def __call__(self, driver):
         self.driver = driver
+        self._observe(None)
         try:
-            return self.apply()
+            result = self._check()
+            if result is None:
+                return self.apply()
+            self._observe(result['actual'])
+            return result['ok']
         except (NoSuchElementException, StaleElementReferenceException):
             return False
 
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
     def __str__(self):
         try:
             return """
@@ -25,6 +48,37 @@ class BaseCondition:
         except Exception as e:
             return "\n type: %s \n msg: %s \n" % (type(e), e)
 
+    def _check(self):
+        """ Проверка одним скриптом; None - условие или цель не поддерживают проверку скриптом """
+        spec = self.to_js()
+        check = getattr(self.driver, 'check_condition', None)
+        if spec is None or check is None:
+            return None
+        return check(spec)
+
+    def _bind(self, driver):
+        self.driver = driver
+        return self
+
+    def _observe(self, values):
+        self._observed = values
+        for condition in self.parts():
+            condition._observe(values)
+
+    def observed(self, name, read=None):
+        """ Значение свойства name, полученное при последней проверке скриптом, иначе результат read() или None """
+        if self._observed is not None and name in self._observed:
+            return self._observed[name]
+        return read() if read else None
+
+    def parts(self):
+        """ Составные части условия """
+        return ()
+
+    def to_js(self):
+        """ Описание условия для js-предиката (см. scripts.CHECK_CONDITION); None - только проверка на python """
+        return None
+
     def identity(self):
         return "element"
 
@@ -38,6 +92,86 @@ class BaseCondition:
         return None
 
 
+def _flag(value, yes, no, default):
+    """ Наблюдаемое логическое значение (у списка элементов - список значений) в виде слов yes/no """
+    if value is None:
+        return default
+    if isinstance(value, list):
+        return str([yes if item else no for item in value])
+    return yes if value else no
+
+
+########################################################################################################################
+
+
+class And(BaseCondition):
+    """ Выполнены все условия """
+
+    op = 'and'
+    word = ' and '
+
+    def __init__(self, *conditions):
+        self.conditions = []
+        for condition in conditions:
+            # a & b & c - одно условие из трех частей, а не вложенные пары
+            self.conditions.extend(condition.conditions if type(condition) is type(self) else [condition])
+
+    def parts(self):
+        return self.conditions
+
+    def to_js(self):
+        args = [condition.to_js() for condition in self.conditions]
+        return None if None in args else {'op': self.op, 'args': args}
+
+    def apply(self):
+        return all(condition._bind(self.driver).apply() for condition in self.conditions)
+
+    def identity(self):
+        return self.conditions[0]._bind(self.driver).identity()
+
+    def expected(self):
+        return '(' + self.word.join(str(c._bind(self.driver).expected()) for c in self.conditions) + ')'
+
+    def actual(self):
+        return '(' + self.word.join(str(c._bind(self.driver).actual()) for c in self.conditions) + ')'
+
+
+class Or(And):
+    """ Выполнено хотя бы одно из условий """
+
+    op = 'or'
+    word = ' or '
+
+    def apply(self):
+        return any(condition._bind(self.driver).apply() for condition in self.conditions)
+
+
+class Not(BaseCondition):
+    """ Условие не выполнено """
+
+    def __init__(self, condition):
+        self.condition = condition
+
+    def parts(self):
+        return [self.condition]
+
+    def to_js(self):
+        spec = self.condition.to_js()
+        return None if spec is None else {'op': 'not', 'arg': spec}
+
+    def apply(self):
+        return not self.condition._bind(self.driver).apply()
+
+    def identity(self):
+        return self.condition._bind(self.driver).identity()
+
+    def expected(self):
+        return 'not ' + str(self.condition._bind(self.driver).expected())
+
+    def actual(self):
+        return self.condition._bind(self.driver).actual()
+
+
 ########################################################################################################################
 
 
@@ -47,17 +181,20 @@ class Title(BaseCondition):
     def __init__(self, _title):
         self._title = _title
 
+    def to_js(self):
+        return {'op': 'title', 'value': self._title}
+
     def apply(self):
         return self._title == self.driver.title
 
     def identity(self):
-        return "page " + self.driver.url
+        return "page " + self.observed('url', lambda: self.driver.url)
 
     def expected(self):
         return '\"' + self._title + '\"'
 
     def actual(self):
-        return '\"' + self.driver.title + '\"'
+        return '\"' + self.observed('title', lambda: self.driver.title) + '\"'
 
 
 def ttl(txt):
@@ -73,17 +210,20 @@ class URL(BaseCondition):
     def __init__(self, _url):
         self._url = _url
 
+    def to_js(self):
+        return {'op': 'url', 'value': self._url}
+
     def apply(self):
         return self._url == self.driver.url
 
     def identity(self):
-        return "page " + self.driver.url
+        return "page " + self.observed('url', lambda: self.driver.url)
 
     def expected(self):
         return '\"' + self._url + '\"'
 
     def actual(self):
-        return '\"' + self.driver.url + '\"'
+        return '\"' + self.observed('url', lambda: self.driver.url) + '\"'
 
 
 def Url(txt):
@@ -99,17 +239,20 @@ class URLContains(BaseCondition):
     def __init__(self, _url):
         self._url = _url
 
+    def to_js(self):
+        return {'op': 'url_contains', 'value': self._url}
+
     def apply(self):
         return self._url in self.driver.url
 
     def identity(self):
-        return "page " + self.driver.url
+        return "page " + self.observed('url', lambda: self.driver.url)
 
     def expected(self):
         return '\"' + self._url + '\"'
 
     def actual(self):
-        return '\"' + self.driver.url + '\"'
+        return '\"' + self.observed('url', lambda: self.driver.url) + '\"'
 
 
 def url_contains(txt):
@@ -125,6 +268,9 @@ class TitleContains(BaseCondition):
     def __init__(self, _title):
         self._title = _title
 
+    def to_js(self):
+        return {'op': 'title_contains', 'value': self._title}
+
     def apply(self):
         return self._title in self.driver.title
 
@@ -132,7 +278,7 @@ class TitleContains(BaseCondition):
         return '\"' + self._title + '\"'
 
     def actual(self):
-        return '\"' + self.driver.title + '\"'
+        return '\"' + self.observed('title', lambda: self.driver.title) + '\"'
 
 
 def title_contains(txt):
@@ -148,6 +294,9 @@ class Text(BaseCondition):
     def __init__(self, _text):
         self._text = _text
 
+    def to_js(self):
+        return {'op': 'text', 'value': self._text}
+
     def apply(self):
         return self._text == self.driver.text
 
@@ -155,7 +304,7 @@ class Text(BaseCondition):
         return '\"' + self._text + '\"'
 
     def actual(self):
-        return '\"' + self.driver.text + '\"'
+        return '\"' + str(self.observed('text', lambda: self.driver.text)) + '\"'
 
 
 def text(txt):
@@ -171,6 +320,9 @@ class Text_contains(BaseCondition):
     def __init__(self, txt):
         self.text_contains = txt
 
+    def to_js(self):
+        return {'op': 'text_contains', 'value': self.text_contains}
+
     def apply(self):
         return self.text_contains in self.driver.text
 
@@ -178,7 +330,7 @@ class Text_contains(BaseCondition):
         return '\"' + self.text_contains + '\"'
 
     def actual(self):
-        return '\"' + self.driver.text + '\"'
+        return '\"' + str(self.observed('text', lambda: self.driver.text)) + '\"'
 
 
 def text_contains(txt):
@@ -191,6 +343,9 @@ def text_contains(txt):
 class Visible(BaseCondition):
     """ Ожидание видимости """
 
+    def to_js(self):
+        return {'op': 'visible'}
+
     def apply(self):
         return self.driver.is_visible()
 
@@ -198,7 +353,7 @@ class Visible(BaseCondition):
         return 'visible'
 
     def actual(self):
-        return 'invisible'
+        return _flag(self.observed('visible'), 'visible', 'invisible', 'invisible')
 
 
 visible = Visible()
@@ -210,6 +365,9 @@ visible = Visible()
 class Invisible(BaseCondition):
     """ Ожидание невидимости """
 
+    def to_js(self):
+        return {'op': 'not', 'arg': {'op': 'visible'}}
+
     def apply(self):
         return not self.driver.is_visible()
 
@@ -217,7 +375,7 @@ class Invisible(BaseCondition):
         return 'invisible'
 
     def actual(self):
-        return 'visible'
+        return _flag(self.observed('visible'), 'visible', 'invisible', 'visible')
 
 
 invisible = Invisible()
@@ -229,6 +387,9 @@ invisible = Invisible()
 class Enable(BaseCondition):
     """ Ожидание возможности взаимодействия """
 
+    def to_js(self):
+        return {'op': 'enabled'}
+
     def apply(self):
         return self.driver.is_enabled()
 
@@ -236,7 +397,7 @@ class Enable(BaseCondition):
         return 'enable'
 
     def actual(self):
-        return 'disable'
+        return _flag(self.observed('enabled'), 'enable', 'disable', 'disable')
 
 
 enable = Enable()
@@ -248,6 +409,9 @@ enable = Enable()
 class Disable(BaseCondition):
     """ Ожидание невозможности взаимодействия """
 
+    def to_js(self):
+        return {'op': 'not', 'arg': {'op': 'enabled'}}
+
     def apply(self):
         return not self.driver.is_enabled()
 
@@ -255,7 +419,7 @@ class Disable(BaseCondition):
         return 'disable'
 
     def actual(self):
-        return 'enable'
+        return _flag(self.observed('enabled'), 'enable', 'disable', 'enable')
 
 
 disable = Disable()
@@ -267,6 +431,9 @@ disable = Disable()
 class Interaction(BaseCondition):
     """ Расширенное ожидание возможности взаимодействия """
 
+    def to_js(self):
+        return {'op': 'interaction'}
+
     def apply(self):
         return self.driver.is_interaction()
 
@@ -274,7 +441,7 @@ class Interaction(BaseCondition):
         return 'interaction'
 
     def actual(self):
-        return 'not interaction'
+        return _flag(self.observed('interaction'), 'interaction', 'not interaction', 'not interaction')
 
 
 interaction = Interaction()
@@ -292,14 +459,17 @@ class Length(BaseCondition):
     def identity(self):
         return 'elements'
 
+    def to_js(self):
+        return {'op': 'length', 'value': self.ln}
+
     def apply(self):
         return len(self.driver) == self.ln
 
-    # def expected(self):
-    #     return 'interaction'
-    #
-    # def actual(self):
-    #     return 'not interaction'
+    def expected(self):
+        return self.ln
+
+    def actual(self):
+        return self.observed('length')
 
 
 def length(ln):
@@ -0,0 +1,645 @@
+# -*- coding: utf-8 -*-
+# Асинхронный (asyncio) вариант драйвера и ленивых элементов. Команды отправляются по протоколу W3C WebDriver через
+# собственный пул keep-alive соединений, поэтому независимые команды одной сессии и команды разных сессий
+# выполняются параллельно в одном цикле событий:
+#
+#     driver = await AsyncExtendedDriver.start('http://grid:4444/wd/hub', {'browserName': 'chrome'})
+#     await driver.get('https://example.com')
+#     title, texts = await asyncio.gather(driver.title(), driver.ss('h2').texts())
+import asyncio
+import base64
+import inspect
+import json
+import ssl
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException, \
+    WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.remote.errorhandler import ErrorHandler
+
+from .config import Config
+from .finder import InvalidSizeList, Locator
+from .service import ElementState, correct_url
+
+# ключ ссылки на элемент в протоколе W3C
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+
+
+class AsyncHttpClient:
+    """
+        Минимальный асинхронный HTTP/1.1 клиент для JSON-протокола WebDriver-а: не больше pool_size соединений с
+        сервером одновременно, соединения переиспользуются (keep-alive). Один клиент можно разделять между сессиями
+    """
+
+    def __init__(self, address, pool_size=8, timeout=60):
+        parts = urlsplit(address)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._idle = []                 # свободные соединения (reader, writer)
+        self._slots = asyncio.Semaphore(pool_size)
+
+    async def request(self, method, path, payload=None):
+        """ Запрос к серверу; возвращает (статус HTTP, тело ответа строкой) """
+        body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        head = ('%s %s%s HTTP/1.1\r\nHost: %s:%s\r\nAccept: application/json\r\nConnection: keep-alive\r\n'
+                'Content-Type: application/json;charset=UTF-8\r\nContent-Length: %d\r\n\r\n'
+                % (method, self.prefix, path, self.host, self.port, len(body))).encode('latin-1')
+
+        async with self._slots:
+            while True:
+                reused = bool(self._idle)
+                conn = self._idle.pop() if reused else await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout)
+                sent = False
+                try:
+                    if conn[0].at_eof():
+                        raise ConnectionResetError('connection is closed by server')
+                    conn[1].write(head + body)
+                    await conn[1].drain()
+                    sent = True
+                    status, keep_alive, data = await asyncio.wait_for(self._read_response(conn[0]), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    conn[1].close()
+                    if reused and (not sent or method == 'GET'):
+                        # сервер закрыл простаивавшее соединение - повторяем на новом. Отправленную команду с
+                        # действием (POST, DELETE) не повторяем: сервер мог успеть ее выполнить (например, клик)
+                        continue
+                    raise
+                except BaseException:
+                    conn[1].close()
+                    raise
+                if keep_alive:
+                    self._idle.append(conn)
+                else:
+                    conn[1].close()
+                return status, data.decode('utf-8')
+
+    @staticmethod
+    async def _read_response(reader):
+        status_line = await reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = b''
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await reader.readexactly(size + 2)
+                if not size:
+                    break
+                data += chunk[:-2]
+        elif 'content-length' in headers:
+            data = await reader.readexactly(int(headers['content-length']))
+        else:
+            data = await reader.read()
+            return status, False, data
+        return status, headers.get('connection', '').lower() != 'close', data
+
+    async def close(self):
+        """ Закрывает свободные соединения """
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+
+def _w3c_query(by, value):
+    """ Запрос поиска в виде, который принимает W3C-драйвер (id, name и class переводятся в css, как в selenium) """
+    if by == By.ID:
+        return By.CSS_SELECTOR, '[id="%s"]' % value
+    elif by == By.NAME:
+        return By.CSS_SELECTOR, '[name="%s"]' % value
+    elif by == By.CLASS_NAME:
+        return By.CSS_SELECTOR, '.%s' % value
+    elif by == By.TAG_NAME:
+        return By.CSS_SELECTOR, value
+    return by, value
+
+
+class AsyncExtendedDriver:
+    """ Асинхронный аналог ExtendedSeleniumDriver для одной сессии W3C WebDriver-а """
+
+    def __init__(self, client, session_id, capabilities=None, own_client=False):
+        self.client = client
+        self.session_id = session_id
+        self.capabilities = capabilities or {}
+        self._own_client = own_client
+        self._errors = ErrorHandler()
+
+    @classmethod
+    async def start(cls, remote_address, capabilities=None, client=None, pool_size=8, timeout=60):
+        """
+            Создает новую сессию на сервере remote_address (chromedriver, grid и т.п.). Чтобы сессии делили одни
+            соединения, можно передать общий client (AsyncHttpClient)
+        """
+        own_client = client is None
+        client = client or AsyncHttpClient(remote_address, pool_size, timeout)
+        payload = {'capabilities': {'alwaysMatch': capabilities or {'browserName': Config.browser_name}}}
+        value = cls._check(ErrorHandler(), *await client.request('POST', '/session', payload))
+        return cls(client, value['sessionId'], value.get('capabilities'), own_client)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.quit()
+
+    @staticmethod
+    def _check(errors, status, data):
+        """ Разбор ответа сервера: значение или исключение selenium-а, соответствующее ошибке W3C """
+        if status >= 400:
+            errors.check_response({'status': status, 'value': data})
+            raise WebDriverException(data)
+        return json.loads(data)['value'] if data else None
+
+    async def execute(self, method, path, payload=None):
+        """ Выполняет команду сессии, например execute('GET', '/title') """
+        status, data = await self.client.request(method, '/session/%s%s' % (self.session_id, path), payload)
+        return self._check(self._errors, status, data)
+
+    async def quit(self):
+        """ Закончить сессию работы с браузером """
+        try:
+            await self.execute('DELETE', '')
+        finally:
+            if self._own_client:
+                await self.client.close()
+
+    # Навигация и свойства страницы ####################################################################################
+
+    async def get(self, url=""):
+        """ Перейти по url (с подстановкой базового url-а и протокола, как ExtendedSeleniumDriver.get) """
+        await self.execute('POST', '/url', {'url': correct_url(url)})
+        return self
+
+    async def raw_get(self, url):
+        """ Переход без подстановок """
+        await self.execute('POST', '/url', {'url': url})
+        return self
+
+    async def url(self):
+        """ Текущий url страницы """
+        return str(await self.execute('GET', '/url'))
+
+    async def title(self):
+        """ Заголовок страницы """
+        return str(await self.execute('GET', '/title'))
+
+    async def html(self):
+        """ Весь код страницы """
+        return str(await self.execute('GET', '/source'))
+
+    async def back(self):
+        await self.execute('POST', '/back', {})
+        return self
+
+    async def forward(self):
+        await self.execute('POST', '/forward', {})
+        return self
+
+    async def refresh(self):
+        await self.execute('POST', '/refresh', {})
+        return self
+
+    async def close(self):
+        """ Закрыть страницу """
+        await self.execute('DELETE', '/window')
+        return self
+
+    async def execute_script(self, script, *args):
+        """ Выполняет на странице js-скрипт; элементы в аргументах и результате - AsyncElement """
+        args = [await self._to_w3c(arg) for arg in args]
+        return self._from_w3c(await self.execute('POST', '/execute/sync', {'script': script, 'args': args}))
+
+    async def execute_async_script(self, script, *args):
+        args = [await self._to_w3c(arg) for arg in args]
+        return self._from_w3c(await self.execute('POST', '/execute/async', {'script': script, 'args': args}))
+
+    async def _to_w3c(self, value):
+        if isinstance(value, AsyncElement):
+            return {ELEMENT_KEY: await value.id()}
+        if isinstance(value, (list, tuple)):
+            return [await self._to_w3c(item) for item in value]
+        if isinstance(value, dict):
+            return {k: await self._to_w3c(v) for k, v in value.items()}
+        return value
+
+    def _from_w3c(self, value):
+        if isinstance(value, dict):
+            if ELEMENT_KEY in value:
+                return AsyncElement(self, element_id=value[ELEMENT_KEY])
+            return {k: self._from_w3c(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._from_w3c(item) for item in value]
+        return value
+
+    async def time_load(self):
+        """ Время загрузки страницы (оба значения читаются параллельно) """
+        end, start = await asyncio.gather(
+            self.execute_script("return window.performance.timing.loadEventEnd;"),
+            self.execute_script("return window.performance.timing.navigationStart;"))
+        return float((end - start) / 1000)
+
+    async def page_size(self):
+        """ Размер страницы [ширина, высота] (оба значения читаются параллельно) """
+        w, h = await asyncio.gather(
+            self.execute_script("return Math.max(document.body.scrollWidth, document.documentElement.scrollWidth, "
+                                "document.body.offsetWidth, document.documentElement.offsetWidth, "
+                                "document.body.clientWidth, document.documentElement.clientWidth);"),
+            self.execute_script("return Math.max(document.body.scrollHeight, document.documentElement.scrollHeight, "
+                                "document.body.offsetHeight, document.documentElement.offsetHeight, "
+                                "document.body.clientHeight, document.documentElement.clientHeight);"))
+        return [int(w), int(h)]
+
+    async def screenshot(self, filename):
+        """ Снимок экрана в png-файл """
+        with open(filename, 'wb') as f:
+            f.write(base64.b64decode(await self.execute('GET', '/screenshot')))
+        return self
+
+    async def pause(self, s=1):
+        """ Пауза выполнения (не блокирует остальные задачи) """
+        await asyncio.sleep(s)
+        return self
+
+    async def wait(self, predicate, message="", wait=Config.wait_timeout, pool=Config.pool_frequency):
+        """ Ожидание, пока predicate(driver) (обычная или async-функция) не вернет истинное значение """
+        return await _wait(self, predicate, message, wait, pool)
+
+    # Поиск ############################################################################################################
+
+    def s(self, *args, **kwargs):
+        """ Ленивый элемент по параметрам, аналогичным finder.s() """
+        wait = kwargs.pop('wait', Config.wait_timeout)
+        return AsyncElement(self, Locator('s', (args, kwargs), wait, './/*'))
+
+    def ss(self, *args, **kwargs):
+        """ Ленивый список элементов по параметрам, аналогичным finder.ss() """
+        wait = kwargs.pop('wait', Config.wait_timeout)
+        _filter = kwargs.pop('filter', None)
+        _size = kwargs.pop('size', None)
+        return AsyncElementList(self, Locator('ss', (args, kwargs), wait, '//*', _filter, _size))
+
+    async def find_elements(self, by, value, parent_id=None):
+        """ Идентификаторы элементов по запросу (by, value) от документа или от элемента parent_id """
+        by, value = _w3c_query(by, value)
+        path = '/element/%s/elements' % parent_id if parent_id else '/elements'
+        found = await self.execute('POST', path, {'using': by, 'value': value})
+        return [item[ELEMENT_KEY] for item in found]
+
+    async def _query(self, locator, context):
+        """
+            Элементы одного звена цепочки от элементов context ([None] - документ). Все запросы звена отправляются
+            одновременно, результат - их пересечение в порядке первого запроса
+        """
+        results = await asyncio.gather(*[self.find_elements(by, value, parent_id)
+                                         for parent_id in context for by, value in locator.queries])
+        rz = []
+        count = len(locator.queries)
+        for i in range(0, len(results), count):
+            common = set.intersection(*[set(found) for found in results[i + 1:i + count]]) if count > 1 else None
+            rz.extend(el for el in results[i] if common is None or el in common)
+        return rz
+
+    async def resolve(self, locator, deadline=None):
+        """ Поиск по цепочке локаторов; возвращает идентификатор элемента или список идентификаторов """
+        loop = asyncio.get_running_loop()
+        if deadline is None:
+            deadline = loop.time() + (locator._chain_wait() or 0)
+        context = await self.resolve(locator.chain, deadline) if locator.chain else None
+        parents = [None] if context is None else context if isinstance(context, list) else [context]
+
+        op = locator.operation_type
+        if op in ('slice', 'slice int'):
+            return context[locator.slice]
+        if op == 'filter':
+            return await self._filter(locator.filter_fn, context)
+
+        while True:
+            if op == 'ss_s':
+                found = await asyncio.gather(*[self._query(locator, [parent]) for parent in parents])
+                ok = all(found)
+                rz = [items[0] for items in found if items]
+            else:
+                rz = await self._query(locator, parents)
+                ok = len(rz) == locator.size if locator.size else bool(rz)
+            if ok or loop.time() >= deadline:
+                break
+            await asyncio.sleep(min(Config.pool_frequency, max(deadline - loop.time(), 0)))
+
+        if op in ('s', 'ss_s') and not ok:
+            raise NoSuchElementException("Unable to locate element: %s" % locator)
+        if op == 's':
+            return rz[0]
+        if locator.size and len(rz) != locator.size:
+            raise InvalidSizeList("length of the elements list does not equal %s, and equal to %s " %
+                                  (locator.size, len(rz)))
+        if locator.filter_fn:
+            rz = await self._filter(locator.filter_fn, rz)
+        return rz
+
+    async def _filter(self, fn, element_ids):
+        """ Фильтр списка функцией от AsyncElement (обычной или async) """
+        rz = []
+        for element_id in element_ids:
+            keep = fn(AsyncElement(self, element_id=element_id))
+            if inspect.isawaitable(keep):
+                keep = await keep
+            if keep:
+                rz.append(element_id)
+        return rz
+
+
+async def _wait(target, predicate, message, wait, pool):
+    """ Общее ожидание для драйвера и элементов """
+    loop = asyncio.get_running_loop()
+    end_time = loop.time() + wait
+    while True:
+        try:
+            value = predicate(target)
+            if inspect.isawaitable(value):
+                value = await value
+            if value:
+                return target
+        except (NoSuchElementException, StaleElementReferenceException):
+            pass
+        if loop.time() >= end_time:
+            raise TimeoutException(message or "condition %s is not met in %s seconds" % (predicate, wait))
+        await asyncio.sleep(pool)
+
+
+async def _interaction(el):
+    """
+        Аналог service.interaction: ожидание, пока элемент не станет видим и доступен (не дольше ожидания его
+        локатора). Неготовый элемент, как и в синхронном API, не мешает действию, а с Config.strict_actions -
+        возбуждается TimeoutException
+    """
+    wait = el.locator.timeout() if el.locator else Config.wait_timeout
+    try:
+        await _wait(el, lambda target: target.is_interaction(), "element %s is not actionable" % el, wait,
+                    Config.pool_frequency)
+    except TimeoutException:
+        if Config.strict_actions:
+            raise
+
+
+def _lazy_element_method(fn):
+    """ Аналог element._lazy_element_method: элемент ищется при первом обращении и один раз перезапрашивается,
+        если исчез со страницы """
+    async def wrap(el, *args, **kwargs):
+        await el.resolve()
+        try:
+            return await fn(el, *args, **kwargs)
+        except StaleElementReferenceException:
+            if not await el.reload():
+                raise
+            return await fn(el, *args, **kwargs)
+
+    wrap.__name__, wrap.__doc__ = fn.__name__, fn.__doc__
+    return wrap
+
+
+class AsyncElement:
+    """ Ленивый элемент асинхронного драйвера: задается локатором или уже найденным идентификатором элемента """
+
+    def __init__(self, driver, locator=None, element_id=None):
+        if not (locator or element_id):
+            raise ValueError()
+        self.driver = driver
+        self.locator = locator
+        self._id = element_id
+
+    def __repr__(self):
+        return '<AsyncElement %s>' % (self.locator or self._id)
+
+    def s(self, *args, **kwargs):
+        wait = kwargs.pop('wait', Config.wait_timeout)
+        return AsyncElement(self.driver, self._chain('s', (args, kwargs), wait, './/*'))
+
+    def ss(self, *args, **kwargs):
+        wait = kwargs.pop('wait', Config.wait_timeout)
+        _filter = kwargs.pop('filter', None)
+        _size = kwargs.pop('size', None)
+        return AsyncElementList(self.driver, self._chain('ss', (args, kwargs), wait, '//*', _filter, _size))
+
+    def _chain(self, *args):
+        if not self.locator:
+            raise ValueError("nested search from a found element requires a locator")
+        return Locator(*args, chain=self.locator)
+
+    async def reload(self):
+        """ Перезапрашивает элемент по локатору """
+        if not self.locator:
+            return False
+        self._id = await self.driver.resolve(self.locator)
+        return True
+
+    async def resolve(self):
+        """ Находит элемент, если он еще не найден """
+        if not self._id:
+            await self.reload()
+        return self
+
+    async def id(self):
+        """ Идентификатор элемента в сессии WebDriver-а """
+        await self.resolve()
+        return self._id
+
+    async def _execute(self, method, path, payload=None):
+        return await self.driver.execute(method, '/element/%s%s' % (self._id, path), payload)
+
+    async def exist(self):
+        """ Есть ли элемент на странице (с ожиданием локатора) """
+        try:
+            if self.locator:
+                await self.reload()
+            else:
+                await self._execute('GET', '/name')
+            return True
+        except (NoSuchElementException, StaleElementReferenceException):
+            return False
+
+    # Действия #########################################################################################################
+
+    @_lazy_element_method
+    async def click(self):
+        """ Клик по элементу (после ожидания его готовности, как и в Element.click) """
+        await _interaction(self)
+        await self._execute('POST', '/click', {})
+        return self
+
+    @_lazy_element_method
+    async def write(self, *value):
+        """ Ввод значения с клавиатуры """
+        await _interaction(self)
+        await self._send_keys(''.join(value))
+        return self
+
+    @_lazy_element_method
+    async def clear(self):
+        """ Очистка поля ввода """
+        await _interaction(self)
+        await self._execute('POST', '/clear', {})
+        return self
+
+    @_lazy_element_method
+    async def set(self, text):
+        """ Ввод значения с предварительной очисткой (см. Element.set) """
+        await _interaction(self)
+        await self._execute('POST', '/clear', {})
+        if text:
+            await self._send_keys(text)
+        else:
+            # как и в Element.set: React не замечает очистку, но видит нажатия клавиш
+            await self._send_keys(' ')
+            await self._send_keys(Keys.BACKSPACE)
+        return self
+
+    async def _send_keys(self, text):
+        await self._execute('POST', '/value', {'text': text, 'value': list(text)})
+
+    @_lazy_element_method
+    async def press_enter(self):
+        """ Нажатие клавиши ENTER на элементе """
+        await self._send_keys(Keys.ENTER)
+        return self
+
+    # Свойства #########################################################################################################
+
+    @_lazy_element_method
+    async def text(self):
+        """ Видимый текст элемента """
+        return str(await self._execute('GET', '/text'))
+
+    @_lazy_element_method
+    async def tag_name(self):
+        return str(await self._execute('GET', '/name'))
+
+    @_lazy_element_method
+    async def attr(self, name):
+        """ Атрибут элемента """
+        return await self._execute('GET', '/attribute/%s' % name)
+
+    @_lazy_element_method
+    async def prop(self, name):
+        """ js-свойство элемента """
+        return await self._execute('GET', '/property/%s' % name)
+
+    @_lazy_element_method
+    async def css(self, name):
+        """ Значение css-свойства """
+        return str(await self._execute('GET', '/css/%s' % name))
+
+    async def value(self):
+        return str(await self.prop('value'))
+
+    @_lazy_element_method
+    async def rect(self):
+        """ Положение и размер элемента {x, y, width, height} """
+        return await self._execute('GET', '/rect')
+
+    @_lazy_element_method
+    async def state(self):
+        """ Снимок состояния элемента одним скриптом (см. Element.state) """
+        from .scripts import ELEMENT_STATE
+        return ElementState.from_js(await self.driver.execute_script(ELEMENT_STATE, self))
+
+    @_lazy_element_method
+    async def is_displayed(self):
+        """ Виден ли элемент на дисплее """
+        return bool(await self._execute('GET', '/displayed'))
+
+    @_lazy_element_method
+    async def is_enabled(self):
+        """ Доступен ли элемент для взаимодействия """
+        return bool(await self._execute('GET', '/enabled'))
+
+    @_lazy_element_method
+    async def is_selected(self):
+        return bool(await self._execute('GET', '/selected'))
+
+    async def is_visible(self):
+        """ Виден ли элемент на дисплее и его размеры не равны нулю """
+        return (await self.state()).visible
+
+    async def is_interaction(self):
+        """ Виден ли элемент и доступен ли для взаимодействия """
+        return (await self.state()).interaction
+
+    # wait_ - ожидания, оканчиваются TimeoutException ##################################################################
+
+    async def wait(self, predicate, message="", wait=Config.wait_timeout, pool=Config.pool_frequency):
+        """ Ожидание, пока predicate(элемент) (обычная или async-функция) не вернет истинное значение """
+        return await _wait(self, predicate, message, wait, pool)
+
+    async def wait_visible(self, wait=Config.wait_timeout):
+        return await self.wait(lambda el: el.is_visible(), "element %s is not visible" % self, wait)
+
+    async def wait_invisible(self, wait=Config.wait_timeout):
+        async def _invisible(el):
+            return not await el.exist() or not await el.is_visible()
+        return await self.wait(_invisible, "element %s is visible" % self, wait)
+
+    async def wait_text(self, txt, wait=Config.wait_timeout):
+        async def _text(el):
+            return await el.text() == txt
+        return await self.wait(_text, "element %s has no text %r" % (self, txt), wait)
+
+    async def wait_interaction(self, wait=Config.wait_timeout):
+        return await self.wait(lambda el: el.is_interaction(), "element %s is not interactable" % self, wait)
+
+
+class AsyncElementList:
+    """ Ленивый список элементов асинхронного драйвера """
+
+    def __init__(self, driver, locator):
+        self.driver = driver
+        self.locator = locator
+
+    def __repr__(self):
+        return '<AsyncElementList %s>' % self.locator
+
+    def __getitem__(self, item):
+        """ Ленивый элемент или срез списка по индексу """
+        if isinstance(item, slice):
+            return AsyncElementList(self.driver, Locator('slice', slice=item, chain=self.locator))
+        return AsyncElement(self.driver, Locator('slice int', slice=item, chain=self.locator))
+
+    def filter(self, fn):
+        """ Фильтр списка функцией от AsyncElement (обычной или async) """
+        return AsyncElementList(self.driver, Locator('filter', filter_method=fn, chain=self.locator))
+
+    async def elements(self):
+        """ Найденные элементы (с фиксированными идентификаторами) """
+        return [AsyncElement(self.driver, element_id=element_id)
+                for element_id in await self.driver.resolve(self.locator)]
+
+    async def len(self):
+        return len(await self.driver.resolve(self.locator))
+
+    async def texts(self):
+        """ Тексты всех элементов (запросы выполняются параллельно) """
+        return list(await asyncio.gather(*[el.text() for el in await self.elements()]))
+
+    async def attrs(self, name):
+        """ Атрибут name всех элементов (запросы выполняются параллельно) """
+        return list(await asyncio.gather(*[el.attr(name) for el in await self.elements()]))
+
+    async def wait(self, predicate, message="", wait=Config.wait_timeout, pool=Config.pool_frequency):
+        """ Ожидание, пока predicate(список) (обычная или async-функция) не вернет истинное значение """
+        return await _wait(self, predicate, message, wait, pool)
+
+    async def wait_len(self, ln, wait=Config.wait_timeout):
+        async def _len(items):
+            return await items.len() == ln
+        return await self.wait(_len, "length of %s is not %s" % (self, ln), wait)
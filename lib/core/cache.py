@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# Кэш результатов поиска локаторов, привязанный к "поколению" DOM страницы
+from collections import OrderedDict
+
+MISS = object()     # признак отсутствия значения в кэше
+
+
+class LocatorCache:
+    """
+        Ограниченный по размеру LRU-кэш найденных элементов. Ключ - идентичность цепочки локаторов (см.
+        Locator._cache_key), значение действительно только для того токена DOM (см. ExtendedSeleniumDriver.dom_token), при котором
+        оно было сохранено
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, token):
+        """ Возвращает сохраненное значение или MISS, если его нет или DOM с тех пор изменился """
+        item = self._data.get(key)
+        if item is None or item[0] != token:
+            self.misses += 1
+            return MISS
+        self._data.move_to_end(key)
+        self.hits += 1
+        value = item[1]
+        return list(value) if isinstance(value, list) else value
+
+    def put(self, key, token, value):
+        """ Сохраняет значение, вытесняя самые давно использованные при превышении размера """
+        self._data[key] = (token, list(value) if isinstance(value, list) else value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """ Сброс кэша (переход на другую страницу, обновление и т.п.) """
+        self._data.clear()
+
+    def stats(self):
+        """ Счетчики работы кэша """
+        return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# Компилятор списка локаторов: объединяет несколько критериев поиска в один xpath или css селектор,
+# чтобы вместо find_elements на каждый критерий и пересечения результатов выполнять один запрос
+import re
+
+from selenium.webdriver.common.by import By
+
+from .finder import _get_selector, xpath_literal
+
+# xpath-строка, которую умеем перевести в значение css-селектора
+_XPATH_STRING = re.compile(r"^(?:'([^']*)'|\"([^\"]*)\")$")
+# предикаты вида [@attr=...], [@attr] и [not(@attr)]
+_ATTR_EQUALS = re.compile(r"^\[@([\w-]+)=(.+)\]$")
+_ATTR_EXISTS = re.compile(r"^\[@([\w-]+)\]$")
+_ATTR_NOT_EXISTS = re.compile(r"^\[not\(@([\w-]+)\)\]$")
+# числовой предикат ([1], [ 2 ], [1+1]) и функции позиции
+_NUMBER = re.compile(r"^[\d\s.+\-*]+$")
+_POSITION = re.compile(r"\b(?:position|last)\s*\(")
+
+
+def _is_predicates(expr):
+    """ Состоит ли строка только из последовательности xpath-предикатов [..][..] """
+    if not expr.startswith('['):
+        return False
+    depth, quote = 0, None
+    for ch in expr:
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in '\'"':
+            quote = ch
+        elif ch == '[':
+            depth += 1
+        elif ch == ']':
+            depth -= 1
+            if depth < 0:
+                return False
+        elif depth == 0:
+            return False
+    return depth == 0 and not quote
+
+
+def _predicates(expr):
+    """ Содержимое предикатов строки [..][..] верхнего уровня (строка должна проходить _is_predicates) """
+    rz, depth, quote, start = [], 0, None, 0
+    for i, ch in enumerate(expr):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in '\'"':
+            quote = ch
+        elif ch == '[':
+            if depth == 0:
+                start = i + 1
+            depth += 1
+        elif ch == ']':
+            depth -= 1
+            if depth == 0:
+                rz.append(expr[start:i])
+    return rz
+
+
+def _is_positional(expr):
+    """
+        Есть ли среди предикатов [..][..] позиционные ([1], [last()], [position() > 2]): их смысл зависит от набора,
+        к которому они применяются, поэтому такие предикаты нельзя дописывать к другим условиям
+    """
+    return any(_NUMBER.match(pred) or _POSITION.search(pred) for pred in _predicates(expr))
+
+
+def _css_string(value):
+    """ Строка в кавычках для css-селектора """
+    return '"%s"' % value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _css_is_compound_safe(css):
+    """ Можно ли дописать к css-селектору дополнительные условия (нет перечислений и псевдоэлементов) """
+    depth, quote = 0, None
+    for ch in css:
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in '\'"':
+            quote = ch
+        elif ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            return False
+    return '::' not in css and not css.rstrip().endswith((' ', '>', '+', '~'))
+
+
+class _Criterion:
+    """ Один критерий поиска в разных представлениях """
+
+    def __init__(self, xpath_prefix, locator):
+        self.query = _get_selector(xpath_prefix, locator['type'], locator['value'])
+        by, value = self.query
+        self.relative = by != By.XPATH                  # поиск относительно базового элемента (не xpath)
+        self.predicate = self._xpath_predicate(xpath_prefix, by, value)
+        self.css_tag = value.lower() if by == By.TAG_NAME else None
+        self.css_base = value if by == By.CSS_SELECTOR and _css_is_compound_safe(value) else None
+        self.css_part = self._css_part(by, value)
+
+    @staticmethod
+    def _xpath_predicate(xpath_prefix, by, value):
+        """ Условие критерия в виде xpath-предиката к префиксу xpath_prefix """
+        if by == By.XPATH and value.startswith(xpath_prefix):
+            rest = value[len(xpath_prefix):]
+            if _is_predicates(rest):
+                return None if _is_positional(rest) else rest
+            # text_contains: <prefix>/text()[contains(...)]/.. эквивалентно <prefix>[text()[contains(...)]]
+            if rest.startswith('/text()') and rest.endswith('/..') and _is_predicates(rest[7:-3]) and \
+                    not _is_positional(rest[7:-3]):
+                return '[text()%s]' % rest[7:-3]
+        elif by == By.ID:
+            return '[@id=%s]' % xpath_literal(value)
+        elif by == By.NAME:
+            return '[@name=%s]' % xpath_literal(value)
+        elif by == By.CLASS_NAME:
+            return "[contains(concat(' ', normalize-space(@class), ' '), %s)]" % xpath_literal(' %s ' % value)
+        elif by == By.TAG_NAME:
+            return '[local-name()=%s]' % xpath_literal(value.lower())
+        return None
+
+    def _css_part(self, by, value):
+        """ Условие критерия в виде дописываемой к css-селектору части """
+        if by == By.ID:
+            return '[id=%s]' % _css_string(value)
+        elif by == By.NAME:
+            return '[name=%s]' % _css_string(value)
+        elif by == By.CLASS_NAME:
+            return '[class~=%s]' % _css_string(value)
+        elif self.predicate and not self.relative:
+            match = _ATTR_EQUALS.match(self.predicate)
+            if match:
+                literal = _XPATH_STRING.match(match.group(2))
+                if literal:
+                    text = literal.group(1) if literal.group(1) is not None else literal.group(2)
+                    return '[%s=%s]' % (match.group(1), _css_string(text))
+            match = _ATTR_EXISTS.match(self.predicate)
+            if match:
+                return '[%s]' % match.group(1)
+            match = _ATTR_NOT_EXISTS.match(self.predicate)
+            if match:
+                return ':not([%s])' % match.group(1)
+        return None
+
+
+def _merge_xpath(xpath_prefix, criteria):
+    """ Объединение критериев с xpath-предикатами в один xpath """
+    # относительные критерии (id, name, class...) ищут только внутри базового элемента, поэтому их пересечение
+    # с любыми другими - тоже относительный поиск
+    prefix = './/*' if any(c.relative for c in criteria) else xpath_prefix
+    return By.XPATH, prefix + ''.join(c.predicate for c in criteria)
+
+
+def _merge_css(criteria):
+    """ Объединение критериев в один css-селектор. Возвращает None, если это невозможно """
+    bases = [c for c in criteria if c.query[0] == By.CSS_SELECTOR]
+    tags = [c for c in criteria if c.css_tag]
+    rest = [c for c in criteria if c not in bases and c not in tags]
+    if len(bases) + len(tags) > 1 or any(c.css_base is None for c in bases) or \
+            any(c.css_part is None for c in rest):
+        return None
+    # css-селекторы всегда относительные, абсолютный xpath-префикс ('//*') с ними не совместить
+    if any(c.predicate and not c.relative and c.query[1].startswith('//') for c in rest) and \
+            not any(c.relative for c in criteria):
+        return None
+    head = bases[0].css_base if bases else (tags[0].css_tag if tags else '*')
+    return By.CSS_SELECTOR, head + ''.join(c.css_part for c in rest)
+
+
+def compile_locator_list(xpath_prefix, locator_list):
+    """
+        Компилирует список локаторов (словари {'type': ..., 'value': ...}) в минимальный список запросов (by, value).
+        Результат поиска по всем запросам с последующим пересечением совпадает с поиском по исходным локаторам.
+        Критерии, которые не выражаются общим селектором, остаются отдельными запросами
+    """
+    criteria = [_Criterion(xpath_prefix, loc) for loc in locator_list]
+    if len(criteria) < 2:
+        return [c.query for c in criteria]
+
+    css = _merge_css(criteria)
+    if css:
+        return [css]
+
+    queries = []
+    with_predicate = [c for c in criteria if c.predicate]
+    if len(with_predicate) > 1:
+        queries.append(_merge_xpath(xpath_prefix, with_predicate))
+    else:
+        with_predicate = []
+    rest = [c for c in criteria if c not in with_predicate]
+    css = _merge_css(rest) if len(rest) > 1 else None
+    if css:
+        queries.append(css)
+    else:
+        queries.extend(c.query for c in rest)
+    return queries
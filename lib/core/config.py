@@ -12,3 +12,30 @@ class Config:
     # TODO читать настройку напрямую
     wait_timeout = 4
     pool_frequency = 0.2                        # Шаг проверок и ожиданий по умолчанию
+    wait_backend = 'poll'                       # Пауза между проверками: 'poll' - sleep, 'mutation' - до мутации DOM
+    mutation_min_pause = 0.25                   # Минимальная пауза в режиме 'mutation' - доля шага проверок
+    strict_actions = False                      # Не выполнять действие с неготовым к нему элементом (TimeoutException)
+
+    adaptive_wait = False                       # Таймаут и шаг поиска локаторов без wait= - по истории их поиска
+    adaptive_wait_path = '.locator_timings.json'    # Файл истории времени поиска локаторов (см. timing)
+    adaptive_wait_factor = 3                    # Адаптивный таймаут - p99 времени поиска, умноженный на запас
+    adaptive_wait_min = 1                       # Нижняя граница адаптивного таймаута (сек.)
+    adaptive_wait_max = 30                      # Верхняя граница адаптивного таймаута (сек.)
+    adaptive_wait_samples = 20                  # Сколько замеров нужно, чтобы таймаут цепочки стал адаптивным
+
+    selectivity = False                         # Начинать поиск по нескольким критериям с самого избирательного
+    selectivity_scope = 50                      # Максимум кандидатов, у которых остальные критерии проверяются скриптом
+    chain_script = False                        # Разрешать цепочку локаторов одним js-скриптом (за одно обращение)
+    locator_cache = 0                           # Размер кэша результатов поиска локаторов (0 - кэш выключен)
+    state_ttl = 0                               # Время (сек.), в течение которого свойства элемента читаются из снимка
+
+    session_pool = 0                            # Размер общего пула браузеров для SeleniumTestCase (0 - без пула)
+    session_max_uses = 50                       # Сколько раз сессия пула выдается до пересоздания браузера
+    session_max_lifetime = 30 * 60              # Максимальное время жизни сессии пула (сек.)
+    shared_driver_service = False               # Создавать сессии chrome в одном общем процессе chromedriver-а
+
+    remote_pool_size = 4                        # Размер пула keep-alive соединений удаленной сессии
+    remote_timeout = 120                        # Таймаут ответа на команду удаленной сессии (сек.)
+    remote_connect_timeout = 10                 # Таймаут подключения к удаленному серверу (сек.)
+
+    instrument = False                          # Учитывать все команды WebDriver-а (см. instrument.recorder)
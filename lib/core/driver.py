@@ -1,22 +1,84 @@
 # -*- coding: utf-8 -*-
+import threading
 import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlsplit
 
 from selenium.webdriver.remote.webdriver import WebDriver
 
+from .cache import LocatorCache
 from .config import Config
 from .element import Element
-from .service import correct_url
+from .service import correct_url, javascript_enabled
 from .wait import Wait
 
-# глобальный текущий драйвер
-current = None
+# текущий драйвер свой у каждого потока/asyncio-задачи (driver.current), а драйвер по умолчанию - для тех, кто свой
+# не задавал (например, потоки, запущенные после создания браузера в главном потоке)
+_current = ContextVar('current_driver', default=None)
+_default = None
+# обертки драйверов WebDriver-а: id драйвера -> его ExtendedSeleniumDriver (см. extended)
+_extended = weakref.WeakValueDictionary()
+
+
+def __getattr__(name):
+    # driver.current - текущий драйвер контекста
+    if name == 'current':
+        return get_current()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def get_current():
+    """ Текущий драйвер потока/задачи, а если он не задан - драйвер по умолчанию """
+    return _current.get() or _default
 
 
 def replace_current_driver(selenium_driver):
-    """Заменяет текущий глобальный драйвер на указанный"""
-    global current
-    current = ExtendedSeleniumDriver(selenium_driver)
-    return current
+    """
+        Заменяет текущий драйвер потока/задачи на указанный. Драйвер, созданный в главном потоке (или первый
+        созданный), становится также драйвером по умолчанию для остальных потоков
+    """
+    global _default
+    our_driver = _wrap(selenium_driver)
+    _current.set(our_driver)
+    if _default is None or threading.current_thread() is threading.main_thread():
+        _default = our_driver
+    return our_driver
+
+
+@contextmanager
+def use_driver(selenium_driver):
+    """ Делает драйвер текущим на время блока with (только для текущего потока/задачи) """
+    token = _current.set(_wrap(selenium_driver))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def extended(selenium_driver):
+    """
+        ExtendedSeleniumDriver, оборачивающий драйвер WebDriver-а (например, parent элемента WebDriver-а), или None,
+        если обертки нет. Обертка возвращается как есть
+    """
+    if isinstance(selenium_driver, ExtendedSeleniumDriver):
+        return selenium_driver
+    our_driver = _extended.get(id(selenium_driver)) if selenium_driver is not None else None
+    return our_driver if our_driver is not None and our_driver.driver is selenium_driver else None
+
+
+def origin(url):
+    """ Источник страницы (схема://хост[:порт]) или None для служебных адресов (about:blank, data: и т.п.) """
+    parts = urlsplit(url or '')
+    return '%s://%s' % (parts.scheme, parts.netloc) if parts.scheme in ('http', 'https') and parts.netloc else None
+
+
+def _wrap(selenium_driver):
+    """
+        Обертка драйвера WebDriver-а: уже существующая (с ее кэшем локаторов, номером страницы и т.п.) или новая
+    """
+    return extended(selenium_driver) or ExtendedSeleniumDriver(selenium_driver)
 
 
 class ExtendedSeleniumDriver:
@@ -25,6 +87,14 @@ class ExtendedSeleniumDriver:
     """
     def __init__(self, selenium_driver):
         self.driver = selenium_driver
+        _extended[id(selenium_driver)] = self
+        self.locator_cache = LocatorCache(Config.locator_cache) if Config.locator_cache else None
+        self.async_scripts = None       # выполняет ли сессия асинхронные скрипты (None - еще не известно)
+        self.page_epoch = 0             # номер страницы: растет при каждом переходе, обновлении, шаге по истории
+        self.page_url = None            # последний известный адрес страницы (для статистики поиска, см. selectivity)
+        self.origins = set()            # источники открытых страниц (для очистки сессии пула, см. pool)
+        if Config.instrument:
+            self.instrument()
 
     def __getattr__(self, item):
         return getattr(self.driver, item)
@@ -34,6 +104,18 @@ class ExtendedSeleniumDriver:
         if isinstance(self.driver, WebDriver):
             return self.driver
 
+    def s(self, *args, **kwargs):
+        """ Аналог finder.s(), привязанный к этому драйверу (а не к текущему) """
+        from .finder import s
+        kwargs.setdefault('driver', self)
+        return s(*args, **kwargs)
+
+    def ss(self, *args, **kwargs):
+        """ Аналог finder.ss(), привязанный к этому драйверу (а не к текущему) """
+        from .finder import ss
+        kwargs.setdefault('driver', self)
+        return ss(*args, **kwargs)
+
     @property
     def _xpath_prefix(self):
         return '//*'
@@ -57,6 +139,48 @@ class ExtendedSeleniumDriver:
         """ Рабочая ОС """
         return str(self.driver.capabilities['platform'])
 
+    def instrument(self, recorder=None):
+        """
+            Включает учет всех команд WebDriver-а этой сессии (см. instrument.Recorder). По умолчанию записи
+            собираются в общий instrument.recorder
+        """
+        from .instrument import install
+        install(self.driver, recorder)
+        return self
+
+    def use_locator_cache(self, maxsize=256):
+        """ Включает кэш результатов поиска локаторов заданного размера (0 - выключает) """
+        self.locator_cache = LocatorCache(maxsize) if maxsize else None
+        return self
+
+    def dom_token(self):
+        """
+            Токен текущего состояния DOM страницы: меняется при переходе на другую страницу и при любой мутации DOM
+            (отслеживается внедряемым на страницу MutationObserver-ом)
+        """
+        from .scripts import DOM_TOKEN
+        try:
+            return self.driver.execute_script(DOM_TOKEN)
+        except Exception:
+            return None
+
+    def document_id(self):
+        """
+            Идентификатор текущего документа (без счетчика мутаций, см. dom_token): меняется при любой загрузке
+            страницы, в том числе вызванной кликом или скриптом страницы. None - не удалось определить
+        """
+        if not javascript_enabled(self):
+            return getattr(self.driver, 'document_id', None)
+        token = self.dom_token()
+        return token.rpartition(':')[0] if token else None
+
+    def _page_changed(self):
+        """ Сброс состояния, привязанного к текущей странице """
+        self.page_epoch += 1
+        self.page_url = None
+        if self.locator_cache is not None:
+            self.locator_cache.clear()
+
     def add_base_url(self, url=None):
         if url is None or not isinstance(url, str):
             pass
@@ -90,23 +214,43 @@ class ExtendedSeleniumDriver:
             https:// """
         url = correct_url(url)
         self.driver.get(url)
+        self._page_changed()
+        self._visit(url)
         return self
 
     def raw_get(self, url):
         """ Переход без подстановок """
         self.driver.get(url)
+        self._page_changed()
+        self._visit(url)
         return self
 
     @property
     def url(self):
         """ Возвращает текущий url страницы """
-        return str(self.driver.current_url)
+        self._visit(str(self.driver.current_url))
+        return self.page_url
+
+    def _visit(self, url):
+        """ Запоминает адрес текущей страницы и ее источник """
+        self.page_url = url
+        if origin(url):
+            self.origins.add(origin(url))
 
     @property
     def html(self):
         """ Возвращает весь код страницы """
         return str(self.driver.page_source)
 
+    def snapshot(self):
+        """
+            Снимок DOM текущей страницы: код страницы забирается одним обращением к браузеру, а дальнейший поиск
+            (s/ss с теми же параметрами) и чтение свойств выполняются локально. Элемент снимка можно превратить
+            обратно в живой элемент методом live()
+        """
+        from .snapshot import DomSnapshot
+        return DomSnapshot(self.driver.page_source)
+
     @property
     def title(self):
         """ Возвращает заголовок страницы """
@@ -116,6 +260,15 @@ class ExtendedSeleniumDriver:
         """ Выполняет на странице произвольный js-скрипт """
         return self.driver.execute_script(script, *args)
 
+    def extract(self, schema):
+        """
+            Извлекает данные страницы по схеме {поле: описание} одним обращением к браузеру. Описание - ленивый
+            элемент (s(...) - текст, ss(...) - список текстов), extract.field(локатор, что_читать, fn=...) или
+            extract.block(локатор, схема) для повторяющихся блоков. Ненайденные значения - None
+        """
+        from .extract import extract
+        return extract(self.driver, [None], schema)[0]
+
     @property
     def time_load(self):
         """ Возвращает время загрузки страницы """
@@ -140,26 +293,33 @@ class ExtendedSeleniumDriver:
 
     def quit(self):
         """ Закончить сессию работы с браузером """
-        self.driver.quit()
+        from .transport import close_connections
+        try:
+            self.driver.quit()
+        finally:
+            close_connections(self.driver)
 
     def close_and_quit(self):
         """ Объединение предыдущих методов в один """
         self.driver.close()
-        self.driver.quit()
+        self.quit()
 
     def back(self):
         """ Шаг назад в истории браузера """
         self.driver.back()
+        self._page_changed()
         return self
 
     def forward(self):
         """ Шаг врепед в истории браузера """
         self.driver.forward()
+        self._page_changed()
         return self
 
     def refresh(self):
         """ Обновить страницу """
         self.driver.refresh()
+        self._page_changed()
         return self
 
     def delete_cookies(self):
@@ -282,11 +442,28 @@ class ExtendedSeleniumDriver:
 
     ####################################################################################################################
 
+    def check_condition(self, spec):
+        """ Проверка условия страницы (см. condition.BaseCondition.to_js) одним скриптом; None - драйвер без javascript """
+        from .scripts import CHECK_CONDITION
+        if not javascript_enabled(self):
+            return None
+        return self.driver.execute_script(CHECK_CONDITION, None, spec)
+
     def wait(self, condition, message="", wait=Config.wait_timeout, pool=Config.pool_frequency):
         """ Ожидание """
         Wait(self, wait, pool).until(condition, message)
         return self
 
+    def wait_any(self, *pairs, **kwargs):
+        """ Ожидание первого выполнившегося из нескольких условий (см. multi_wait.wait_any), цель None - этот драйвер """
+        from .multi_wait import wait_any
+        return wait_any(*[(self if target is None else target, condition) for target, condition in pairs], **kwargs)
+
+    def wait_all(self, *pairs, **kwargs):
+        """ Ожидание выполнения всех условий (см. multi_wait.wait_all), цель None - этот драйвер """
+        from .multi_wait import wait_all
+        return wait_all(*[(self if target is None else target, condition) for target, condition in pairs], **kwargs)
+
     ####################################################################################################################
 
     def focused(self):
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Общие для процесса сервисы драйверов (chromedriver): бинарник драйвера запускается один раз, а новые сессии
+# создаются через Remote к уже работающему сервису. Сервисы останавливаются при выходе из процесса
+import atexit
+import threading
+
+from selenium import webdriver
+from selenium.webdriver.chrome.remote_connection import ChromeRemoteConnection
+from selenium.webdriver.chrome.service import Service as ChromeService
+
+# браузеры, драйвер которых держит несколько сессий в одном процессе (geckodriver - только одну)
+SHARED_BROWSERS = ('chrome',)
+
+_services = {}
+_lock = threading.Lock()
+
+
+def shared_service(browser_name, executable_path=None, port=0, service_args=None, log_path=None):
+    """
+        Возвращает запущенный общий сервис драйвера для браузера browser_name (при первом обращении или если
+        процесс сервиса завершился - запускает новый). Параметры учитываются только при запуске сервиса
+    """
+    if browser_name not in SHARED_BROWSERS:
+        raise ValueError(browser_name)
+
+    with _lock:
+        service = _services.get(browser_name)
+        if service is not None and service.process.poll() is not None:
+            # процесс драйвера упал или был убит - перезапускаем
+            service = None
+        if service is None:
+            service = ChromeService(executable_path or 'chromedriver', port, service_args, log_path)
+            service.start()
+            _services[browser_name] = service
+        return service
+
+
+def stop_services():
+    """ Останавливает все общие сервисы драйверов (открытые в них сессии при этом закрываются) """
+    with _lock:
+        services = list(_services.values())
+        _services.clear()
+    for service in services:
+        try:
+            service.stop()
+        except Exception:
+            pass
+
+
+atexit.register(stop_services)
+
+
+def shared_chrome(executable_path='chromedriver', port=0, options=None, service_args=None,
+                  desired_capabilities=None, service_log_path=None, chrome_options=None, keep_alive=True):
+    """
+        Новая сессия chrome в общем сервисе chromedriver-а. Параметры совпадают с webdriver.Chrome (executable_path,
+        port, service_args и service_log_path учитываются только при запуске сервиса); quit() закрывает только
+        сессию, сервис продолжает работать
+    """
+    service = shared_service('chrome', executable_path, port, service_args, service_log_path)
+    capabilities = dict(desired_capabilities or {})
+    capabilities.update((options or chrome_options or webdriver.ChromeOptions()).to_capabilities())
+    return webdriver.Remote(command_executor=ChromeRemoteConnection(service.service_url, keep_alive=keep_alive),
+                            desired_capabilities=capabilities)
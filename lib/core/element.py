@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import io
-from selenium.common.exceptions import StaleElementReferenceException
+import time
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
 
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
@@ -8,8 +9,13 @@ from selenium.webdriver.remote.webelement import WebElement
 
 from .config import Config
 from .finder import s, ss
-from .service import Attributes, interaction
-from .wait import Wait
+from .instrument import origin
+from .service import Attributes, ElementState, async_scripts_unsupported, interaction, javascript_enabled
+from .wait import Wait, deadline
+
+# счетчик действий со страницей: любое действие может изменить состояние любых элементов, поэтому снимки состояния,
+# полученные до него, больше не используются (см. Element.state)
+_actions = 0
 
 
 def _lazy_element_method(fn):
@@ -17,16 +23,55 @@ def _lazy_element_method(fn):
     Декоратор для методов работы с ленивым элементом.
     Если элемент не загружен, то загружает; если загружен - то использует его.
     Но если при выполнении метода выясняется, что элемент исчез, то ищет его заного и пробует еще раз.
+    Поиск, ожидание интерактивности и повторный поиск укладываются в один общий бюджет времени.
+    Команды WebDriver-а внутри метода учитываются как вызванные этим методом элемента (см. instrument).
     """
     def wrap(el, *args, **kwargs):
-        el.resolve()
+        with deadline(el._budget()), origin(el.locator, fn.__name__):
+            el.resolve()
+            try:
+                return fn(el, *args, **kwargs)
+            except StaleElementReferenceException as e:
+                if el._owner is not None:
+                    el._owner._stale()
+                if el.reload():
+                    return fn(el, *args, **kwargs)
+                else:
+                    raise e
+
+    return wrap
+
+
+def _wait_gone(target, wait):
+    """
+        Ожидание исчезновения элемента или опустения списка target (см. Element.wait_not_exist). Возвращает True,
+        если цели больше нет
+    """
+    from .scripts import WAIT_GONE
+
+    browser = target.locator.browser() if target.locator else None
+    steps = target.locator._script_steps() if browser and javascript_enabled(browser) else None
+    if steps is not None and getattr(browser, 'async_scripts', None) is not False and wait:
+        try:
+            return browser.execute_async_script(WAIT_GONE, steps, int(wait * 1000))
+        except TimeoutException:
+            # таймаут асинхронных скриптов сессии меньше ожидания - дожидаемся проверками
+            pass
+        except Exception as e:
+            # асинхронные скрипты не поддерживаются - больше не пробуем, а после разового сбоя - только эта проверка
+            if async_scripts_unsupported(e):
+                browser.async_scripts = False
+    return target.not_exist() or bool(Wait(target, wait, backend='mutation').bool(lambda _: target.not_exist()))
+
+
+def _action_method(fn):
+    """ Декоратор действий с элементом (клик, ввод и т.п.): после действия снимки состояния элементов устаревают """
+    def wrap(el, *args, **kwargs):
+        global _actions
         try:
             return fn(el, *args, **kwargs)
-        except StaleElementReferenceException as e:
-            if el.reload():
-                return fn(el, *args, **kwargs)
-            else:
-                raise e
+        finally:
+            _actions += 1
 
     return wrap
 
@@ -34,10 +79,11 @@ def _lazy_element_method(fn):
 class Element:
     """Ленивая обертка для selenium'ного элемента"""
 
-    def __init__(self, locator=None, element=None):
+    def __init__(self, locator=None, element=None, owner=None):
         """
         Можно инициализировать либо локатором, либо уже найденым элементом.
         В первом случае элемент можно будет "обновлять" по локатору, во втором - элемент фиксированный.
+        owner - зафиксированный список, из которого взят элемент (узнает, если элемент исчез со страницы).
         """
         if not (locator or element):
             raise ValueError()
@@ -46,6 +92,9 @@ class Element:
         self._element: WebElement = element     # Элемент классического WebElement-а, если есть и/или найден
         self._id = None
         self._refind = False
+        self._state = None          # последний снимок состояния (см. state)
+        self._state_key = None      # (время снимка, счетчик действий) для проверки его актуальности
+        self._owner = owner
 
     def __eq__(self, element):
         """ Сравнение двух элементов """
@@ -57,7 +106,10 @@ class Element:
         return not self.__eq__(element)
 
     def __bool__(self):
-        """ Метод bool для проверки, найден ли элемент """
+        """
+            Метод bool для проверки, найден ли элемент (с ожиданием его появления, как exist()). Для быстрой
+            отрицательной проверки - not_exist() или exist(0)
+        """
         try:
             self.reload()
             return True
@@ -76,10 +128,15 @@ class Element:
             self._element = self.locator.search()
             self._id = self._element._id
             self._refind = True
+            self._state = None
             return True
         else:
             return False
 
+    def _budget(self):
+        """ Бюджет времени на операцию с элементом - максимальное ожидание цепочки его локатора """
+        return self.locator.timeout() if self.locator else Config.wait_timeout
+
     def resolve(self):
         """Загружает элемент, если он еще не загружен"""
         if not self._element:
@@ -87,7 +144,23 @@ class Element:
 
     def not_wait(self):
         """ Возвращает элемент, идентичный self, но с нулевым ожиданием всех уровней поиска """
-        pass
+        return Element(self.locator.not_wait()) if self.locator else Element(None, element=self._element)
+
+    def _probe(self):
+        """ Одна попытка найти элемент без ожидания (см. Locator.probe). Найденный элемент запоминается """
+        if not self.locator:
+            try:
+                self._element.is_enabled()
+                return True
+            except StaleElementReferenceException:
+                return False
+        found = self.locator.probe()
+        if found is None:
+            return False
+        self._element, self._id = found, found._id
+        self._refind = True
+        self._state = None
+        return True
 
     def closest_with_class(self, class_name):
         """Возвращает ближайшего родителя с указанным классом"""
@@ -101,10 +174,10 @@ class Element:
 
     @property
     def parent(self):
-        """ Возвращает текущий браузер """
+        """ Возвращает браузер элемента (драйвер его локатора или текущий) """
         # просто шорткат
         from lib.core import driver
-        return driver.current
+        return self.locator.browser() if self.locator else driver.current
 
     @_lazy_element_method
     def unwrap(self):
@@ -128,13 +201,15 @@ class Element:
         """ Аналогично методу ss() из driver.py """
         return ss(*args, chain=self.locator, **kwargs)
 
+    @_action_method
     @_lazy_element_method
     def click(self):
         """ Клик по элементу """
-        interaction(self)
+        interaction(self, pointer=True)
         self._element.click()
         return self
 
+    @_action_method
     @_lazy_element_method
     def click_on_offset(self, x, y):
         """
@@ -144,6 +219,7 @@ class Element:
         """
         ActionChains(self._element._parent).move_to_element_with_offset(self._element, x, y).click().perform()
 
+    @_action_method
     @_lazy_element_method
     def mouse_click(self):
         """ Клик мышью по элементу """
@@ -168,6 +244,7 @@ class Element:
         self._element._parent.execute_script("window.scrollBy(0, " + str(y) + ");")
         return self
 
+    @_action_method
     @_lazy_element_method
     def write(self, *value):
         """ Ввод значения с клавиатуры """
@@ -175,6 +252,7 @@ class Element:
         self._element.send_keys(*value)
         return self
 
+    @_action_method
     @_lazy_element_method
     def set(self, text):
         """ Ввод значения с клавиатуры с предварительной очисткой (если например в форме уже были символы) """
@@ -191,18 +269,21 @@ class Element:
 
         return self
 
+    @_action_method
     @_lazy_element_method
     def press_enter(self):
         """ Нажатие клавиши ENTER на выбранном элементе """
         self._element.send_keys(Keys.ENTER)
         return self
 
+    @_action_method
     @_lazy_element_method
     def press_escape(self):
         """ Нажатие клавиши ESCAPE на выбранном элементе """
         self._element.send_keys(Keys.ESCAPE)
         return self
 
+    @_action_method
     @_lazy_element_method
     def clear(self):
         """ Очистка выбранного элемента (например поля ввода от ранее введенных данных) """
@@ -210,6 +291,7 @@ class Element:
         self._element.clear()
         return self
 
+    @_action_method
     @_lazy_element_method
     def check(self):
         """ Клик по элементу, если у него отсутствует атрибут checked (чекбокс, если не выбран - выберется) """
@@ -218,6 +300,7 @@ class Element:
             self._element.click()
         return self
 
+    @_action_method
     @_lazy_element_method
     def uncheck(self):
         """ Клик по элементы, если у него есть атрибут checked (отжать чекбокс) """
@@ -228,17 +311,166 @@ class Element:
 
     ####################################################################################################################
 
-    def exist(self):
-        """ Проверка, существует ли элемент на странице """
+    @_lazy_element_method
+    def state(self, max_age=None):
+        """
+            Неизменяемый снимок состояния элемента (tag, text, rect, displayed, enabled, selected, checked, value,
+            attributes), полученный одним обращением к браузеру. Снимок не старше max_age секунд (по умолчанию
+            Config.state_ttl) и сделанный после последнего действия со страницей берется из кэша
+        """
+        cached = self._fresh_state(max_age)
+        if cached:
+            return cached
+        from .scripts import ELEMENT_STATE
+        if javascript_enabled(self.parent):
+            data = self._element._parent.execute_script(ELEMENT_STATE, self._element)
+        else:
+            data = self._native_state()
+        self._state = ElementState.from_js(data)
+        self._state_key = (time.time(), _actions)
+        return self._state
+
+    def _native_state(self):
+        """ Состояние элемента обычными командами WebDriver-а (для драйверов без javascript) """
+        el = self._element
+        size, location = el.size, el.location
+        return {'tag': el.tag_name, 'text': el.text, 'displayed': el.is_displayed(), 'enabled': el.is_enabled(),
+                'rect': {'x': location['x'], 'y': location['y'], 'width': size['width'], 'height': size['height']},
+                'selected': el.is_selected(), 'checked': bool(el.get_attribute('checked')),
+                'value': el.get_attribute('value'), 'attributes': {}}
+
+    @_lazy_element_method
+    def extract(self, schema):
+        """ Извлекает данные по схеме относительно элемента одним обращением к браузеру (см. driver.extract) """
+        from .extract import extract
+        return extract(self._element._parent, [self._element], schema)[0]
+
+    @_lazy_element_method
+    def as_table(self, html=False):
+        """
+            Разбирает таблицу (<table>, <dl> или сетку блоков "название - значение") одним обращением к браузеру.
+            Возвращает список строк-словарей: ключи - заголовки таблицы (th), а если их нет - номера колонок.
+            Пробелы в текстах нормализуются, html=True - значения (кроме первой колонки) в виде innerHTML
+        """
+        from .scripts import TABLE_ROWS
+        table = self._element._parent.execute_script(TABLE_ROWS, self._element, html)
+        header = table['header']
+        return [dict(zip(header if header else range(len(row)), row)) for row in table['rows']]
+
+    @_lazy_element_method
+    def as_key_values(self, html=False):
+        """
+            Разбирает таблицу характеристик в упорядоченный словарь {название: значение} одним обращением к браузеру:
+            первая ячейка строки - название, вторая - значение (см. as_table). Отсутствующая характеристика - просто
+            отсутствующий ключ, без ожидания
+        """
+        from .scripts import TABLE_ROWS
+        rz = {}
+        for row in self._element._parent.execute_script(TABLE_ROWS, self._element, html)['rows']:
+            rz.setdefault(row[0], row[1])
+        return rz
+
+    @_lazy_element_method
+    def actionability(self, scroll=False, pointer=True):
+        """
+            Проверка готовности элемента к клику или вводу одним асинхронным скриптом: элемент в документе, видим,
+            имеет ненулевую площадь, доступен, а для клика (pointer=True) еще и не перекрыт другим элементом в точке
+            клика и не двигается. Возвращает словарь {'ok': True} или {'ok': False, 'reason': причина, ...}. Проверка
+            ничего не меняет на странице, поэтому перекрытие элемента вне экрана не проверяется; scroll=True - такой
+            элемент сначала прокручивается в видимую область (так делает проверка перед кликом, см.
+            service.interaction)
+        """
+        from .scripts import ACTIONABILITY
+        browser = self.parent
+        if javascript_enabled(browser) and getattr(browser, 'async_scripts', None) is not False:
+            try:
+                return browser.execute_async_script(ACTIONABILITY, self._element, scroll, pointer)
+            except StaleElementReferenceException:
+                raise
+            except Exception as e:
+                # сессия без асинхронных скриптов - больше не пробуем, а разовый сбой (например, переход на другую
+                # страницу во время проверки) - только эта проверка по снимку состояния
+                if async_scripts_unsupported(e):
+                    browser.async_scripts = False
+        state = self.state(0)
+        if state.interaction:
+            return {'ok': True}
+        return {'ok': False, 'reason': 'not visible' if not state.visible else 'disabled'}
+
+    @_lazy_element_method
+    def check_condition(self, spec):
+        """
+            Проверка условия ожидания (см. condition.BaseCondition.to_js) одним скриптом: {'ok': результат,
+            'actual': наблюдаемые значения}. None - драйвер без javascript
+        """
+        from .scripts import CHECK_CONDITION
+        if not javascript_enabled(self.parent):
+            return None
+        return self._element._parent.execute_script(CHECK_CONDITION, self._element, spec)
+
+    def _fresh_state(self, max_age=None):
+        """ Кэшированный снимок состояния, если он еще актуален, иначе None """
+        max_age = Config.state_ttl if max_age is None else max_age
+        if self._state is None or not max_age:
+            return None
+        created, actions = self._state_key
+        if actions != _actions or time.time() - created > max_age:
+            return None
+        return self._state
+
+    ####################################################################################################################
+
+    def exist(self, wait=None):
+        """
+            Проверка, существует ли элемент на странице, с ожиданием его появления (по умолчанию - ожидание локатора).
+            wait=0 - мгновенная проверка одной попыткой поиска
+        """
+        if wait == 0:
+            return self._probe()
         try:
-            self.reload()
+            if wait is None:
+                self.reload()
+            else:
+                with deadline(wait):
+                    self.reload()
             return True
         except:
             return False
 
-    def not_exist(self):
-        """ Проверка, существует ли элемент на странице """
-        return not self.exist()
+    def not_exist(self, wait=0):
+        """
+            Проверка отсутствия элемента на странице: по умолчанию мгновенная, без ожидания появления элемента.
+            wait - сколько секунд ждать исчезновения элемента (см. wait_not_exist)
+        """
+        if not wait:
+            return not self._probe()
+        try:
+            self.wait_not_exist(wait)
+            return True
+        except TimeoutException:
+            return False
+
+    def wait_not_exist(self, wait=Config.wait_timeout, message=""):
+        """
+            Ожидание исчезновения элемента со страницы. Завершается сразу, если элемента уже нет, иначе - на первой
+            мутации DOM, после которой элемент не находится. Цепочка локаторов, выражаемая в js, ждется одним
+            асинхронным скриптом в браузере, иначе - проверками без ожидания после каждой мутации (или шага ожидания)
+        """
+        with deadline(wait):
+            if _wait_gone(self, wait):
+                return self
+            raise TimeoutException("""
+                element is still present after %s seconds: %s%s
+            """ % (wait, self.locator, message))
+
+    def wait_not_visible(self, wait=Config.wait_timeout, message=""):
+        """ Ожидание исчезновения или невидимости элемента; завершается сразу, если элемента уже не видно """
+        with deadline(wait):
+            if self.is_not_visible() or Wait(self, wait, backend='mutation').bool(lambda _: self.is_not_visible()):
+                return self
+            raise TimeoutException("""
+                element is still visible after %s seconds: %s%s
+            """ % (wait, self.locator, message))
 
     ####################################################################################################################
 
@@ -246,6 +478,9 @@ class Element:
     @_lazy_element_method
     def text(self):
         """ Возвращает текст элемена """
+        state = self._fresh_state()
+        if state:
+            return state.text
         return str(self._element.text)
 
     @property
@@ -280,6 +515,9 @@ class Element:
     @_lazy_element_method
     def size(self):
         """ Возвращает список - размер элемента """
+        state = self._fresh_state()
+        if state:
+            return state.size
         val = self._element.size
         return [val['width'], val['height']]
 
@@ -294,17 +532,26 @@ class Element:
     @_lazy_element_method
     def location(self):
         """ Возвращает список с координатами элемента """
+        state = self._fresh_state()
+        if state:
+            return state.location
         return [self._element.location['x'], self._element.location['y']]
 
     @property
     def x(self):
         """ х-коорината элемента """
+        state = self._fresh_state()
+        if state:
+            return int(state.location[0])
         return int(self._element.location['x'])
 
     @property
     @_lazy_element_method
     def y(self):
         """ у-координата элемента """
+        state = self._fresh_state()
+        if state:
+            return int(state.location[1])
         return int(self._element.location['y'])
 
     @_lazy_element_method
@@ -357,31 +604,43 @@ class Element:
     @_lazy_element_method
     def is_displayed(self):
         """ Виден ли элемент на дисплее """
+        state = self._fresh_state()
+        if state:
+            return state.displayed
         return self._element.is_displayed()
 
     @_lazy_element_method
     def is_visible(self):
         """ Виден ли элемент на дисплее и его размеры не должны равняться нулю """
-        return self.is_displayed() and self.area > 0
+        return self.state().visible
 
     @_lazy_element_method
     def is_enabled(self):
         """ Доступен ли элемент для взаимодействия """
+        state = self._fresh_state()
+        if state:
+            return state.enabled
         return self._element.is_enabled()
 
     @_lazy_element_method
     def is_interaction(self):
         """ Доступен ли элемент для взаимодействия и является ли он видимым для пользователя """
-        return self.is_visible() and self.is_enabled()
+        return self.state().interaction
 
     @_lazy_element_method
     def is_selected(self):
         """ Выбран ли элемент """
+        state = self._fresh_state()
+        if state:
+            return state.selected
         return self._element.is_selected()
 
     @_lazy_element_method
     def is_check(self):
         """ Чекнут ли элемент """
+        state = self._fresh_state()
+        if state:
+            return state.checked
         return bool(self._element.get_attribute('checked'))
 
     @_lazy_element_method
@@ -390,11 +649,13 @@ class Element:
         return self.text == txt
 
     def is_not_visible(self):
-        """ Отсутствует ли элемент на странице или элемент невидим """
-        if self.exist():
-            if self.is_visible():
-                return False
-        return True
+        """ Отсутствует ли элемент на странице или элемент невидим (без ожидания появления элемента) """
+        if not self._probe():
+            return True
+        try:
+            return not self.state(0).visible
+        except (NoSuchElementException, StaleElementReferenceException):
+            return True
 
     @_lazy_element_method
     def is_partial_text(self, txt):
@@ -418,9 +679,10 @@ class Element:
 
     # wait_ - ожидания, оканчиваются TimeoutException ##################################################################
 
-    @_lazy_element_method
     def wait(self, condition, message="", wait=Config.wait_timeout, pool=Config.pool_frequency):
-        """ Базовое ожидание """
+        """ Базовое ожидание. Поиск элемента и само ожидание укладываются во время wait """
         message = message if message != "" else condition
-        Wait(self, wait, pool).until(condition, message)
+        with deadline(wait):
+            self.resolve()
+            Wait(self, wait, pool).until(condition, message)
         return self
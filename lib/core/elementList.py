@@ -1,6 +1,12 @@
 # -*- coding: utf-8 -*-
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+
+from . import element
+from .config import Config
 from .element import Element
+from .extract import Field, as_field
 from .finder import Locator
+from .wait import deadline
 
 
 class ElementList(list):
@@ -8,45 +14,221 @@ class ElementList(list):
     Список элементов.
 
     По факту совесем даже не список, больше обертка над локатором.
-    На каждое действие перезапрашивает элементы.
+    На каждое действие перезапрашивает элементы, если список не зафиксирован методом freeze().
     """
 
     def __init__(self, locator):
         super().__init__()
         self.locator = locator
+        self._frozen = None         # зафиксированные элементы WebDriver-а (см. freeze)
+        self._frozen_page = None    # (номер страницы драйвера, идентификатор документа) на момент фиксации
+        self._frozen_actions = None # счетчик действий с элементами на момент последней сверки документа
 
     def __bool__(self):
         return len(self) > 0
 
     def __len__(self):
-        return len(self.locator.search())
+        return len(self._elements())
 
     def __getitem__(self, item):
         if isinstance(item, slice):
             locator = Locator('slice', slice=item, chain=self.locator)
-            return ElementList(locator)
+            rz = ElementList(locator)
+            if self._frozen is not None:
+                rz._frozen = self._elements()[item]
+                rz._frozen_page, rz._frozen_actions = self._frozen_page, self._frozen_actions
+            return rz
         else:
             locator = Locator('slice int', slice=item, chain=self.locator)
+            if self._frozen is not None:
+                return Element(locator, element=self._elements()[item], owner=self)
             return Element(locator)
 
     def __iter__(self):
-        for el in self.locator.search():
-            yield Element(None, element=el)
+        if self._frozen is not None:
+            for i, el in enumerate(self._elements()):
+                yield Element(Locator('slice int', slice=i, chain=self.locator), element=el, owner=self)
+        else:
+            for el in self.locator.search():
+                yield Element(None, element=el)
 
     def unwrap(self):
         """ Возвращает список классических элементов WebDriver-а """
-        return self.locator.search()
+        return list(self._elements())
+
+    def not_exist(self, wait=0):
+        """
+            Проверка отсутствия элементов на странице: по умолчанию мгновенная, одной попыткой поиска без ожидания.
+            wait - сколько секунд ждать исчезновения всех элементов (см. wait_not_exist)
+        """
+        if not wait:
+            return not self.locator.probe()
+        try:
+            self.wait_not_exist(wait)
+            return True
+        except TimeoutException:
+            return False
+
+    def wait_not_exist(self, wait=Config.wait_timeout, message=""):
+        """ Ожидание исчезновения всех элементов списка со страницы (см. Element.wait_not_exist) """
+        from .element import _wait_gone
+
+        with deadline(wait):
+            if _wait_gone(self, wait):
+                return self
+            raise TimeoutException("""
+                elements are still present after %s seconds: %s%s
+            """ % (wait, self.locator, message))
+
+    # Фиксация списка ##################################################################################################
+
+    def freeze(self):
+        """
+            Фиксирует список: элементы ищутся один раз, а длина, индексы, срезы и перебор дальше обслуживаются из
+            памяти. Список перезапрашивается после перехода на другую страницу через драйвер (get, refresh, back,
+            forward), а также если после действия с элементом (например, клик по ссылке или фильтр, перерисовавший
+            список) загрузился другой документ или найденные элементы исчезли из него - после действий это
+            сверяется одним обращением к браузеру. Перерисовка страницы без действий замечается по исчезнувшему
+            элементу: при чтении значений списка или действии с его элементом
+        """
+        self._frozen = self.locator.search()
+        self._frozen_page = self._page()
+        self._frozen_actions = element._actions
+        return self
+
+    def unfreeze(self):
+        """ Возвращает список в обычный режим (перезапрос элементов на каждое действие) """
+        self._frozen = self._frozen_page = self._frozen_actions = None
+        return self
+
+    def snapshot(self):
+        """ Новый зафиксированный список по тому же локатору (сам список остается в обычном режиме) """
+        return ElementList(self.locator).freeze()
+
+    def _elements(self):
+        """ Найденные элементы: зафиксированные, если они еще актуальны, иначе - результат нового поиска """
+        if self._frozen is None:
+            return self.locator.search()
+        browser = self.locator.browser()
+        if self._frozen_page[0] != getattr(browser, 'page_epoch', None):
+            self.freeze()
+        elif self._frozen_actions != element._actions:
+            # после действий с элементами страница могла смениться или перерисоваться - сверяем документ и элементы
+            self._frozen_actions = element._actions
+            if not self._actual():
+                self.freeze()
+        return self._frozen
+
+    def _stale(self):
+        """ Элемент списка исчез со страницы - при следующем обращении список сверяется со страницей """
+        if self._frozen is not None:
+            self._frozen_actions = None
+
+    def _actual(self):
+        """ Тот же ли документ и все ли зафиксированные элементы еще в нем (одно обращение к браузеру) """
+        from .scripts import FROZEN_STATE
+        from .service import javascript_enabled
+
+        browser = self.locator.browser()
+        if not self._frozen or not javascript_enabled(browser):
+            return self._frozen_page == self._page()
+        try:
+            token, attached = browser.execute_script(FROZEN_STATE, self._frozen)
+        except StaleElementReferenceException:
+            return False
+        return attached and self._frozen_page == (getattr(browser, 'page_epoch', None), token.rpartition(':')[0])
+
+    def _page(self):
+        """ Номер страницы драйвера и идентификатор текущего документа (см. ExtendedSeleniumDriver.document_id) """
+        browser = self.locator.browser()
+        document_id = getattr(browser, 'document_id', None)
+        return getattr(browser, 'page_epoch', None), document_id() if callable(document_id) else None
+
+    # Пакетное чтение свойств: значения всех элементов списка читаются одним js-скриптом ###########################
+
+    def columns(self, **spec):
+        """
+            Возвращает значения всех элементов списка по колонкам: {имя: [значения]}. Значение колонки - описание
+            поля (см. extract.Field) или строка, например ss(...).columns(title='text', link='href', price=css('.price')).
+            Драйвер без javascript (HttpDriver) читает значения у каждого элемента обычными командами
+        """
+        from .extract import native_value
+        from .scripts import EXTRACT_COLUMNS
+        from .service import javascript_enabled
+
+        spec = {name: as_field(value).to_js() for name, value in spec.items()}
+        for attempt in range(2):
+            elements = self.unwrap()
+            if not elements:
+                return {name: [] for name in spec}
+            try:
+                if not javascript_enabled(self.locator.browser()):
+                    return {name: [native_value(el, field) for el in elements] for name, field in spec.items()}
+                return elements[0]._parent.execute_script(EXTRACT_COLUMNS, elements, spec)
+            except StaleElementReferenceException:
+                # список изменился между поиском и чтением - ищем еще раз
+                if attempt:
+                    raise
+                if self._frozen is not None:
+                    self.freeze()
+
+    def check_condition(self, spec):
+        """
+            Проверка условия ожидания (см. condition.BaseCondition.to_js) для всего списка одним скриптом: свойства
+            элементов проверяются у каждого элемента. None - драйвер без javascript
+        """
+        from .scripts import CHECK_CONDITION
+        from .service import javascript_enabled
+
+        browser = self.locator.browser()
+        if not javascript_enabled(browser):
+            return None
+        for attempt in range(2):
+            try:
+                return browser.execute_script(CHECK_CONDITION, self.unwrap(), spec)
+            except StaleElementReferenceException:
+                if attempt:
+                    raise
+                if self._frozen is not None:
+                    self.freeze()
+
+    def extract(self, schema):
+        """ Извлекает данные по схеме для каждого элемента списка одним обращением к браузеру (список словарей) """
+        from .extract import extract
+        for attempt in range(2):
+            elements = self.unwrap()
+            try:
+                return extract(elements[0]._parent, elements, schema) if elements else []
+            except StaleElementReferenceException:
+                if attempt:
+                    raise
+                if self._frozen is not None:
+                    self.freeze()
+
+    def _column(self, field):
+        return self.columns(value=field)['value']
+
+    def texts(self):
+        """ Тексты всех элементов """
+        return self._column(Field('text'))
+
+    def attrs(self, name):
+        """ Значения атрибута name у всех элементов """
+        return self._column(Field('attr', name))
+
+    def rects(self):
+        """ Координаты и размеры всех элементов: словари x, y, width, height """
+        return self._column(Field('rect'))
 
-    # @property
-    # def text(self):
-    #     """ Возвращает тексты всех найденных элементов """
-    #     return [el.text for el in self]
+    def visibility(self):
+        """ Видимость всех элементов (виден на дисплее и площадь больше нуля) """
+        return self._column(Field('visible'))
 
     def is_visible_list(self):
-        return [el.is_visible() for el in self]
+        return self.visibility()
 
     def is_interaction_list(self):
-        return [el.is_interaction() for el in self]
+        return self._column(Field('interaction'))
 
     def all_visible(self):
         return self.is_visible_list().count(False) == 0
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+# Описания извлекаемых значений для пакетного чтения свойств элементов одним js-скриптом (драйверы без javascript
+# читают те же значения обычными командами, см. native_value)
+
+
+class Field:
+    """
+        Описание значения, которое нужно прочитать у элемента:
+            get - что читать: text, attr, prop, inner_html, html, tag, rect, visible, enabled, interaction
+            name - имя атрибута или js-свойства (для attr и prop)
+            sel - css-селектор вложенного элемента, у которого читается значение (если не задан - у самого элемента)
+            locator - цепочка локаторов (Locator) до элемента относительно корня извлечения (для схем, см. extract)
+            fn - функция пост-обработки значения на стороне python
+            default - значение, если элемент не найден
+            schema - вложенная схема (вместо get) для повторяющихся блоков
+    """
+
+    def __init__(self, get='text', name=None, sel=None, locator=None, fn=None, default=None, schema=None):
+        self.get = get
+        self.name = name
+        self.sel = sel
+        self.locator = locator
+        self.fn = fn
+        self.default = default
+        self.schema = schema
+
+    def __repr__(self):
+        return 'Field(%r, name=%r, sel=%r, locator=%s)' % (self.get, self.name, self.sel, self.locator)
+
+    def to_js(self):
+        """ Описание поля для js-скрипта """
+        rz = {'get': self.get, 'name': self.name, 'sel': self.sel, 'steps': None}
+        if self.locator:
+            rz['steps'] = self.locator._script_steps()
+            if rz['steps'] is None:
+                raise ValueError("locator can not be resolved by script: %s" % self.locator)
+        if self.schema is not None:
+            rz['schema'] = compile_schema(self.schema)
+        return rz
+
+    def finish(self, value):
+        """ Пост-обработка прочитанного значения """
+        if value is None:
+            return self.default
+        if self.schema is not None:
+            if isinstance(value, list):
+                return [finish_schema(self.schema, item) for item in value]
+            return finish_schema(self.schema, value)
+        if self.fn:
+            return [self.fn(item) for item in value] if isinstance(value, list) else self.fn(value)
+        return value
+
+
+def text():
+    """ Видимый текст элемента """
+    return Field('text')
+
+
+def attr(name):
+    """ Атрибут элемента """
+    return Field('attr', name)
+
+
+def prop(name):
+    """ js-свойство элемента (value, checked, href в абсолютном виде и т.п.) """
+    return Field('prop', name)
+
+
+def inner_html():
+    """ html-код внутри элемента """
+    return Field('inner_html')
+
+
+def css(selector, get='text', name=None):
+    """ Значение вложенного элемента, найденного по css-селектору, например css('.price') """
+    return Field(get, name, selector)
+
+
+def field(locator, get='text', name=None, fn=None, default=None):
+    """
+        Значение элемента, найденного по ленивому локатору, например field(s(class_name='price'), fn=int) или
+        field(ss('a'), 'attr', 'href') (для списка элементов значение - список)
+    """
+    return Field(get, name, locator=getattr(locator, 'locator', locator), fn=fn, default=default)
+
+
+def block(locator, schema):
+    """ Вложенная схема для блока (или списка повторяющихся блоков), найденного по ленивому локатору """
+    return Field(locator=getattr(locator, 'locator', locator), schema=schema)
+
+
+def as_field(value):
+    """
+        Приведение описания к Field. Строка считается именем значения: 'text', 'inner_html', 'html', 'tag', 'rect',
+        'visible', 'interaction', а любая другая - именем атрибута. Ленивый элемент (s(...), ss(...)) - его текстом,
+        словарь - вложенной схемой
+    """
+    if isinstance(value, Field):
+        return value
+    if isinstance(value, dict):
+        return Field(schema=value)
+    if hasattr(value, 'locator'):
+        # ленивый элемент или список элементов - берем текст
+        return Field(locator=value.locator)
+    if value in ('text', 'inner_html', 'html', 'tag', 'rect', 'visible', 'interaction'):
+        return Field(value)
+    return Field('attr', value)
+
+
+def compile_schema(schema):
+    """ Схема извлечения {поле: описание} в виде для js-скрипта (см. scripts.EXTRACT_SCHEMA) """
+    return {name: as_field(value).to_js() for name, value in schema.items()}
+
+
+def finish_schema(schema, values):
+    """ Пост-обработка словаря значений, полученного из браузера, по схеме """
+    return {name: as_field(value).finish(values.get(name)) for name, value in schema.items()}
+
+
+def extract(browser, roots, schema):
+    """
+        Извлекает данные по схеме одним обращением к браузеру. roots - список корневых элементов WebDriver-а (None -
+        весь документ), возвращает список словарей по одному на каждый корень. Драйвер без javascript (HttpDriver)
+        читает значения обычными командами (см. native_value)
+    """
+    from .scripts import EXTRACT_SCHEMA
+    from .service import javascript_enabled
+    if javascript_enabled(browser):
+        values = browser.execute_script(EXTRACT_SCHEMA, roots, compile_schema(schema))
+    else:
+        values = [_native_extract(browser, root, compile_schema(schema)) for root in roots]
+    return [finish_schema(schema, item) for item in values]
+
+
+# Чтение значений обычными командами WebDriver-а - для драйверов без javascript ######################################
+
+def native_value(element, field):
+    """ Аналог __value (scripts.ELEMENT_FUNCTIONS): значение поля field (см. Field.to_js) у элемента WebDriver-а """
+    if field.get('sel'):
+        found = element.find_elements('css selector', field['sel'])
+        if not found:
+            return None
+        element = found[0]
+    get = field['get']
+    if get == 'text':
+        return element.text
+    if get == 'attr':
+        return element.get_attribute(field['name'])
+    if get == 'prop':
+        return getattr(element, 'get_property', element.get_attribute)(field['name'])
+    if get == 'inner_html':
+        return element.get_attribute('innerHTML')
+    if get == 'html':
+        return element.get_attribute('outerHTML')
+    if get == 'tag':
+        return element.tag_name.lower()
+    if get == 'enabled':
+        return element.is_enabled()
+    size = element.size
+    if get == 'rect':
+        location = element.location
+        return {'x': location['x'], 'y': location['y'], 'width': size['width'], 'height': size['height']}
+    visible = element.is_displayed() and size['width'] * size['height'] > 0
+    if get == 'visible':
+        return visible
+    if get == 'interaction':
+        return visible and element.is_enabled()
+    raise ValueError('unsupported field: %s' % get)
+
+
+def _native_resolve(base, steps):
+    """ Аналог __resolveChain (scripts.FIND_FUNCTIONS) без ожиданий: найденное по шагам цепочки или None """
+    from .finder import _list_common_elements
+
+    def find(context, queries):
+        elements = None
+        for by, value in queries:
+            elements = _list_common_elements(elements, context.find_elements(by, value))
+        return elements or []
+
+    target = base
+    for step in steps:
+        if step['op'] == 's':
+            found = find(target, step['q'])
+            if not found:
+                return None
+            target = found[0]
+        elif step['op'] == 'ss':
+            target = find(target, step['q'])
+        elif step['op'] == 'ss_s':
+            found = [find(el, step['q']) for el in target]
+            if not all(found):
+                return None
+            target = [elements[0] for elements in found]
+        elif step['op'] == 'slice':
+            target = target[slice(step['start'], step['stop'], step['step'])]
+        elif step['op'] == 'index':
+            if not -len(target) <= step['index'] < len(target):
+                return None
+            target = target[step['index']]
+    return target
+
+
+def _native_extract(browser, root, spec):
+    """ Аналог __extract (scripts.EXTRACT_SCHEMA): spec - схема в виде для js (см. compile_schema) """
+    rz = {}
+    for name, field in spec.items():
+        target = root
+        if field['steps']:
+            target = _native_resolve(browser if root is None else root, field['steps'])
+            if target is None:
+                rz[name] = None
+                continue
+        if target is None:
+            target = browser.find_element('tag name', 'html')
+
+        def read(el, field=field):
+            return _native_extract(browser, el, field['schema']) if field.get('schema') else native_value(el, field)
+
+        rz[name] = [read(el) for el in target] if isinstance(target, list) else read(target)
+    return rz
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 # Модуль отвечающий за поиск элементов
 # from selenium.common.exceptions import NoSuchElementException
+import copy
+import time
+
 from selenium.webdriver.common.by import By
 
 from .config import Config
@@ -16,19 +19,24 @@ def s(*args, chain=None, **kwargs):
             именованные параметры. Например, передав именованный параметр href="/app/common/Login/", мы инициируем
             поиск элемента с соответствующим параметром. Список поддерживаемых параметров: id, id_contains, xpath,
             name, tag_name, class_value, class_name, css, text, link_text_contains, attr, text_contains, value,
-            type, checked, selected, href, button, а так же wait (время поиска элемента). Прочие именованные
-            параметры автоматически формируют поиск аттрибута с таким названием
+            type, checked, selected, href, button, а так же wait (время поиска элемента; если не задано -
+            Config.wait_timeout или адаптивный таймаут, см. Config.adaptive_wait). Прочие именованные параметры
+            автоматически формируют поиск аттрибута с таким названием
 
             аргументы типа str. В таком случае они считаются css селекторами
 
+            driver - драйвер, в котором искать элемент (по умолчанию - текущий драйвер потока, см. driver.use_driver)
+
         С помощью этого метода можно строить цепочку поиска с последующим действием, например
         s(Be.name("email)).s(href="/app/common/Login/").s("condision").click(). В случае ненахождения какого-либо
         элемента метод возбуждает исключение классического WebDriver-а
     """
     from .element import Element
 
-    wait = kwargs.pop('wait', Config.wait_timeout)
-    locator = Locator("s", (args, kwargs), wait, './/*', chain=chain)
+    wait = kwargs.pop('wait', None)
+    browser = kwargs.pop('driver', None)
+    locator = Locator("s", (args, kwargs), Config.wait_timeout if wait is None else wait, './/*', chain=chain,
+                      driver=browser, adaptive=wait is None)
     return Element(locator=locator)
 
 
@@ -41,11 +49,13 @@ def ss(*args, chain=None, **kwargs):
     """
     from .elementList import ElementList
 
-    wait = kwargs.pop('wait', Config.wait_timeout)
+    wait = kwargs.pop('wait', None)
     _filter = kwargs.pop('filter', None)
     _size = kwargs.pop('size', None)
 
-    locator = Locator('ss', (args, kwargs), wait, '//*', _filter, _size, chain=chain)
+    browser = kwargs.pop('driver', None)
+    locator = Locator('ss', (args, kwargs), Config.wait_timeout if wait is None else wait, '//*', _filter, _size,
+                      chain=chain, driver=browser, adaptive=wait is None)
     return ElementList(locator)
 
 
@@ -69,14 +79,12 @@ def _list_common_elements(list1, list2):
     if not(list1 and list2):
         return list1 or list2 or []
 
-    common = []
-    for i1 in list1:
-        for i2 in list2:
-            if i2.id == i1.id:
-                common.append(i2)
+    # пересечение по id элементов за линейное время, с сохранением порядка первого списка
+    ids = {item.id for item in list2}
     res = []
-    for item in common:
-        if item not in res:
+    for item in list1:
+        if item.id in ids:
+            ids.discard(item.id)
             res.append(item)
     return res
 
@@ -134,6 +142,15 @@ __ARG_TO_SELECTOR__ = {
 }
 
 
+def _callable_name(fn):
+    """ Имя функции-фильтра для текстового представления локатора: модуль и полное имя """
+    name = getattr(fn, '__qualname__', None) or getattr(fn, '__name__', None)
+    if name is None:
+        return repr(fn)
+    module = getattr(fn, '__module__', None)
+    return '%s.%s' % (module, name) if module else name
+
+
 def _get_selector(_xpath_prefix, locator_type, locator):
     """ Получение конечного локатора для поиска элемента """
     func = __ARG_TO_SELECTOR__.get(locator_type, None)
@@ -148,7 +165,7 @@ def _get_selector(_xpath_prefix, locator_type, locator):
 class Locator:
     """ Класс локатора """
 
-    def __init__(self, operation_type, args=None, wait=None, xpath_prefix=None, filter_method=None, size=None, slice=None, chain=None):
+    def __init__(self, operation_type, args=None, wait=None, xpath_prefix=None, filter_method=None, size=None, slice=None, chain=None, driver=None, adaptive=False):
         """
             Объект класса Locator со следующими св-ми:
                 operation_type - тип операции
@@ -158,6 +175,9 @@ class Locator:
                 filter_method - метод фильтрации (для списка элементов)
                 size - размер списка (для списка элементов)
                 slice - срез (для списка элементов)
+                driver - драйвер, к которому привязан локатор (по умолчанию - драйвер предыдущего локатора цепочки
+                         или текущий драйвер на момент поиска)
+                adaptive - ожидание не задано явно и может подбираться по истории поиска (см. timeout)
         """
         self.operation_type = operation_type        # Тип операции (s, ss, ss_s, slice, slice_int, filter)
         self.locator_list = self._parse_args(args)  # Список объектов-локаторов
@@ -167,6 +187,9 @@ class Locator:
         self.size = size                            # Размер списка
         self.slice = slice                          # срез
         self.chain = chain  # предыдущий локатор
+        self._queries = None                        # скомпилированные запросы (см. queries)
+        self.driver = driver or (chain.driver if chain else None)  # драйвер, к которому привязан локатор
+        self.adaptive = adaptive                    # ожидание по умолчанию (см. timeout)
 
         # особый переход ss -> s
         if self.chain and self.operation_type == 's' and self.chain.operation_type == 'ss':
@@ -175,21 +198,166 @@ class Locator:
     def chain(self, *args, **kwargs):
         return Locator(*args, chain=self, **kwargs)
 
+    def browser(self):
+        """ Драйвер, в котором выполняется поиск """
+        from ..core import driver
+        return self.driver or driver.current
+
+    def __str__(self):
+        """ Текстовое представление цепочки локаторов, например s(class_name='x').ss(tag_name='td')[1] """
+        level = self._level_str()
+        if not self.chain:
+            return level
+        return str(self.chain) + ('' if level.startswith('[') else '.') + level
+
+    def _level_str(self):
+        """ Текстовое представление только текущего звена цепочки """
+        if self.operation_type in ('s', 'ss', 'ss_s'):
+            name = 's' if self.operation_type == 'ss_s' else self.operation_type
+            params = ['%s=%r' % (loc['type'], loc['value']) for loc in self.locator_list]
+            if self.size:
+                params.append('size=%r' % self.size)
+            if self.filter_fn:
+                params.append('filter=%s' % _callable_name(self.filter_fn))
+            return '%s(%s)' % (name, ', '.join(params))
+        elif self.operation_type == 'filter':
+            return 'filter(%s)' % _callable_name(self.filter_fn)
+        elif isinstance(self.slice, slice):
+            start, stop, step = ['' if v is None else v for v in (self.slice.start, self.slice.stop, self.slice.step)]
+            return '[%s:%s%s]' % (start, stop, ':%s' % step if step != '' else '')
+        return '[%s]' % self.slice
+
+    def _cache_key(self):
+        """
+            Ключ кэша результатов поиска (см. cache.LocatorCache): полная идентичность всех звеньев цепочки - операция,
+            скомпилированные запросы, функция-фильтр, ожидаемый размер и срез. Текстового представления недостаточно:
+            звенья с разными фильтрами (или без фильтра) выглядят одинаково, если у функций одно имя
+        """
+        part = (self.slice.start, self.slice.stop, self.slice.step) if isinstance(self.slice, slice) else self.slice
+        queries = tuple(tuple(query) for query in self.queries) if self.operation_type in ('s', 'ss', 'ss_s') else None
+        level = (self.operation_type, queries, self.filter_fn, self.size, part)
+        return (self.chain._cache_key() if self.chain else None, level)
+
     def search(self):
         """Поиск элементов по локаторам"""
+        from .instrument import origin
+        from .timing import store
+        from .wait import deadline, poll
+
+        with origin(self, 'search'):
+            browser = self.browser()
+            token = None
+            if getattr(browser, 'locator_cache', None) is not None:
+                token = browser.dom_token()
+            signature = self._signature()
+            poll_frequency = store().poll(signature, Config.pool_frequency) if signature else None
+            start = time.perf_counter()
+            # все уровни цепочки ждут в рамках одного общего бюджета
+            with deadline(self.timeout()), poll(poll_frequency):
+                rz = self._search(token)
+            if signature:
+                store().record(signature, time.perf_counter() - start)
+            return rz
+
+    def _signature(self):
+        """
+            Сигнатура цепочки для истории времени поиска (см. timing); None - бюджет цепочки не адаптивный. Цепочка
+            с фильтром без постоянного имени (lambda, вложенная функция) не адаптивная: ее не отличить от других
+            цепочек с такими же запросами ни в этом, ни в следующих запусках
+        """
+        if not Config.adaptive_wait:
+            return None
+        locator = self
+        while locator:
+            if locator.operation_type in ('s', 'ss', 'ss_s') and not locator.adaptive:
+                return None
+            if locator.filter_fn and '<' in _callable_name(locator.filter_fn):
+                return None
+            locator = locator.chain
+        return str(self)
+
+    def timeout(self):
+        """
+            Бюджет времени на поиск всей цепочки: при Config.adaptive_wait и цепочке без явных ожиданий - по истории
+            времени ее поиска (см. timing.TimingStore.timeout), иначе - максимальное ожидание среди звеньев
+        """
+        signature = self._signature()
+        if signature:
+            from .timing import store
+            return store().timeout(signature, self._chain_wait())
+        return self._chain_wait()
+
+    def _level_wait(self, wait):
+        """ Ожидание звена: при адаптивном бюджете цепочки - остаток бюджета текущего поиска (см. timeout) """
+        from .wait import remaining
+        if Config.adaptive_wait and self.adaptive and remaining() is not None:
+            return remaining()
+        return wait
+
+    def not_wait(self):
+        """ Копия цепочки локаторов с нулевым ожиданием на всех уровнях """
+        locator = copy.copy(self)
+        locator.wait = 0
+        locator.adaptive = False
+        locator.chain = self.chain.not_wait() if self.chain else None
+        return locator
+
+    def probe(self):
+        """
+            Одна попытка поиска всей цепочки без ожиданий (для проверок отсутствия). Возвращает найденное или None.
+            Цепочка, выражаемая в js, проверяется одним обращением к браузеру
+        """
+        from selenium.common.exceptions import NoSuchElementException
+        from .instrument import origin
+        from .scripts import RESOLVE_CHAIN
+        from .service import javascript_enabled
+
+        with origin(self, 'probe'):
+            browser = self.browser()
+            steps = self._script_steps() if javascript_enabled(browser) else None
+            if steps is not None:
+                result = browser.execute_script(RESOLVE_CHAIN, None, steps)
+                return result['value'] if result['ok'] else None
+            try:
+                return self.not_wait()._search_uncached()
+            except (NoSuchElementException, IndexError):
+                return None
+
+    def _search(self, token=None):
+        """ Поиск с использованием кэша драйвера, если передан текущий токен DOM страницы """
+        from .cache import MISS
+
+        cache = self.browser().locator_cache if token else None
+        if cache is None or self.filter_fn:
+            return self._search_uncached(token)
+
+        key = self._cache_key()
+        value = cache.get(key, token)
+        if value is MISS:
+            value = self._search_uncached(token)
+            cache.put(key, token, value)
+        return value
+
+    def _search_uncached(self, token=None):
+        """ Поиск элементов без обращения к кэшу на текущем уровне цепочки """
+        from .service import javascript_enabled
         from .wait import Wait
-        from ..core import driver
-        
+
+        if Config.chain_script and javascript_enabled(self.browser()):
+            steps = self._script_steps()
+            if steps is not None:
+                return self._search_script(steps)
+
         if self.chain:
-            target = self.chain.search()
+            target = self.chain._search(token)
         else:
-            target = driver.current
+            target = self.browser()
 
         if self.operation_type == 's':
-            Wait(target, self.wait).bool(lambda dd: self._find_first(target))
+            Wait(target, self._level_wait(self.wait)).bool(lambda dd: self._find_first(target))
             return self._find_first(target)
         elif self.operation_type == 'ss':
-            Wait(target, self.wait).bool(lambda dd: self._find_first(target))
+            Wait(target, self._level_wait(self.wait)).bool(lambda dd: self._find_first(target))
             if not self.size:
                 rz = self._find_all(target)
             else:
@@ -207,7 +375,7 @@ class Locator:
         elif self.operation_type == 'ss_s':
             rz = []
             for el in target:
-                Wait(el, self.wait).bool(lambda dd: self._find_first(el))
+                Wait(el, self._level_wait(self.wait)).bool(lambda dd: self._find_first(el))
                 rz.append(self._find_first(el))
             return rz
         # TODO это точно надо?
@@ -218,6 +386,56 @@ class Locator:
         else:
             raise ValueError(self.operation_type)
 
+    def _script_steps(self):
+        """
+            Компилирует цепочку локаторов в список шагов для js-резолвера (см. scripts.RESOLVE_CHAIN).
+            Возвращает None, если какое-либо звено цепочки не выражается в js (фильтр-функция, ожидаемый размер
+            списка, срез не по целому индексу)
+        """
+        steps = self.chain._script_steps() if self.chain else []
+        if steps is None or self.filter_fn or self.size:
+            return None
+
+        if self.operation_type in ('s', 'ss', 'ss_s'):
+            step = {'op': self.operation_type, 'q': [list(q) for q in self.queries]}
+        elif self.operation_type == 'slice' and isinstance(self.slice, slice):
+            step = {'op': 'slice', 'start': self.slice.start, 'stop': self.slice.stop, 'step': self.slice.step}
+        elif self.operation_type == 'slice int' and isinstance(self.slice, int):
+            step = {'op': 'index', 'index': self.slice}
+        else:
+            return None
+        return steps + [step]
+
+    def _chain_wait(self):
+        """ Максимальное ожидание среди всех звеньев цепочки """
+        waits = [self.wait or 0]
+        if self.chain:
+            waits.append(self.chain._chain_wait())
+        return max(waits)
+
+    def _search_script(self, steps):
+        """ Поиск всей цепочки локаторов одним обращением к браузеру с общим ожиданием """
+        from selenium.common.exceptions import NoSuchElementException
+        from .scripts import RESOLVE_CHAIN
+        from .wait import Wait
+
+        browser = self.browser()
+        result = {}
+
+        def _probe(_):
+            result.update(browser.execute_script(RESOLVE_CHAIN, None, steps))
+            return result['ok'] and not result.get('pending')
+
+        timeout = self._level_wait(self._chain_wait())
+        if timeout:
+            Wait(browser, timeout).bool(_probe)
+        else:
+            _probe(browser)
+
+        if not result.get('ok'):
+            raise NoSuchElementException("Unable to locate element by chain: %s" % self)
+        return result['value']
+
     def _apply_filter_fn(self, items):
         """Применяет фильтр локатора в виде функции"""
         from ..core.element import Element
@@ -227,12 +445,46 @@ class Locator:
         else:
             return items
 
+    @property
+    def queries(self):
+        """ Скомпилированный список запросов (by, value) для поиска по списку локаторов """
+        if self._queries is None:
+            from .compiler import compile_locator_list
+            self._queries = compile_locator_list(self.xpath_prefix, self.locator_list)
+        return self._queries
+
+    def explain(self):
+        """
+            Описание того, как будет выполняться поиск по цепочке: скомпилированные селекторы каждого звена и
+            ожидаемое количество обращений к браузеру за одну попытку поиска
+        """
+        lines = self._explain_lines()
+        if Config.chain_script and self._script_steps() is not None:
+            lines.append('chain_script: whole chain in 1 round trip')
+        return '\n'.join(lines)
+
+    def _explain_lines(self):
+        lines = self.chain._explain_lines() if self.chain else []
+        if self.operation_type in ('s', 'ss', 'ss_s'):
+            lines.append('%s: %s (%s criteria -> %s round trip(s)%s)' % (
+                self._level_str(), '; '.join('%s %r' % query for query in self.queries), len(self.locator_list),
+                len(self.queries), ' per element' if self.operation_type == 'ss_s' else ''))
+        else:
+            lines.append('%s: in memory' % self._level_str())
+        return lines
+
     def _find_first(self, base):
         """ Ф-я поиска элемента по списку локаторов """
+        selective = self._find_selective(base, True)
+        if selective is not None:
+            return selective
+
+        pattern = self._selectivity_pattern()
         elements = None
-        for locator in self.locator_list:
-            by, value = _get_selector(self.xpath_prefix, locator['type'], locator['value'])
+        for by, value in self.queries:
             found = base.find_elements(by=by, value=value)
+            if pattern:
+                self._record_selectivity(pattern, (by, value), found)
 
             if not found:
                 # raise NoSuchElementException("Unable to locate element:")
@@ -245,14 +497,84 @@ class Locator:
 
     def _find_all(self, base):
         """ Ф-я поиска элементов по списку локаторов """
+        selective = self._find_selective(base, False)
+        if selective is not None:
+            return selective
+
+        pattern = self._selectivity_pattern()
         elements = None
-        for locator in self.locator_list:
-            by, value = _get_selector(self.xpath_prefix, locator['type'], locator['value'])
+        for by, value in self.queries:
             found = base.find_elements(by=by, value=value)
+            if pattern:
+                self._record_selectivity(pattern, (by, value), found)
             elements = _list_common_elements(elements, found)
 
         return elements
 
+    def _selectivity_pattern(self):
+        """ Шаблон адреса страницы для статистики избирательности запросов (None - статистика не нужна) """
+        if not Config.selectivity or len(self.queries) < 2:
+            return None
+        from .selectivity import url_pattern
+        return url_pattern(getattr(self.browser(), 'page_url', None))
+
+    @staticmethod
+    def _record_selectivity(pattern, query, found):
+        from .selectivity import stats
+        stats.record(pattern, query, len(found))
+
+    def _find_selective(self, base, first):
+        """
+            Поиск по нескольким запросам в порядке их избирательности (см. selectivity): самый избирательный запрос
+            выполняется как обычно, а остальные проверяются только у найденных кандидатов - одним скриптом, если
+            кандидатов не больше Config.selectivity_scope. None - статистики по запросам еще нет (или пора ее обновить),
+            и поиск выполняется обычным способом с замером всех запросов
+        """
+        from selenium.common.exceptions import NoSuchElementException
+        from selenium.webdriver.remote.webelement import WebElement
+        from .scripts import FILTER_CANDIDATES
+        from .selectivity import scoped_check, stats
+        from .service import javascript_enabled
+
+        pattern = self._selectivity_pattern()
+        ordered = stats.order(pattern, self.queries) if pattern else None
+        browser = self.browser()
+        if ordered is None or not javascript_enabled(browser):
+            return None
+
+        by, value = ordered[0]
+        candidates = base.find_elements(by=by, value=value)
+        self._record_selectivity(pattern, ordered[0], candidates)
+        if not candidates:
+            if first:
+                base.find_element(by=by, value=value)
+            # пустой результат запроса не сужает список (см. _list_common_elements) - обычный поиск
+            return None
+
+        if len(candidates) <= Config.selectivity_scope:
+            result = browser.execute_script(FILTER_CANDIDATES, candidates,
+                                            base if isinstance(base, WebElement) else None,
+                                            [scoped_check(query) for query in ordered[1:]], first)
+            browser.page_url = result['url']
+            elements = result['value']
+            if result.get('missing') is not None:
+                # запрос не нашел на странице ничего - как и обычный поиск, сообщаем, какой элемент не найден
+                base.find_element(*ordered[1 + result['missing']])
+        else:
+            elements = candidates
+            for by, value in ordered[1:]:
+                found = base.find_elements(by=by, value=value)
+                self._record_selectivity(pattern, (by, value), found)
+                if first and not found:
+                    base.find_element(by=by, value=value)
+                elements = _list_common_elements(elements, found)
+
+        if not first:
+            return elements
+        if not elements:
+            raise NoSuchElementException("Unable to locate element: %s" % self)
+        return elements[0]
+
     def _parse_args(self, args):
         if not args:
             return []
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+# Легковесный драйвер без браузера для статических страниц: страницы загружаются по HTTP через пул соединений и
+# разбираются локально (см. snapshot.py). Реализует ту часть интерфейса WebDriver-а, которой пользуются Element,
+# ElementList и Locator, поэтому те же сценарии с s()/ss() работают и на нем
+from http.cookies import SimpleCookie
+from urllib.parse import urljoin, urlsplit
+
+import urllib3
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+
+from .snapshot import DomSnapshot, find_nodes, _normalize
+
+
+class HttpDriver:
+    """
+        Драйвер, загружающий страницы по HTTP без браузера. javascript не выполняется, поэтому возможности,
+        которым нужен execute_script, недоступны (библиотека в таких случаях использует обычные команды)
+    """
+
+    name = 'http'
+
+    def __init__(self, headers=None, pool_size=10, timeout=30, retries=3):
+        self._http = urllib3.PoolManager(
+            maxsize=pool_size, headers=headers or {'User-Agent': 'Mozilla/5.0 (compatible; HttpDriver)'},
+            timeout=urllib3.Timeout(total=timeout), retries=urllib3.Retry(retries, redirect=10))
+        self._cookies = {}          # куки по хостам
+        self._history = []
+        self._position = -1
+        self._dom = None
+        self.document_id = 0        # номер загруженного документа (растет при каждой загрузке страницы)
+        self.current_url = 'about:blank'
+        self.page_source = '<html><head></head><body></body></html>'
+        self.capabilities = {'browserName': 'http', 'version': urllib3.__version__, 'platform': 'any',
+                             'javascriptEnabled': False}
+
+    # Навигация ########################################################################################################
+
+    def get(self, url):
+        """ Загрузка страницы по url """
+        self._load(url)
+        del self._history[self._position + 1:]
+        self._history.append(self.current_url)
+        self._position = len(self._history) - 1
+
+    def _load(self, url):
+        host = urlsplit(url).hostname
+        headers = {}
+        if self._cookies.get(host):
+            headers['Cookie'] = '; '.join('%s=%s' % (k, v.value) for k, v in self._cookies[host].items())
+        response = self._http.request('GET', url, headers=headers)
+        for header in response.headers.getlist('Set-Cookie'):
+            self._cookies.setdefault(host, SimpleCookie()).load(header)
+
+        charset = response.headers.get('Content-Type', '').partition('charset=')[2].split(';')[0].strip()
+        self.current_url = urljoin(url, response.geturl() or '')
+        self.page_source = response.data.decode(charset or 'utf-8', errors='replace')
+        self._dom = None
+        self.document_id += 1
+
+    def back(self):
+        if self._position > 0:
+            self._position -= 1
+            self._load(self._history[self._position])
+
+    def forward(self):
+        if self._position < len(self._history) - 1:
+            self._position += 1
+            self._load(self._history[self._position])
+
+    def refresh(self):
+        if self._position >= 0:
+            self._load(self._history[self._position])
+
+    @property
+    def title(self):
+        return self._snapshot().title
+
+    def _snapshot(self):
+        if self._dom is None:
+            self._dom = DomSnapshot(self.page_source)
+        return self._dom
+
+    # Поиск ############################################################################################################
+
+    def find_elements(self, by, value):
+        return [HttpElement(self, node) for node in find_nodes(self._snapshot()._context, by, value, document=True)]
+
+    def find_element(self, by, value):
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElementException("Unable to locate element: %s %s" % (by, value))
+        return found[0]
+
+    # Остальное ########################################################################################################
+
+    def execute_script(self, script, *args):
+        raise WebDriverException("HttpDriver does not execute javascript")
+
+    execute_async_script = execute_script
+
+    def delete_all_cookies(self):
+        self._cookies.clear()
+
+    def maximize_window(self):
+        pass
+
+    def set_window_size(self, width, height):
+        pass
+
+    def get_window_size(self):
+        return {'width': 0, 'height': 0}
+
+    def close(self):
+        pass
+
+    def quit(self):
+        self._http.clear()
+
+
+class HttpElement:
+    """
+        Элемент страницы HttpDriver-а. Раскладки нет, поэтому видимость определяется только атрибутами (hidden,
+        style="display: none"), а размер видимого элемента условно равен 1x1
+    """
+
+    def __init__(self, parent, node):
+        self._parent = parent
+        self._node = node
+        self._id = id(node)
+
+    @property
+    def id(self):
+        return self._id
+
+    def __eq__(self, other):
+        return getattr(other, '_id', None) == self._id
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return self._id
+
+    def find_elements(self, by, value):
+        return [HttpElement(self._parent, node) for node in find_nodes(self._node, by, value)]
+
+    def find_element(self, by, value):
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElementException("Unable to locate element: %s %s" % (by, value))
+        return found[0]
+
+    @property
+    def text(self):
+        return _normalize(''.join(self._node.xpath('.//text()[not(ancestor::script or ancestor::style)]')))
+
+    @property
+    def tag_name(self):
+        return str(self._node.tag)
+
+    def get_attribute(self, name):
+        from .snapshot import SnapshotElement
+        if name == 'innerHTML':
+            return SnapshotElement(None, self._node).inner_html
+        if name == 'outerHTML':
+            return SnapshotElement(None, self._node).html
+        if name in ('textContent', 'innerText'):
+            return self.text
+        if name in ('checked', 'selected', 'disabled'):
+            return 'true' if self._node.get(name) is not None else None
+        return self._node.get(name)
+
+    def is_displayed(self):
+        for node in [self._node] + list(self._node.iterancestors()):
+            style = (node.get('style') or '').replace(' ', '').lower()
+            if node.get('hidden') is not None or 'display:none' in style or 'visibility:hidden' in style:
+                return False
+        return True
+
+    def is_enabled(self):
+        return self._node.get('disabled') is None
+
+    def is_selected(self):
+        return self._node.get('selected') is not None or self._node.get('checked') is not None
+
+    @property
+    def size(self):
+        side = 1 if self.is_displayed() else 0
+        return {'width': side, 'height': side}
+
+    @property
+    def location(self):
+        return {'x': 0, 'y': 0}
+
+    def value_of_css_property(self, name):
+        return ''
+
+    def click(self):
+        """ Клик поддерживается только для ссылок - переход по href """
+        href = self._node.get('href')
+        if self._node.tag != 'a' or not href or href.startswith('javascript:'):
+            raise WebDriverException("HttpDriver can only follow links")
+        self._parent.get(urljoin(self._parent.current_url, href))
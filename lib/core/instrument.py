@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+# Учет команд WebDriver-а: каждая команда сессии записывается с длительностью, размером запроса и ответа и местом
+# вызова (локатор и метод элемента, тест, шаг), а статистика собирается по командам, тестам, шагам и локаторам
+import json
+import threading
+import time
+from collections import Counter, defaultdict, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# место вызова: (локатор, метод), текущий тест и шаг
+_origin = ContextVar('instrument_origin', default=(None, None))
+_test = ContextVar('instrument_test', default=None)
+_step = ContextVar('instrument_step', default=None)
+
+
+class CommandRecord(namedtuple('CommandRecord', 'command duration request_size response_size locator call test step '
+                                                'error')):
+    """ Одна команда WebDriver-а. locator - строка цепочки локаторов (см. Locator.__str__), call - метод элемента """
+
+    __slots__ = ()
+
+
+@contextmanager
+def origin(locator, call):
+    """ Команды внутри блока относятся к локатору locator и методу call (используется Locator и Element) """
+    token = _origin.set((locator, call))
+    try:
+        yield
+    finally:
+        _origin.reset(token)
+
+
+@contextmanager
+def test(name):
+    """ Команды внутри блока относятся к тесту name (см. SeleniumTestCase.run) """
+    token = _test.set(name)
+    try:
+        yield
+    finally:
+        _test.reset(token)
+
+
+@contextmanager
+def step(name):
+    """ Команды внутри блока относятся к шагу name теста """
+    token = _step.set(name)
+    try:
+        yield
+    finally:
+        _step.reset(token)
+
+
+class CommandStats:
+    """ Агрегированная статистика команд: счетчики, время и гистограммы длительностей """
+
+    # верхние границы корзин гистограммы (сек.), последняя корзина - все, что дольше
+    BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.commands = Counter()                       # команда -> количество
+            self.time = defaultdict(float)                  # команда -> суммарное время
+            self.bytes = Counter()                          # команда -> байт запросов и ответов
+            self.errors = Counter()                         # команда -> количество ошибок
+            self.histograms = defaultdict(lambda: [0] * (len(self.BUCKETS) + 1))
+            self.by_test = defaultdict(Counter)             # тест -> {команда: количество}
+            self.by_step = defaultdict(Counter)             # (тест, шаг) -> {команда: количество}
+            self.by_locator = defaultdict(Counter)          # локатор -> {метод: количество команд}
+            self.locator_time = defaultdict(float)          # локатор -> суммарное время команд
+
+    def add(self, record):
+        with self._lock:
+            self.commands[record.command] += 1
+            self.time[record.command] += record.duration
+            self.bytes[record.command] += record.request_size + record.response_size
+            if record.error:
+                self.errors[record.command] += 1
+            bucket = next((i for i, limit in enumerate(self.BUCKETS) if record.duration <= limit), len(self.BUCKETS))
+            self.histograms[record.command][bucket] += 1
+            self.by_test[record.test][record.command] += 1
+            self.by_step[(record.test, record.step)][record.command] += 1
+            if record.locator is not None:
+                self.by_locator[record.locator][record.call] += 1
+                self.locator_time[record.locator] += record.duration
+
+    @property
+    def total(self):
+        """ Всего команд """
+        return sum(self.commands.values())
+
+    def count(self, test=None, step=None):
+        """ Количество команд всего, в тесте или в шаге теста """
+        if step is not None:
+            return sum(self.by_step[(test, step)].values())
+        if test is not None:
+            return sum(self.by_test[test].values())
+        return self.total
+
+    def top_locators(self, n=10):
+        """ Самые "разговорчивые" локаторы: [(локатор, команд, время, {метод: команд})] по убыванию числа команд """
+        with self._lock:
+            items = [(locator, sum(calls.values()), self.locator_time[locator], dict(calls))
+                     for locator, calls in self.by_locator.items()]
+        return sorted(items, key=lambda item: (item[1], item[2]), reverse=True)[:n]
+
+    def report(self, n=10):
+        """ Текстовый отчет: команды по суммарному времени и топ-n локаторов по числу команд """
+        lines = ['%-28s %7s %10s %10s %8s' % ('command', 'count', 'total,ms', 'avg,ms', 'errors')]
+        for command, count in sorted(self.commands.items(), key=lambda item: self.time[item[0]], reverse=True):
+            lines.append('%-28s %7d %10.1f %10.2f %8d' % (command, count, self.time[command] * 1000,
+                                                           self.time[command] * 1000 / count, self.errors[command]))
+        lines.append('')
+        lines.append('%-60s %7s %10s' % ('locator', 'count', 'total,ms'))
+        for locator, count, duration, _ in self.top_locators(n):
+            lines.append('%-60s %7d %10.1f' % (locator[:60], count, duration * 1000))
+        return '\n'.join(lines)
+
+
+class Recorder:
+    """ Получатель записей о командах: собирает статистику и передает записи подписчикам (listeners) """
+
+    def __init__(self):
+        self.stats = CommandStats()
+        self.listeners = []
+
+    def add_listener(self, fn):
+        """ Подписка на записи: fn(CommandRecord) вызывается после каждой команды """
+        self.listeners.append(fn)
+        return fn
+
+    def remove_listener(self, fn):
+        self.listeners.remove(fn)
+
+    def record(self, record):
+        self.stats.add(record)
+        for fn in self.listeners:
+            fn(record)
+
+
+# общий получатель по умолчанию
+recorder = Recorder()
+
+
+def _size(value):
+    if value is None:
+        return 0
+    try:
+        return len(json.dumps(value, default=str, separators=(',', ':')))
+    except (TypeError, ValueError):
+        return 0
+
+
+def install(sel_driver, target=None):
+    """
+        Включает учет команд у драйвера WebDriver-а: его метод execute, через который проходят все команды сессии
+        и ее элементов, подменяется оберткой. Повторная установка заменяет получателя
+    """
+    target = target or recorder
+    execute = getattr(sel_driver, 'execute', None)
+    if execute is None:
+        # драйвер без команд (например, http_driver.HttpDriver) - учитывать нечего
+        return sel_driver
+    execute = getattr(execute, 'original', execute)
+
+    def instrumented(driver_command, params=None):
+        locator, call = _origin.get()
+        error = None
+        response = None
+        start = time.perf_counter()
+        try:
+            response = execute(driver_command, params)
+            return response
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            target.record(CommandRecord(
+                driver_command, duration, _size(params), _size(response and response.get('value')),
+                None if locator is None else str(locator), call, _test.get(), _step.get(), error))
+
+    instrumented.original = execute
+    sel_driver.execute = instrumented
+    return sel_driver
+
+
+def uninstall(sel_driver):
+    """ Выключает учет команд у драйвера """
+    original = getattr(getattr(sel_driver, 'execute', None), 'original', None)
+    if original is not None:
+        del sel_driver.execute
+    return sel_driver
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# Ожидание нескольких условий сразу: wait_any - первого выполнившегося из взаимоисключающих исходов (например, список
+# результатов, баннер "ничего не найдено" или сообщение об ошибке), wait_all - всех сразу. Условия всех веток
+# проверяются одним js-скриптом за шаг ожидания (scripts.CHECK_CONDITIONS), поэтому несколько исходов стоят одного
+# таймаута, а не нескольких последовательных
+from selenium.common.exceptions import TimeoutException
+
+from .config import Config
+from .service import javascript_enabled
+from .wait import Wait, deadline
+
+
+class _Branch:
+    """ Ветка ожидания: цель (элемент, список элементов или драйвер) и условие """
+
+    def __init__(self, index, target, condition):
+        from ..core import driver
+
+        self.index = index
+        self.target = target if target is not None else driver.current
+        self.condition = condition
+        locator = getattr(self.target, 'locator', None)
+        self.locator = locator or None
+        if locator:
+            self.browser = locator.browser()
+        elif hasattr(self.target, 'locator'):
+            self.browser = self.target.parent
+        else:
+            self.browser = self.target
+        self.item = self._script_item()     # описание ветки для CHECK_CONDITIONS, None - проверка на python
+        self.result = None                  # результат последней проверки скриптом
+        self.ok = False
+
+    def _script_item(self):
+        to_js = getattr(self.condition, 'to_js', None)
+        spec = to_js() if to_js else None
+        if spec is None or not javascript_enabled(self.browser):
+            return None
+        if self.locator:
+            # цель ищется в браузере заново при каждой проверке, без ожидания
+            steps = self.locator._script_steps()
+            if steps is None:
+                return None
+            return {'target': None, 'steps': steps, 'spec': spec}
+        if hasattr(self.target, 'locator'):
+            # элемент без локатора - фиксированный элемент WebDriver-а
+            return {'target': self.target.unwrap(), 'steps': None, 'spec': spec}
+        return {'target': None, 'steps': None, 'spec': spec}
+
+    def probe(self):
+        """
+            Проверка условия на python: одна попытка поиска цели, без ожидания. Пустой список, как и в
+            CHECK_CONDITIONS, - ненайденная цель. Ошибка проверки (цель не найдена, исчезла) означает, что ветка не
+            выполнена, и не мешает проверить остальные ветки
+        """
+        try:
+            with deadline(0):
+                if isinstance(self.target, list) and self.locator and not self.locator.probe():
+                    self.ok = False
+                else:
+                    self.ok = bool(self.condition(self.target))
+        except Exception:
+            self.ok = False
+
+    def describe(self):
+        """ Состояние ветки для сообщения об ошибке (по результатам последней проверки) """
+        target = str(self.locator) if self.locator else 'page' if self.target is self.browser else 'element'
+        if self.result is not None and not self.result['found']:
+            expected = getattr(self.condition, 'expected', None)
+            return '[%d] %s: not found%s' % (self.index, target, ', expected %s' % expected() if expected else '')
+        if self.result is not None:
+            self.condition._bind(self.target)._observe(self.result['actual'])
+        with deadline(0):
+            return '[%d] %s: %s%s' % (self.index, target, 'ok' if self.ok else 'failed', self.condition)
+
+
+class _Report:
+    """ Сообщение об ошибке ожидания; формируется только при истечении таймаута """
+
+    def __init__(self, mode, branches, message):
+        self.mode = mode
+        self.branches = branches
+        self.message = message
+
+    def __str__(self):
+        lines = ['%s\n\twaiting for %s of %d conditions:' % (self.message, self.mode, len(self.branches))]
+        lines.extend('\t' + branch.describe() for branch in self.branches)
+        return '\n'.join(lines)
+
+
+def _branches(pairs):
+    if not pairs:
+        raise ValueError('at least one (target, condition) pair is required')
+    return [_Branch(i, target, condition) for i, (target, condition) in enumerate(pairs)]
+
+
+def _tick(branches):
+    """ Одна проверка всех веток: ветки, проверяемые скриптом, - одним обращением к каждому браузеру """
+    from .scripts import CHECK_CONDITIONS
+
+    groups = {}
+    for branch in branches:
+        if branch.item is None:
+            branch.probe()
+        else:
+            groups.setdefault(id(branch.browser), (branch.browser, []))[1].append(branch)
+    for browser, group in groups.values():
+        results = browser.execute_script(CHECK_CONDITIONS, [branch.item for branch in group])
+        for branch, result in zip(group, results):
+            branch.result = result
+            branch.ok = result['ok']
+
+
+def _until(mode, branches, probe, wait, pool, message):
+    report = _Report(mode, branches, message)
+    with deadline(wait):
+        if not wait:
+            rz = probe(None)
+            if not rz:
+                raise TimeoutException(str(report))
+            return rz
+        return Wait(branches[0].browser, wait, pool).until(probe, report)
+
+
+def wait_any(*pairs, wait=Config.wait_timeout, pool=Config.pool_frequency, message=''):
+    """
+        Ожидание первого выполнившегося условия из нескольких: wait_any((s('.results'), visible),
+        (s('.empty'), visible), (s('.error'), visible)). Пара - цель (элемент, список элементов, драйвер или None -
+        текущий драйвер) и условие. Все условия проверяются одним обращением к браузеру за шаг ожидания.
+        Возвращает (номер выполнившейся ветки, ее цель), по истечении wait - TimeoutException с состоянием всех веток
+    """
+    branches = _branches(pairs)
+
+    def _any(_):
+        _tick(branches)
+        return next(((branch.index, branch.target) for branch in branches if branch.ok), None)
+
+    return _until('any', branches, _any, wait, pool, message)
+
+
+def wait_all(*pairs, wait=Config.wait_timeout, pool=Config.pool_frequency, message=''):
+    """
+        Ожидание одновременного выполнения всех условий (пары цель - условие, см. wait_any). Все условия проверяются
+        одним обращением к браузеру за шаг ожидания. Возвращает кортеж целей всех веток
+    """
+    branches = _branches(pairs)
+
+    def _all(_):
+        _tick(branches)
+        return tuple(branch.target for branch in branches) if all(branch.ok for branch in branches) else None
+
+    return _until('all', branches, _all, wait, pool, message)
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# Пул заранее запущенных браузеров: сессии выдаются в аренду тестовым классам или потокам и после возврата
+# очищаются и используются повторно, вместо запуска нового браузера на каждый класс тестов
+import atexit
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .config import Config
+
+
+class PoolTimeout(Exception):
+    """ Ошибка когда свободная сессия не появилась за отведенное время """
+    pass
+
+
+class _Session:
+    """ Сессия пула: драйвер WebDriver-а и счетчики для ее переиспользования """
+
+    def __init__(self, sel_driver):
+        self.driver = sel_driver
+        self.created = time.time()
+        self.uses = 0
+
+
+class SessionPool:
+    """
+        Пул браузерных сессий. Не больше size сессий одновременно; сессия пересоздается после max_uses аренд,
+        по истечении max_lifetime секунд или если не прошла проверку работоспособности. Остальные параметры
+        передаются в tools.create_driver
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, browser_name=None, size=None, max_uses=None, max_lifetime=None, *args, **kwargs):
+        self.browser_name = browser_name or Config.browser_name
+        self.size = size or Config.session_pool or 1
+        self.max_uses = max_uses or Config.session_max_uses
+        self.max_lifetime = max_lifetime or Config.session_max_lifetime
+        self._args, self._kwargs = args, kwargs
+        self._idle = []             # свободные сессии (последняя возвращенная выдается первой)
+        self._leased = {}           # id драйвера -> сессия в аренде
+        self._starting = 0          # сессии, которые сейчас запускаются
+        self._lock = threading.Condition()
+        self._closed = False
+
+    @classmethod
+    def shared(cls, browser_name=None):
+        """ Общий для процесса пул для браузера browser_name (размер - Config.session_pool), закрывается при выходе """
+        browser_name = browser_name or Config.browser_name
+        with cls._shared_lock:
+            if browser_name not in cls._shared:
+                pool = cls._shared[browser_name] = cls(browser_name)
+                atexit.register(pool.close)
+            return cls._shared[browser_name]
+
+    def __len__(self):
+        return len(self._idle) + len(self._leased)
+
+    def _create(self):
+        from .tools import create_driver
+        return _Session(create_driver(self.browser_name, *self._args, **self._kwargs))
+
+    def warm(self, count=None):
+        """
+            Заранее запускает браузеры (параллельно), чтобы в пуле было count свободных сессий. Если какой-то браузер
+            не запустился, запущенные остальные остаются в пуле, а ошибка возбуждается после этого
+        """
+        with self._lock:
+            count = max(min((count or self.size) - len(self._idle), self.size - len(self) - self._starting), 0)
+            self._starting += count
+        if not count:
+            return self
+        sessions, errors = [], []
+        try:
+            with ThreadPoolExecutor(count) as executor:
+                futures = [executor.submit(self._create) for _ in range(count)]
+            for future in futures:
+                if future.exception() is None:
+                    sessions.append(future.result())
+                else:
+                    errors.append(future.exception())
+        finally:
+            # место в пуле освобождается и при ошибке, а ожидающие аренды узнают об этом
+            with self._lock:
+                self._starting -= count
+                closed = self._closed
+                if not closed:
+                    self._idle.extend(sessions)
+                self._lock.notify_all()
+            if closed:
+                for session in sessions:
+                    self._quit(session)
+        if errors:
+            raise errors[0]
+        return self
+
+    def lease(self, timeout=None):
+        """
+            Берет сессию в аренду и делает ее текущим драйвером. Если свободных сессий нет и пул заполнен - ждет
+            возврата не дольше timeout секунд (None - без ограничения)
+        """
+        from . import driver
+        end_time = None if timeout is None else time.time() + timeout
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("session pool is closed")
+                session = self._idle.pop() if self._idle else None
+                if session is None and len(self) + self._starting < self.size:
+                    self._starting += 1
+                elif session is None:
+                    left = None if end_time is None else end_time - time.time()
+                    if left is not None and left <= 0:
+                        raise PoolTimeout("no free %s session in %s seconds" % (self.browser_name, timeout))
+                    self._lock.wait(left)
+                    continue
+
+            if session is None:
+                try:
+                    session = self._create()
+                finally:
+                    with self._lock:
+                        self._starting -= 1
+                        self._lock.notify_all()
+            elif not self._healthy(session):
+                self._quit(session)
+                continue
+
+            session.uses += 1
+            with self._lock:
+                self._leased[id(session.driver)] = session
+            our_driver = driver.replace_current_driver(session.driver)
+            our_driver.size(Config.base_size)
+            return our_driver
+
+    def release(self, our_driver):
+        """ Возвращает сессию в пул: очищает ее или, если она отработала свое, закрывает """
+        sel_driver = getattr(our_driver, 'driver', our_driver)
+        with self._lock:
+            session = self._leased.pop(id(sel_driver), None)
+        if session is None:
+            return
+        if self._closed or session.uses >= self.max_uses or \
+                time.time() - session.created >= self.max_lifetime or not self._reset(session):
+            self._quit(session)
+        else:
+            with self._lock:
+                self._idle.append(session)
+        with self._lock:
+            self._lock.notify_all()
+
+    @contextmanager
+    def session(self, timeout=None):
+        """ Аренда сессии на время блока with """
+        our_driver = self.lease(timeout)
+        try:
+            yield our_driver
+        finally:
+            self.release(our_driver)
+
+    def close(self):
+        """ Закрывает все свободные сессии; сессии в аренде закроются при возврате """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._lock.notify_all()
+        for session in idle:
+            self._quit(session)
+
+    @staticmethod
+    def _healthy(session):
+        """ Проверка, что браузер сессии жив """
+        try:
+            session.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(session):
+        """
+            Очистка состояния сессии: хранилища, куки, лишние окна, пустая страница. WebDriver очищает куки и
+            хранилища только у источника (сайта) текущей страницы, поэтому сессия, в которой открывались страницы
+            нескольких сайтов, не очищается, а пересоздается (False). Сайты известны по переходам через обертку
+            драйвера (get, raw_get, url) и по адресу последней страницы: на сайт, открытый только кликом и уже
+            покинутый, состояние может остаться
+        """
+        from . import driver
+        sel_driver = session.driver
+        our_driver = driver.extended(sel_driver)
+        try:
+            origins = set(our_driver.origins) if our_driver is not None else set()
+            current = driver.origin(str(sel_driver.current_url))
+            if current:
+                origins.add(current)
+            if len(origins) > 1:
+                return False
+            if origins and current not in origins:
+                # очищаем на странице того сайта, где тест оставил состояние
+                sel_driver.get(origins.pop() + '/')
+            try:
+                sel_driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except Exception:
+                pass    # страница без хранилища (about:blank, HttpDriver и т.п.)
+            sel_driver.delete_all_cookies()
+            handles = getattr(sel_driver, 'window_handles', [])
+            if len(handles) > 1:
+                for handle in handles[1:]:
+                    sel_driver.switch_to.window(handle)
+                    sel_driver.close()
+                sel_driver.switch_to.window(handles[0])
+            if getattr(sel_driver, 'name', None) != 'http':
+                sel_driver.get('about:blank')
+            if our_driver is not None:
+                our_driver.origins.clear()
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, session):
+        from .transport import close_connections
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+        close_connections(session.driver)
@@ -0,0 +1,510 @@
+# -*- coding: utf-8 -*-
+# Модуль с js-скриптами, выполняемыми в браузере за одно обращение к WebDriver-у
+
+# Общие функции поиска элементов. Повторяют семантику find_elements WebDriver-а для всех типов By и
+# семантику пересечения списков _list_common_elements из finder.py
+FIND_FUNCTIONS = """
+    function __toArray(list) {
+        return Array.prototype.slice.call(list);
+    }
+
+    function __byQuery(base, by, value) {
+        var ctx = base || document;
+        var i, rz = [];
+        if (by === 'xpath') {
+            var snap = document.evaluate(value, ctx, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (i = 0; i < snap.snapshotLength; i++) {
+                if (snap.snapshotItem(i).nodeType === 1) rz.push(snap.snapshotItem(i));
+            }
+            return rz;
+        }
+        if (by === 'css selector') return __toArray(ctx.querySelectorAll(value));
+        if (by === 'class name') return __toArray(ctx.getElementsByClassName(value));
+        if (by === 'tag name') return __toArray(ctx.getElementsByTagName(value));
+        if (by === 'id') {
+            return __toArray(ctx.querySelectorAll('[id]')).filter(function (e) { return e.id === value; });
+        }
+        if (by === 'name') {
+            return __toArray(ctx.querySelectorAll('[name]')).filter(function (e) {
+                return e.getAttribute('name') === value;
+            });
+        }
+        if (by === 'link text' || by === 'partial link text') {
+            return __toArray(ctx.getElementsByTagName('a')).filter(function (e) {
+                var t = (e.innerText || e.textContent || '').trim();
+                return by === 'link text' ? t === value : t.indexOf(value) >= 0;
+            });
+        }
+        throw new Error('unsupported locator type: ' + by);
+    }
+
+    function __common(list1, list2) {
+        if (!(list1 && list1.length && list2 && list2.length)) {
+            return (list1 && list1.length ? list1 : list2) || [];
+        }
+        return list1.filter(function (e, i) {
+            return list2.indexOf(e) >= 0 && list1.indexOf(e) === i;
+        });
+    }
+
+    function __findAll(base, queries) {
+        var elements = null;
+        for (var i = 0; i < queries.length; i++) {
+            elements = __common(elements, __byQuery(base, queries[i][0], queries[i][1]));
+        }
+        return elements || [];
+    }
+
+    function __findFirst(base, queries) {
+        var elements = null;
+        for (var i = 0; i < queries.length; i++) {
+            var found = __byQuery(base, queries[i][0], queries[i][1]);
+            if (!found.length) return null;
+            elements = __common(elements, found);
+        }
+        return elements && elements.length ? elements[0] : null;
+    }
+
+    function __slice(list, start, stop, step) {
+        var n = list.length, rz = [], i;
+        step = step === null ? 1 : step;
+        function norm(v, def, lo, hi) {
+            if (v === null) return def;
+            if (v < 0) v += n;
+            return Math.min(Math.max(v, lo), hi);
+        }
+        if (step > 0) {
+            for (i = norm(start, 0, 0, n); i < norm(stop, n, 0, n); i += step) rz.push(list[i]);
+        } else {
+            for (i = norm(start, n - 1, -1, n - 1); i > norm(stop, -1, -1, n - 1); i += step) rz.push(list[i]);
+        }
+        return rz;
+    }
+
+    function __resolveChain(root, steps) {
+        var target = root, pending = false;
+        for (var i = 0; i < steps.length; i++) {
+            var step = steps[i];
+            if (step.op === 's') {
+                target = __findFirst(target, step.q);
+                if (!target) return {ok: false, step: i};
+            } else if (step.op === 'ss') {
+                if (!__findFirst(target, step.q)) pending = true;
+                target = __findAll(target, step.q);
+            } else if (step.op === 'ss_s') {
+                var rz = [];
+                for (var j = 0; j < target.length; j++) {
+                    var found = __findFirst(target[j], step.q);
+                    if (!found) return {ok: false, step: i};
+                    rz.push(found);
+                }
+                target = rz;
+            } else if (step.op === 'slice') {
+                target = __slice(target, step.start, step.stop, step.step);
+            } else if (step.op === 'index') {
+                var k = step.index < 0 ? target.length + step.index : step.index;
+                if (k < 0 || k >= target.length) return {ok: false, step: i};
+                target = target[k];
+            }
+        }
+        return {ok: true, pending: pending, value: target};
+    }
+"""
+
+# Разрешение всей цепочки локаторов. arguments[0] - корневой элемент (null - документ), arguments[1] - шаги цепочки
+RESOLVE_CHAIN = FIND_FUNCTIONS + """
+    return __resolveChain(arguments[0], arguments[1]);
+"""
+
+# Отбор кандидатов по остальным запросам поиска (см. selectivity): arguments[0] - кандидаты, найденные самым
+# избирательным запросом, arguments[1] - базовый элемент поиска (null - документ), arguments[2] - проверки запросов
+# {by, value, rel, pred}, arguments[3] - ищется один элемент. Каждый кандидат проверяется сам по себе, а запрос, который
+# так не проверить, выполняется целиком. Запрос без совпадений не сужает список (как __common), но при поиске одного
+# элемента означает, что элемент не найден. Возвращает {url: адрес страницы, value: кандидаты, missing: номер запроса
+# без совпадений или null}
+FILTER_CANDIDATES = FIND_FUNCTIONS + """
+    var candidates = arguments[0], base = arguments[1], checks = arguments[2], first = arguments[3];
+
+    function __matches(el, c) {
+        if (c.rel && base && (base === el || !base.contains(el))) return false;
+        if (c.by === 'css selector') return el.matches(c.value);
+        if (c.by === 'class name') return el.classList.contains(c.value);
+        if (c.by === 'tag name') return el.tagName.toLowerCase() === c.value.toLowerCase();
+        if (c.by === 'id') return el.id === c.value;
+        if (c.by === 'name') return el.getAttribute('name') === c.value;
+        if (c.pred) {
+            return document.evaluate('boolean(self::*' + c.pred + ')', el, null, XPathResult.BOOLEAN_TYPE,
+                                     null).booleanValue;
+        }
+        return null;
+    }
+
+    var rz = candidates;
+    for (var i = 0; i < checks.length; i++) {
+        var c = checks[i], all = null;
+        var filtered = rz.filter(function (el) {
+            var matched = __matches(el, c);
+            if (matched !== null) return matched;
+            all = all || __byQuery(base, c.by, c.value);
+            return all.indexOf(el) >= 0;
+        });
+        if (filtered.length || !rz.length || (all || __byQuery(base, c.by, c.value)).length) {
+            rz = filtered;
+        } else if (first) {
+            return {url: location.href, value: [], missing: i};
+        }
+    }
+    return {url: location.href, value: rz, missing: null};
+"""
+
+# Токен "поколения" DOM: идентификатор документа и счетчик мутаций, который ведет MutationObserver.
+# Наблюдатель устанавливается при первом вызове, новый документ (переход, перезагрузка) получает новый идентификатор
+DOM_TOKEN = """
+    var state = window.__mtsDom;
+    if (!state) {
+        state = window.__mtsDom = {id: Date.now() + '-' + Math.random(), generation: 0};
+        new MutationObserver(function () { state.generation++; }).observe(document, {
+            childList: true, subtree: true, attributes: true, characterData: true
+        });
+    }
+    return state.id + ':' + state.generation;
+"""
+
+# Сверка зафиксированного списка (см. ElementList.freeze): токен DOM (см. DOM_TOKEN) и все ли элементы arguments[0] еще
+# в документе. Возвращает [токен, true/false]
+FROZEN_STATE = """
+    var token = (function () {""" + DOM_TOKEN + """})();
+    return [token, arguments[0].every(function (el) { return el.isConnected; })];
+"""
+
+# Асинхронное ожидание любой мутации DOM, но не дольше arguments[0] миллисекунд. Возвращает true, если DOM изменился
+WAIT_MUTATION = """
+    var done = arguments[arguments.length - 1], finished = false, timer = null;
+    var observer = new MutationObserver(function () { finish(true); });
+    function finish(changed) {
+        if (finished) return;
+        finished = true;
+        observer.disconnect();
+        clearTimeout(timer);
+        done(changed);
+    }
+    observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    timer = setTimeout(function () { finish(false); }, arguments[0]);
+"""
+
+# Асинхронное ожидание исчезновения элемента (или опустения списка), найденного по шагам цепочки arguments[0], но не
+# дольше arguments[1] миллисекунд. Цепочка проверяется сразу и после каждой мутации DOM. Возвращает true, если
+# элемента нет
+WAIT_GONE = FIND_FUNCTIONS + """
+    var steps = arguments[0], done = arguments[arguments.length - 1], finished = false, timer = null, observer = null;
+
+    function gone() {
+        var found = __resolveChain(null, steps);
+        return !found.ok || (Array.isArray(found.value) && !found.value.length);
+    }
+
+    function finish(rz) {
+        if (finished) return;
+        finished = true;
+        observer.disconnect();
+        clearTimeout(timer);
+        done(rz);
+    }
+
+    if (gone()) return done(true);
+    observer = new MutationObserver(function () { if (gone()) finish(true); });
+    observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    timer = setTimeout(function () { finish(gone()); }, arguments[1]);
+"""
+
+# Свойства отдельного элемента. __displayed приближенно повторяет is_displayed WebDriver-а (display, visibility,
+# opacity, наличие боксов), __value извлекает значение по описанию поля (см. extract.Field)
+ELEMENT_FUNCTIONS = """
+    function __displayed(el) {
+        if (!el || !el.isConnected) return false;
+        var style = getComputedStyle(el);
+        if (style.visibility === 'hidden' || style.visibility === 'collapse') return false;
+        for (var e = el; e && e.nodeType === 1; e = e.parentElement) {
+            style = getComputedStyle(e);
+            if (style.display === 'none' || parseFloat(style.opacity) === 0) return false;
+        }
+        return el.getClientRects().length > 0;
+    }
+
+    function __enabled(el) {
+        return !(el.matches && el.matches(':disabled'));
+    }
+
+    function __rect(el) {
+        var r = el.getBoundingClientRect();
+        return {x: Math.round(r.left + window.pageXOffset), y: Math.round(r.top + window.pageYOffset),
+                width: Math.round(r.width), height: Math.round(r.height)};
+    }
+
+    function __text(el) {
+        return __displayed(el) ? (el.innerText || '').replace(/^\\s+|\\s+$/g, '') : '';
+    }
+
+    function __value(el, d) {
+        if (d.sel) {
+            el = el.querySelector(d.sel);
+            if (!el) return null;
+        }
+        if (d.get === 'text') return __text(el);
+        if (d.get === 'attr') return el.getAttribute(d.name);
+        if (d.get === 'prop') return el[d.name] === undefined ? null : el[d.name];
+        if (d.get === 'inner_html') return el.innerHTML;
+        if (d.get === 'html') return el.outerHTML;
+        if (d.get === 'tag') return el.tagName.toLowerCase();
+        if (d.get === 'rect') return __rect(el);
+        if (d.get === 'enabled') return __enabled(el);
+        var r = el.getBoundingClientRect(), visible = __displayed(el) && r.width * r.height > 0;
+        if (d.get === 'visible') return visible;
+        if (d.get === 'interaction') return visible && __enabled(el);
+        throw new Error('unsupported field: ' + d.get);
+    }
+"""
+
+# Значения полей для списка элементов. arguments[0] - элементы, arguments[1] - {колонка: описание поля}.
+# Возвращает {колонка: [значения по элементам]}
+EXTRACT_COLUMNS = ELEMENT_FUNCTIONS + """
+    var elements = arguments[0], spec = arguments[1], rz = {};
+    for (var name in spec) {
+        rz[name] = elements.map(function (el) { return __value(el, spec[name]); });
+    }
+    return rz;
+"""
+
+# Снимок состояния элемента arguments[0] одним вызовом
+ELEMENT_STATE = ELEMENT_FUNCTIONS + """
+    var el = arguments[0], attributes = {};
+    for (var i = 0; i < el.attributes.length; i++) {
+        attributes[el.attributes[i].name] = el.attributes[i].value;
+    }
+    var selectable = el.tagName === 'OPTION' || el.type === 'checkbox' || el.type === 'radio';
+    return {
+        tag: el.tagName.toLowerCase(), text: __text(el), rect: __rect(el), displayed: __displayed(el),
+        enabled: __enabled(el), selected: selectable ? !!(el.selected || el.checked) : false, checked: !!el.checked,
+        value: el.value === undefined ? el.getAttribute('value') : el.value, attributes: attributes
+    };
+"""
+
+# Проверка готовности элемента arguments[0] к действию (асинхронный скрипт): элемент в документе, видим, имеет
+# ненулевую площадь и доступен. Для клика (arguments[2]) еще и не перекрыт другим элементом в точке клика и не
+# двигается два кадра подряд. arguments[1] - прокрутить ли элемент вне экрана в видимую область (без прокрутки
+# перекрытие такого элемента не проверяется). Возвращает {ok: true} или {ok: false, reason: ..., ...}
+ACTIONABILITY = ELEMENT_FUNCTIONS + """
+    var el = arguments[0], scroll = arguments[1], pointer = arguments[2], done = arguments[arguments.length - 1];
+
+    function nextFrame(callback) {
+        var called = false;
+        function once() {
+            if (!called) {
+                called = true;
+                callback();
+            }
+        }
+        requestAnimationFrame(once);
+        setTimeout(once, 50);  // в фоновой вкладке requestAnimationFrame не вызывается
+    }
+
+    function check() {
+        if (!el.isConnected) return {ok: false, reason: 'detached'};
+        if (!__displayed(el)) return {ok: false, reason: 'not visible'};
+        var r = el.getBoundingClientRect();
+        if (r.width * r.height <= 0) return {ok: false, reason: 'zero area'};
+        if (!__enabled(el)) return {ok: false, reason: 'disabled'};
+        return null;
+    }
+
+    function describe(node) {
+        return node.tagName.toLowerCase() + (node.id ? '#' + node.id : '') +
+            (typeof node.className === 'string' && node.className ? '.' + node.className.trim().split(/\\s+/).join('.') : '');
+    }
+
+    var failed = check();
+    if (failed || !pointer) return done(failed || {ok: true});
+    var first = el.getBoundingClientRect();
+    var outside = first.bottom <= 0 || first.right <= 0 || first.top >= window.innerHeight ||
+        first.left >= window.innerWidth;
+    if (outside && scroll) {
+        el.scrollIntoView({block: 'center', inline: 'center'});
+        first = el.getBoundingClientRect();
+        outside = false;
+    }
+    nextFrame(function () { nextFrame(function () {
+        var failed = check();
+        if (failed) return done(failed);
+        var r = el.getBoundingClientRect();
+        if (r.left !== first.left || r.top !== first.top || r.width !== first.width || r.height !== first.height) {
+            return done({ok: false, reason: 'moving'});
+        }
+        if (outside) return done({ok: true});
+        var left = Math.max(r.left, 0), top = Math.max(r.top, 0);
+        var x = left + (Math.min(r.right, window.innerWidth) - left) / 2;
+        var y = top + (Math.min(r.bottom, window.innerHeight) - top) / 2;
+        var hit = document.elementFromPoint(x, y);
+        if (hit && hit !== el && !el.contains(hit)) {
+            return done({ok: false, reason: 'covered', covered_by: describe(hit)});
+        }
+        done({ok: true});
+    }); });
+"""
+
+# Проверка условия ожидания (см. condition.BaseCondition.to_js). target - элемент, список элементов или null (условия
+# страницы), spec - дерево условия из операций and/or/not и проверок. Для списка проверка свойства элемента выполняется
+# для каждого элемента. Возвращает {ok: результат, actual: {свойство: наблюдаемое значение}}
+CONDITION_FUNCTIONS = ELEMENT_FUNCTIONS + """
+    function __checkCondition(target, spec) {
+        var actual = {};
+
+        function read(name) {
+            if (!(name in actual)) {
+                if (name === 'title') actual[name] = document.title;
+                else if (name === 'url') actual[name] = location.href;
+                else if (name === 'length') actual[name] = Array.isArray(target) ? target.length : (target ? 1 : 0);
+                else if (Array.isArray(target)) {
+                    actual[name] = target.map(function (el) { return __value(el, {get: name}); });
+                } else actual[name] = target ? __value(target, {get: name}) : null;
+            }
+            return actual[name];
+        }
+
+        function every(name, test) {
+            var value = read(name);
+            return Array.isArray(target) ? value.every(test) : test(value);
+        }
+
+        function check(c) {
+            var i, ok;
+            if (c.op === 'and' || c.op === 'or') {
+                // части проверяются все, чтобы в actual попали значения для сообщения об ошибке
+                ok = c.op === 'and';
+                for (i = 0; i < c.args.length; i++) {
+                    ok = c.op === 'and' ? check(c.args[i]) && ok : check(c.args[i]) || ok;
+                }
+                return ok;
+            }
+            if (c.op === 'not') return !check(c.arg);
+            if (c.op === 'text') return every('text', function (v) { return v === c.value; });
+            if (c.op === 'text_contains') {
+                return every('text', function (v) { return v !== null && v.indexOf(c.value) >= 0; });
+            }
+            if (c.op === 'visible' || c.op === 'enabled' || c.op === 'interaction') {
+                return every(c.op, function (v) { return v === true; });
+            }
+            if (c.op === 'length') return read('length') === c.value;
+            if (c.op === 'title' || c.op === 'title_contains' || c.op === 'url' || c.op === 'url_contains') {
+                read('url');
+                var value = read(c.op.indexOf('title') === 0 ? 'title' : 'url');
+                return c.op.indexOf('_contains') > 0 ? value.indexOf(c.value) >= 0 : value === c.value;
+            }
+            throw new Error('unsupported condition: ' + c.op);
+        }
+
+        return {ok: check(spec), actual: actual};
+    }
+"""
+
+# Проверка одного условия: arguments[0] - цель, arguments[1] - условие (см. __checkCondition)
+CHECK_CONDITION = CONDITION_FUNCTIONS + """
+    return __checkCondition(arguments[0], arguments[1]);
+"""
+
+# Проверка нескольких условий за одно обращение (см. multi_wait). arguments[0] - список {target: элемент, список
+# элементов или null, steps: шаги цепочки локаторов цели (вместо target) или null, spec: условие}. Цель по шагам
+# ищется заново при каждой проверке; пустой список, как и при обычном поиске ss, считается ненайденной целью (иначе
+# проверки свойств "для каждого элемента" выполняются для пустого списка). Возвращает для каждого условия
+# {ok, found: найдена ли цель, actual}
+CHECK_CONDITIONS = FIND_FUNCTIONS + CONDITION_FUNCTIONS + """
+    return arguments[0].map(function (item) {
+        var target = item.target;
+        if (item.steps) {
+            var found = __resolveChain(null, item.steps);
+            if (!found.ok || found.pending || (Array.isArray(found.value) && !found.value.length)) {
+                return {ok: false, found: false, actual: {}};
+            }
+            target = found.value;
+        }
+        var rz = __checkCondition(target, item.spec);
+        rz.found = true;
+        return rz;
+    });
+"""
+
+# Извлечение данных по схеме. arguments[0] - корневые элементы (null - документ), arguments[1] - схема
+# {поле: {steps: шаги цепочки локаторов или null, get/name/sel: описание значения | schema: вложенная схема}}.
+# Возвращает список словарей - по одному на каждый корневой элемент. Ненайденные значения - null
+EXTRACT_SCHEMA = FIND_FUNCTIONS + ELEMENT_FUNCTIONS + """
+    function __extract(root, schema) {
+        var rz = {};
+        for (var name in schema) {
+            var field = schema[name], target = root;
+            if (field.steps) {
+                var found = __resolveChain(root, field.steps);
+                if (!found.ok) {
+                    rz[name] = null;
+                    continue;
+                }
+                target = found.value;
+            }
+            var read = field.schema ? function (el) { return __extract(el, field.schema); }
+                                    : function (el) { return __value(el, field); };
+            rz[name] = Array.isArray(target) ? target.map(read) : read(target || document.documentElement);
+        }
+        return rz;
+    }
+
+    var roots = arguments[0], schema = arguments[1];
+    return roots.map(function (root) { return __extract(root, schema); });
+"""
+
+# Разбор таблицы характеристик arguments[0] одним вызовом: строки <table>, пары <dt>/<dd> списка <dl> или строки
+# "сетки" (блоки из двух дочерних элементов: название и значение). arguments[1] - брать ли значение как innerHTML.
+# Возвращает {header: заголовки таблицы или null, rows: [[ячейки строки]]}, пробелы в текстах нормализованы
+TABLE_ROWS = """
+    var root = arguments[0], html = arguments[1], rows = [], header = null;
+
+    function norm(s) {
+        return (s || '').replace(/\\s+/g, ' ').replace(/^ | $/g, '');
+    }
+
+    function cell(el, isValue) {
+        return isValue && html ? el.innerHTML.replace(/^\\s+|\\s+$/g, '') : norm(el.innerText || el.textContent);
+    }
+
+    function cells(list) {
+        return list.map(function (el, i) { return cell(el, i > 0); });
+    }
+
+    function children(el) {
+        return Array.prototype.slice.call(el.children);
+    }
+
+    function grid(el) {
+        children(el).forEach(function (row) {
+            var items = children(row);
+            if (items.length === 2) rows.push(cells(items));
+            else if (items.length > 2) grid(row);
+        });
+    }
+
+    var trs = root.tagName === 'TR' ? [root] : Array.prototype.slice.call(root.querySelectorAll('tr'));
+    var dts = root.tagName === 'DL' || root.querySelector('dl') ? root.querySelectorAll('dt') : [];
+    if (trs.length) {
+        trs.forEach(function (tr) {
+            var items = children(tr).filter(function (c) { return c.tagName === 'TD' || c.tagName === 'TH'; });
+            var isHeader = items.length && items.every(function (c) { return c.tagName === 'TH'; });
+            if (isHeader && header === null && !rows.length) header = items.map(function (c) { return cell(c, false); });
+            else if (items.length >= 2) rows.push(cells(items));
+        });
+    } else if (dts.length) {
+        Array.prototype.forEach.call(dts, function (dt) {
+            var dd = dt.nextElementSibling;
+            if (dd && dd.tagName === 'DD') rows.push([cell(dt, false), cell(dd, true)]);
+        });
+    } else {
+        grid(root);
+    }
+    return {header: header, rows: rows};
+"""
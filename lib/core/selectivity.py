@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# Статистика избирательности запросов поиска: сколько элементов в среднем находит каждый запрос (by, value) на
+# страницах одного вида (шаблон url). По ней поиск по нескольким несводимым в один селектор критериям начинается с
+# самого избирательного запроса, а остальные проверяются только у найденных кандидатов (см. Config.selectivity)
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from selenium.webdriver.common.by import By
+
+from .compiler import _is_positional, _is_predicates
+
+
+def url_pattern(url):
+    """ Шаблон url: хост и путь без параметров, сегменты пути с цифрами (id, артикулы) заменены на {n} """
+    if not url:
+        return None
+    parts = urlsplit(url)
+    path = '/'.join('{n}' if any(ch.isdigit() for ch in segment) else segment for segment in parts.path.split('/'))
+    return parts.netloc + path
+
+
+def scoped_check(query):
+    """
+        Описание запроса для проверки отдельного элемента-кандидата в браузере (см. scripts.FILTER_CANDIDATES):
+        rel - элемент должен быть внутри базового элемента поиска, pred - xpath-предикат запроса, если запрос
+        сводится к нему (позиционный предикат у отдельного элемента не проверить - такой запрос выполняется целиком)
+    """
+    by, value = query
+    if by != By.XPATH:
+        return {'by': by, 'value': value, 'rel': True, 'pred': None}
+    for prefix, rel in (('.//*', True), ('//*', False)):
+        if value.startswith(prefix) and _is_predicates(value[len(prefix):]) and \
+                not _is_positional(value[len(prefix):]):
+            return {'by': by, 'value': value, 'rel': rel, 'pred': value[len(prefix):]}
+    return {'by': by, 'value': value, 'rel': False, 'pred': None}
+
+
+class SelectivityStats:
+    """
+        Среднее (экспоненциальное) число совпадений запросов {(шаблон url, by, value): совпадений}. Хранится не больше
+        maxsize записей, давно не использованные вытесняются
+    """
+
+    def __init__(self, maxsize=5000, weight=0.3, refresh=50):
+        self.maxsize = maxsize
+        self.weight = weight            # вес нового замера в среднем
+        self.refresh = refresh          # каждый refresh-ый поиск по тем же запросам измеряет все запросы заново
+        self._lock = threading.Lock()
+        self._counts = OrderedDict()
+        self._uses = {}
+
+    def record(self, pattern, query, count):
+        """ Замер: запрос query на странице вида pattern нашел count элементов """
+        key = (pattern,) + tuple(query)
+        with self._lock:
+            old = self._counts.pop(key, None)
+            self._counts[key] = count if old is None else old + (count - old) * self.weight
+            while len(self._counts) > self.maxsize:
+                self._counts.popitem(last=False)
+
+    def estimate(self, pattern, query):
+        """ Среднее число совпадений запроса; None - замеров еще нет """
+        with self._lock:
+            return self._counts.get((pattern,) + tuple(query))
+
+    def order(self, pattern, queries):
+        """
+            Запросы по возрастанию среднего числа совпадений. None - статистика есть не по всем запросам или пора ее
+            обновить (тогда поиск выполняется всеми запросами и все они измеряются)
+        """
+        estimates = [self.estimate(pattern, query) for query in queries]
+        if None in estimates:
+            return None
+        key = (pattern,) + tuple(tuple(query) for query in queries)
+        with self._lock:
+            uses = self._uses[key] = self._uses.get(key, 0) + 1
+            if len(self._uses) > self.maxsize:
+                self._uses.clear()
+        if self.refresh and uses % self.refresh == 0:
+            return None
+        return [query for _, query in sorted(zip(estimates, queries), key=lambda item: item[0])]
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+            self._uses.clear()
+
+
+# общая статистика процесса
+stats = SelectivityStats()
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 # Набор воспомогательных функций и классов, вынесенных в отдельный модуль
+import time
+from collections import namedtuple
+from types import MappingProxyType
 
 from .config import Config
 from .wait import Wait
@@ -22,9 +25,61 @@ def correct_url(url):
     return url
 
 
-def interaction(ob, wait=Config.wait_timeout):
-    """ Ожидание интерактивности элемента """
-    Wait(ob, wait).bool(lambda dd: dd.is_interaction())
+def javascript_enabled(browser):
+    """ Выполняет ли драйвер js-скрипты (например, HttpDriver - нет) """
+    capabilities = getattr(browser, 'capabilities', None) or {}
+    return capabilities.get('javascriptEnabled', True) is not False
+
+
+def async_scripts_unsupported(error):
+    """
+        Означает ли ошибка execute_async_script, что сессия не выполняет асинхронные скрипты вообще (таймаут
+        асинхронных скриптов сессии, неизвестная команда), а не разовый сбой (переход на другую страницу во время
+        скрипта, исчезнувший элемент и т.п.), после которого стоит попробовать еще раз
+    """
+    from selenium.common.exceptions import TimeoutException, UnknownMethodException, WebDriverException
+
+    if isinstance(error, (TimeoutException, UnknownMethodException)):
+        return True
+    message = str(getattr(error, 'msg', None) or '').lower()
+    return type(error) is WebDriverException and any(
+        text in message for text in ('unknown command', 'unsupported operation', 'not implemented',
+                                     'does not execute javascript'))
+
+
+def interaction(ob, wait=Config.wait_timeout, pointer=False):
+    """
+        Ожидание готовности элемента к действию (см. Element.actionability): элемент видим, имеет ненулевую площадь и
+        доступен. pointer=True - проверки для клика: элемент еще и не перекрыт в точке клика и не двигается (элемент
+        вне экрана прокручивается в видимую область, как это сделал бы и сам клик). wait=0 - одна проверка.
+        Возвращает результат последней проверки - словарь {'ok': True} или {'ok': False, 'reason': причина, ...}.
+        Неготовый к концу ожидания элемент, как и раньше, не мешает действию (ошибку, если она будет, возбудит сам
+        WebDriver), а с Config.strict_actions - возбуждается TimeoutException с причиной (reason и подробности,
+        например covered_by)
+    """
+    from selenium.common.exceptions import TimeoutException
+
+    result = {'ok': False, 'reason': 'not checked'}
+
+    def _check(dd):
+        result.clear()
+        result.update(dd.actionability(scroll=pointer, pointer=pointer))
+        return result['ok']
+
+    start = time.time()
+    if wait:
+        Wait(ob, wait).bool(_check)
+    else:
+        try:
+            _check(ob)
+        except:
+            pass
+    if not result['ok'] and Config.strict_actions:
+        details = ', '.join('%s: %s' % item for item in sorted(result.items()) if item[0] not in ('ok', 'reason'))
+        raise TimeoutException("element is not actionable after %.1f seconds: %s, reason: %s%s" % (
+            time.time() - start, getattr(ob, 'locator', ob), result.get('reason'),
+            ' (%s)' % details if details else ''))
+    return result
 
 
 class Attributes(object):
@@ -66,3 +121,36 @@ class Attributes(object):
 
     def __eq__(self, other):
         return self._get_attributes() == other
+
+
+class ElementState(namedtuple('ElementState', 'tag text rect displayed enabled selected checked value attributes')):
+    """ Неизменяемый снимок состояния элемента, полученный одним js-вызовом (см. Element.state) """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_js(cls, data):
+        data = dict(data, attributes=MappingProxyType(dict(data['attributes'])))
+        return cls(**{field: data[field] for field in cls._fields})
+
+    @property
+    def size(self):
+        return [self.rect['width'], self.rect['height']]
+
+    @property
+    def location(self):
+        return [self.rect['x'], self.rect['y']]
+
+    @property
+    def area(self):
+        return self.rect['width'] * self.rect['height']
+
+    @property
+    def visible(self):
+        """ Виден ли элемент на дисплее и его размеры не равны нулю """
+        return self.displayed and self.area > 0
+
+    @property
+    def interaction(self):
+        """ Виден ли элемент и доступен ли для взаимодействия """
+        return self.visible and self.enabled
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+# Офлайн-снимок DOM страницы: page_source забирается один раз и разбирается локально (lxml), после чего поиск
+# элементов тем же набором параметров, что у s()/ss(), и чтение их свойств не требуют обращений к браузеру
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+from .config import Config
+from .finder import InvalidSizeList, Locator, _list_common_elements
+
+try:
+    import lxml.html
+except ImportError:     # необязательная зависимость, нужна только для снимков
+    lxml = None
+
+try:
+    from cssselect import HTMLTranslator
+except ImportError:     # необязательная зависимость, нужна только для css-селекторов в снимках
+    HTMLTranslator = None
+
+
+def _normalize(text):
+    return ' '.join((text or '').split())
+
+
+def _css_to_xpath(css, prefix):
+    if HTMLTranslator is None:
+        raise ImportError("css selectors in DOM snapshots require the 'cssselect' package")
+    return HTMLTranslator().css_to_xpath(css, prefix=prefix)
+
+
+def find_nodes(context, by, value, document=False):
+    """
+        Поиск узлов lxml по запросу (by, value) WebDriver-а относительно узла context. document=True - контекст
+        весь документ (как у поиска от драйвера), иначе - элемент (как у поиска от WebElement-а)
+    """
+    axis = 'descendant-or-self::' if document else 'descendant::'
+    if by == By.XPATH:
+        if document and value.startswith('.//'):
+            value = value[1:]
+        nodes = context.xpath(value)
+    elif by == By.CSS_SELECTOR:
+        nodes = context.xpath(_css_to_xpath(value, axis))
+    elif by == By.ID:
+        nodes = context.xpath(axis + '*[@id=$v]', v=value)
+    elif by == By.NAME:
+        nodes = context.xpath(axis + '*[@name=$v]', v=value)
+    elif by == By.CLASS_NAME:
+        nodes = context.xpath(axis + "*[contains(concat(' ', normalize-space(@class), ' '), $v)]", v=' %s ' % value)
+    elif by == By.TAG_NAME:
+        nodes = context.xpath(axis + '*[local-name()=$v]', v=value.lower())
+    elif by in (By.LINK_TEXT, By.PARTIAL_LINK_TEXT):
+        nodes = [a for a in context.xpath(axis + 'a')
+                 if (_normalize(a.text_content()) == value if by == By.LINK_TEXT else value in a.text_content())]
+    else:
+        raise ValueError(by)
+    return [node for node in nodes if isinstance(node, lxml.html.HtmlElement)]
+
+
+class _Node:
+    """ Обертка узла lxml, совместимая с _list_common_elements (сравнение по id) """
+
+    def __init__(self, node):
+        self.node = node
+        self.id = id(node)
+
+
+class _Searchable:
+    """ Общий для снимка и его элементов поиск по параметрам s()/ss() """
+
+    _document = False
+
+    def _find(self, operation_type, args, kwargs):
+        kwargs.pop('wait', None)
+        _filter = kwargs.pop('filter', None)
+        _size = kwargs.pop('size', None)
+        locator = Locator(operation_type, (args, kwargs), 0, './/*' if operation_type == 's' else '//*')
+
+        elements = None
+        for by, value in locator.queries:
+            found = [_Node(node) for node in find_nodes(self._context, by, value, self._document)]
+            if operation_type == 's' and not found:
+                raise NoSuchElementException("Unable to locate element in DOM snapshot: %s" % locator)
+            elements = _list_common_elements(elements, found)
+
+        rz = [SnapshotElement(self._snapshot, item.node) for item in elements or []]
+        if _filter:
+            rz = [el for el in rz if _filter(el)]
+        if _size is not None and len(rz) != _size:
+            raise InvalidSizeList("length of the elements list does not equal %s, and equal to %s " % (_size, len(rz)))
+        return rz
+
+    def s(self, *args, **kwargs):
+        """ Первый элемент снимка по параметрам, аналогичным s(). Если не найден - NoSuchElementException """
+        found = self._find('s', args, kwargs)
+        if not found:
+            raise NoSuchElementException("Unable to locate element in DOM snapshot")
+        return found[0]
+
+    def ss(self, *args, **kwargs):
+        """ Список элементов снимка по параметрам, аналогичным ss() """
+        return self._find('ss', args, kwargs)
+
+
+class DomSnapshot(_Searchable):
+    """
+        Снимок DOM страницы (см. ExtendedSeleniumDriver.snapshot). Поддерживает те же параметры поиска, что и s()/ss()
+        (css, xpath, text, атрибуты и т.п.), но все вычисляется локально. Снимок не меняется вместе со страницей
+    """
+
+    _document = True
+
+    def __init__(self, html):
+        if lxml is None:
+            raise ImportError("DOM snapshots require the 'lxml' package")
+        self._root = lxml.html.document_fromstring(html)
+        self._context = self._root.getroottree()
+        self._snapshot = self
+
+    @property
+    def title(self):
+        """ Заголовок страницы """
+        return _normalize(self._root.findtext('.//title'))
+
+    @property
+    def html(self):
+        """ Весь код страницы снимка """
+        return lxml.html.tostring(self._root, encoding='unicode')
+
+
+class SnapshotElement(_Searchable):
+    """ Элемент снимка DOM: чтение свойств без обращения к браузеру """
+
+    def __init__(self, snapshot, node):
+        self._snapshot = snapshot
+        self._node = node
+        self._context = node
+
+    def __eq__(self, other):
+        return isinstance(other, SnapshotElement) and self._node is other._node
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return '<SnapshotElement %s>' % self.xpath
+
+    @property
+    def text(self):
+        """ Текст элемента (без содержимого script и style, с нормализованными пробелами) """
+        parts = [t for t in self._node.xpath('.//text()[not(ancestor::script or ancestor::style)]')]
+        return _normalize(''.join(parts))
+
+    @property
+    def tag_name(self):
+        return str(self._node.tag)
+
+    @property
+    def html(self):
+        """ html-код всего элемента """
+        return lxml.html.tostring(self._node, encoding='unicode', with_tail=False)
+
+    @property
+    def inner_html(self):
+        """ html-код внутри элемента """
+        return (self._node.text or '') + ''.join(lxml.html.tostring(child, encoding='unicode')
+                                                 for child in self._node)
+
+    def attr(self, name):
+        """ Атрибут элемента (None, если его нет) """
+        return self._node.get(name)
+
+    def attr_dict(self):
+        """ Словарь атрибутов элемента """
+        return dict(self._node.attrib)
+
+    def value(self):
+        return str(self._node.get('value'))
+
+    @property
+    def xpath(self):
+        """ Абсолютный xpath элемента в документе """
+        return self._node.getroottree().getpath(self._node)
+
+    def live(self, wait=Config.wait_timeout):
+        """ Живой (ленивый) элемент страницы, соответствующий элементу снимка - для действий с ним """
+        from .finder import s
+        return s(xpath=self.xpath, wait=wait)
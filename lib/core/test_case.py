@@ -6,7 +6,9 @@ from selenium.webdriver.support import wait as selenium_wait
 from lib.core.finder import s
 from lib.core.config import Config
 
+from . import instrument
 from .config import Config
+from .pool import SessionPool
 from .tools import get, Browser
 
 
@@ -15,12 +17,24 @@ class SeleniumTestCase(TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
-        cls.driver = Browser(Config.browser_name)
+        if Config.session_pool:
+            # браузер берется в аренду из общего пула, а не запускается для каждого класса тестов
+            cls.driver = SessionPool.shared(Config.browser_name).lease()
+        else:
+            cls.driver = Browser(Config.browser_name)
 
     # noinspection PyUnresolvedReferences
     @classmethod
     def tearDownClass(cls):
-        cls.driver.quit()
+        if Config.session_pool:
+            SessionPool.shared(Config.browser_name).release(cls.driver)
+        else:
+            cls.driver.quit()
+
+    def run(self, result=None):
+        # команды WebDriver-а, выполненные во время теста, учитываются под его id (см. instrument)
+        with instrument.test(self.id()):
+            return super().run(result)
 
     def wait(self, method, **kwargs):
         """Шорткат для selenium'овского wait с учетом наших настроек"""
@@ -69,10 +83,19 @@ class SeleniumTestCase(TestCase):
             self.wait_assert(lambda _: self.assertTrue(s(text=text).is_visible()))
 
     def assertTextNotVisible(self, *args):
-        """ Проверка ненахождения на странице текста (отсутствует элемент или текст невидим) """
+        """
+            Проверка ненахождения на странице текста (отсутствует элемент или текст невидим): сразу, если текста уже
+            не видно, иначе - с ожиданием его исчезновения
+        """
         for text in args:
-                self.wait_assert(lambda _: self.assertTrue(s(text=text, wait=0).is_not_visible()))
+            try:
+                s(text=text, wait=0).wait_not_visible()
+            except TimeoutException:
+                self.fail('text %r is visible' % text)
 
     def assertElementNotFound(self, elem):
-        """ Проверка ненахождения элемента/элементов на странице, с ожиданием """
-        self.wait_assert(lambda _: self.assertTrue(elem.not_exist()))
+        """ Проверка ненахождения элемента/элементов на странице: сразу, если их уже нет, иначе - с ожиданием исчезновения """
+        try:
+            elem.wait_not_exist()
+        except TimeoutException:
+            self.fail('element is found: %s' % elem.locator)
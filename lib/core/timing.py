@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# История времени поиска локаторов между запусками: для каждой цепочки локаторов (сигнатура - ее строковое
+# представление, см. Locator.__str__) хранятся последние замеры времени успешного поиска. По ним вычисляются
+# адаптивный таймаут (p99 с запасом, в пределах границ) и шаг проверок (см. Config.adaptive_wait)
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+
+from .config import Config
+
+
+class TimingStore:
+    """ Замеры времени поиска локаторов {сигнатура: [сек.]}, сохраняемые в json-файл path """
+
+    def __init__(self, path=None, max_samples=200, save_every=50):
+        self.path = path
+        self.max_samples = max_samples          # сколько последних замеров хранится для каждой сигнатуры
+        self.save_every = save_every            # через сколько новых замеров история сохраняется в файл
+        self._lock = threading.Lock()
+        self._samples = None                    # история, прочитанная из файла, вместе с новыми замерами
+        self._new = {}                          # замеры, еще не сохраненные в файл
+        self._unsaved = 0
+
+    def _read(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {key: list(value) for key, value in data.items() if isinstance(value, list)}
+
+    def _data(self):
+        if self._samples is None:
+            self._samples = self._read()
+        return self._samples
+
+    def record(self, signature, seconds):
+        """ Замер времени успешного поиска цепочки signature """
+        with self._lock:
+            samples = self._data().setdefault(signature, [])
+            samples.append(round(seconds, 4))
+            del samples[:-self.max_samples]
+            self._new.setdefault(signature, []).append(round(seconds, 4))
+            self._unsaved += 1
+            save = self.save_every and self._unsaved >= self.save_every
+        if save:
+            self.save()
+
+    def samples(self, signature):
+        """ Замеры цепочки signature (старые - первыми) """
+        with self._lock:
+            return list(self._data().get(signature, ()))
+
+    def quantile(self, signature, q):
+        """ Квантиль q (0..1) времени поиска цепочки signature; None - замеров нет """
+        samples = sorted(self.samples(signature))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, max(int(math.ceil(q * len(samples))) - 1, 0))]
+
+    def timeout(self, signature, default):
+        """
+            Адаптивный таймаут поиска цепочки: p99 времени поиска, умноженный на Config.adaptive_wait_factor, в
+            пределах Config.adaptive_wait_min..adaptive_wait_max. Пока замеров меньше Config.adaptive_wait_samples -
+            default
+        """
+        if len(self.samples(signature)) < Config.adaptive_wait_samples:
+            return default
+        p99 = self.quantile(signature, 0.99)
+        return min(max(p99 * Config.adaptive_wait_factor, Config.adaptive_wait_min), Config.adaptive_wait_max)
+
+    def poll(self, signature, default):
+        """
+            Шаг проверок при поиске цепочки: четверть медианы времени поиска, но не меньше 0.05 сек. и не больше
+            default. Пока замеров меньше Config.adaptive_wait_samples - default
+        """
+        if len(self.samples(signature)) < Config.adaptive_wait_samples:
+            return default
+        return min(max(self.quantile(signature, 0.5) / 4, 0.05), default)
+
+    def save(self):
+        """
+            Сохраняет новые замеры в файл. Файл перечитывается перед записью, так что замеры параллельных процессов,
+            пишущих в тот же файл, не теряются
+        """
+        if not self.path:
+            return
+        with self._lock:
+            if not self._new:
+                return
+            data = self._read()
+            for signature, samples in self._new.items():
+                merged = data.setdefault(signature, [])
+                merged.extend(samples)
+                del merged[:-self.max_samples]
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix='.timings-', suffix='.json')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp, self.path)
+            self._samples = data
+            self._new = {}
+            self._unsaved = 0
+
+    def clear(self):
+        """ Забывает все замеры (файл не меняется до следующего сохранения) """
+        with self._lock:
+            self._samples = {}
+            self._new = {}
+            self._unsaved = 0
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def store():
+    """ Общая история времени поиска (файл Config.adaptive_wait_path), сохраняется при завершении процесса """
+    global _store
+    with _store_lock:
+        if _store is None or _store.path != Config.adaptive_wait_path:
+            if _store is not None:
+                _store.save()
+            _store = TimingStore(Config.adaptive_wait_path)
+        return _store
+
+
+@atexit.register
+def _save():
+    if _store is not None:
+        _store.save()
@@ -11,16 +11,31 @@ def Browser(browser_name, *args, remote_address='', language='ru', **kwargs):
     """
     Создать объект браузера по указанному имени и сохранить его в буфере.
     ! Язык можно указать только у локального хрома
+    Имя 'http' - драйвер без браузера для статических страниц (см. http_driver.HttpDriver)
     """
-    if remote_address:
+    sel_driver = create_driver(browser_name, *args, remote_address=remote_address, language=language, **kwargs)
+    our_driver = driver.replace_current_driver(sel_driver)
+    our_driver.size(Config.base_size)
+    return our_driver
+
+
+def create_driver(browser_name, *args, remote_address='', language='ru', **kwargs):
+    """ Создать объект WebDriver-а по указанному имени браузера, не делая его текущим (см. Browser) """
+    if browser_name == 'http':
+        from .http_driver import HttpDriver
+        sel_driver = HttpDriver(*args, **kwargs)
+    elif remote_address:
+        # команды идут через пул keep-alive соединений (см. transport.PooledRemoteConnection)
+        from .transport import PooledRemoteConnection
         if browser_name == 'firefox':
-            sel_driver = webdriver.Remote(remote_address, webdriver.DesiredCapabilities.FIREFOX)
+            capabilities = webdriver.DesiredCapabilities.FIREFOX
         elif browser_name == 'chrome':
-            sel_driver = webdriver.Remote(remote_address, webdriver.DesiredCapabilities.CHROME)
+            capabilities = webdriver.DesiredCapabilities.CHROME
         elif browser_name == 'opera':
-            sel_driver = webdriver.Remote(remote_address, webdriver.DesiredCapabilities.OPERA)
+            capabilities = webdriver.DesiredCapabilities.OPERA
         else:
             raise ValueError(browser_name)
+        sel_driver = webdriver.Remote(PooledRemoteConnection(remote_address), capabilities)
     else:
         if browser_name == 'firefox':
             sel_driver = webdriver.Firefox(*args, **kwargs)
@@ -31,17 +46,19 @@ def Browser(browser_name, *args, remote_address='', language='ru', **kwargs):
             if language:
                 options.add_experimental_option('prefs', {'intl.accept_languages': language + ',en-us,en'})
 
-            sel_driver = webdriver.Chrome(*args, chrome_options=options, **kwargs)
+            if Config.shared_driver_service:
+                # сессия в общем для процесса chromedriver-е (см. driver_service)
+                from .driver_service import shared_chrome
+                sel_driver = shared_chrome(*args, chrome_options=options, **kwargs)
+            else:
+                sel_driver = webdriver.Chrome(*args, chrome_options=options, **kwargs)
         elif browser_name == 'opera':
             sel_driver = webdriver.Opera(*args, **kwargs)
         elif browser_name == 'ie':
             sel_driver = webdriver.Ie(capabilities={'ignoreZoomSetting': True}, *args, **kwargs)
         else:
             raise ValueError(browser_name)
-
-    our_driver = driver.replace_current_driver(sel_driver)
-    our_driver.size(Config.base_size)
-    return our_driver
+    return sel_driver
 
 
 def get(url=Config.base_url):
@@ -61,3 +78,8 @@ def title():
 def close():
     driver.current.close()
     driver.current.quit()
+
+
+def extract(schema):
+    """ Извлечение данных текущей страницы по схеме (см. ExtendedSeleniumDriver.extract) """
+    return driver.current.extract(schema)
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+# Транспорт команд удаленных сессий (grid, selenoid и т.п.): пул keep-alive соединений на сессию, таймауты запросов,
+# компактный JSON и статистика задержек по командам - сколько занимает сеть, а сколько сам сервер
+import json
+import re
+import string
+import threading
+import time
+from collections import defaultdict
+from urllib import parse
+
+import urllib3
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+from urllib3.exceptions import ReadTimeoutError
+
+from .config import Config
+
+_SERVER_TIMING = re.compile(r'dur=([\d.]+)')
+
+
+class TransportStats:
+    """
+        Статистика команд: количество, суммарное время, оценка времени на сервере и сети, новые соединения.
+        Время сервера берется из заголовка Server-Timing, а если сервер его не отдает - оценивается как время
+        команды за вычетом сетевой задержки (минимальное время GET /status, см. PooledRemoteConnection.ping). Если
+        задержка неизвестна, время сервера и сети у команды тоже неизвестно (None), а не приписывается серверу
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # timed - суммарное время команд, у которых известно время сервера (только из них складываются server и wire)
+        self._commands = defaultdict(lambda: {'count': 0, 'total': 0.0, 'timed': 0.0, 'server': 0.0, 'max': 0.0})
+        self.connections = 0        # открытые соединения (чем меньше относительно команд, тем лучше переиспользование)
+        self.rtt = None             # сетевая задержка (сек.)
+
+    def add(self, command, total, server):
+        with self._lock:
+            item = self._commands[command]
+            item['count'] += 1
+            item['total'] += total
+            if server is not None:
+                item['timed'] += total
+                item['server'] += server
+            item['max'] = max(item['max'], total)
+
+    def report(self):
+        """
+            Список команд по убыванию суммарного времени: {command, count, total, server, wire, avg, max}. Время
+            сервера и сети - по командам, у которых оно известно (None - неизвестно ни у одной)
+        """
+        with self._lock:
+            items = [dict(item, command=command) for command, item in self._commands.items()]
+        for item in items:
+            timed = item.pop('timed')
+            item['wire'] = timed - item['server'] if timed else None
+            item['server'] = item['server'] if timed else None
+            item['avg'] = item['total'] / item['count']
+        return sorted(items, key=lambda item: item['total'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._commands.clear()
+
+    def __str__(self):
+        def ms(value):
+            return '%9s' % '-' if value is None else '%9.1f' % (value * 1000)
+
+        lines = ['%-28s %7s %9s %9s %9s %9s' % ('command', 'count', 'total,ms', 'server,ms', 'wire,ms', 'max,ms')]
+        for item in self.report():
+            lines.append('%-28s %7d %s %s %s %s' % (item['command'], item['count'], ms(item['total']),
+                                                   ms(item['server']), ms(item['wire']), ms(item['max'])))
+        return '\n'.join(lines)
+
+
+class _Retry(urllib3.Retry):
+    """
+        Повторы запросов: неудавшееся подключение - для любой команды, а оборванный ответ (сервер закрыл keep-alive
+        соединение) - только для идемпотентных команд (GET). Таймаут ответа не повторяется: команда и так шла долго
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = self.new(read=0) if isinstance(error, ReadTimeoutError) else self
+        return urllib3.Retry.increment(retry, method, url, response, error, _pool, _stacktrace)
+
+
+def close_connections(sel_driver):
+    """ Закрывает соединения сессии, если ее команды шли через PooledRemoteConnection (после quit) """
+    executor = getattr(sel_driver, 'command_executor', None)
+    if isinstance(executor, PooledRemoteConnection):
+        executor.close()
+
+
+class PooledRemoteConnection(RemoteConnection):
+    """
+        Исполнитель команд для webdriver.Remote: собственный пул keep-alive соединений (pool_size соединений на
+        сессию), таймауты на подключение и ответ, компактный JSON и статистика задержек в stats
+    """
+
+    def __init__(self, remote_server_addr, pool_size=None, timeout=None, connect_timeout=None, resolve_ip=True):
+        super().__init__(remote_server_addr, keep_alive=False, resolve_ip=resolve_ip)
+        self.keep_alive = True
+        self.stats = TransportStats()
+        self._command = threading.local()
+        self._pinged = False        # оценивалась ли сетевая задержка (см. ping)
+        self._conn = urllib3.PoolManager(
+            maxsize=pool_size or Config.remote_pool_size, block=False,
+            timeout=urllib3.Timeout(connect=connect_timeout or Config.remote_connect_timeout,
+                                    read=timeout or Config.remote_timeout),
+            # неудавшиеся подключения повторяем всегда, а оборванный ответ - только у GET: команда с действием,
+            # дошедшая до сервера, могла уже выполниться
+            retries=_Retry(connect=2, read=1, redirect=0, status=0, other=0, allowed_methods=frozenset(['GET'])))
+        self._base_headers = self.get_remote_connection_headers(parse.urlparse(self._url), keep_alive=True)
+
+    def execute(self, command, params):
+        """ Отправка команды на сервер с учетом времени ее выполнения """
+        command_info = self._commands[command]
+        assert command_info is not None, 'Unrecognised command %s' % command
+        path = string.Template(command_info[1]).substitute(params)
+        if getattr(self, 'w3c', False) and isinstance(params, dict) and 'sessionId' in params:
+            del params['sessionId']
+        data = json.dumps(params, separators=(',', ':'))
+        if not self._pinged:
+            # сетевая задержка оценивается один раз, перед первой командой
+            self._pinged = True
+            try:
+                self.ping()
+            except Exception:
+                pass    # сервер без /status - время сервера и сети останется неизвестным
+        self._command.name = command
+        return self._request(command_info[0], '%s%s' % (self._url, path), body=data)
+
+    def _request(self, method, url, body=None):
+        if body and method not in ('POST', 'PUT'):
+            body = None
+
+        start = time.perf_counter()
+        resp = self._conn.request(method, url, body=body, headers=self._base_headers, redirect=False)
+        total = time.perf_counter() - start
+        self._count_connections()
+
+        try:
+            timing = _SERVER_TIMING.search(resp.headers.get('Server-Timing', ''))
+            if timing:
+                server = min(float(timing.group(1)) / 1000, total)
+            elif self.stats.rtt is not None:
+                server = min(max(total - self.stats.rtt, 0), total)
+            else:
+                server = None
+            self.stats.add(getattr(self._command, 'name', method), total, server)
+            self._command.name = None
+
+            statuscode = resp.status
+            if 300 <= statuscode < 304:
+                return self._request('GET', parse.urljoin(url, resp.headers.get('location')))
+            data = resp.data.decode('UTF-8')
+            if 399 < statuscode <= 500:
+                return {'status': statuscode, 'value': data}
+            if resp.headers.get('Content-Type', '').startswith('image/png'):
+                return {'status': 0, 'value': data}
+            try:
+                data = json.loads(data.strip())
+            except ValueError:
+                return {'status': 0 if 199 < statuscode < 300 else 13, 'value': data.strip()}
+            if 'value' not in data:
+                data['value'] = None
+            return data
+        finally:
+            resp.release_conn()
+
+    def _count_connections(self):
+        """ Учет открытых соединений: пул хоста считает созданные им соединения в num_connections """
+        pools = self._conn.pools
+        self.stats.connections = sum(pools[key].num_connections for key in pools.keys())
+
+    def ping(self, count=3):
+        """ Оценка сетевой задержки до сервера по самому быстрому из count запросов GET /status """
+        samples = []
+        for _ in range(count):
+            start = time.perf_counter()
+            self._conn.request('GET', self._url + '/status', headers=self._base_headers).release_conn()
+            samples.append(time.perf_counter() - start)
+        self.stats.rtt = min(samples)
+        return self.stats.rtt
+
+    def close(self):
+        """ Закрывает соединения пула """
+        self._conn.clear()
@@ -1,19 +1,65 @@
 # -*- coding: utf-8 -*-
 import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from selenium.common.exceptions import TimeoutException
 
 from .config import Config
 
+# момент времени, к которому должна завершиться текущая пользовательская операция со всеми вложенными ожиданиями
+_deadline = ContextVar('deadline', default=None)
+# шаг проверок для ожиданий без явно заданного шага (например, адаптивный шаг поиска локатора, см. timing)
+_poll = ContextVar('poll', default=None)
+
+
+@contextmanager
+def deadline(timeout):
+    """
+        Общий бюджет времени (в секундах) на операцию: все вложенные ожидания (уровни цепочки локаторов, проверка
+        интерактивности, повторный поиск исчезнувшего элемента) укладываются в него. Вложенный бюджет не может
+        продлить внешний
+    """
+    end_time = time.time() + timeout
+    outer = _deadline.get()
+    if outer is not None and outer <= end_time:
+        yield outer
+        return
+    token = _deadline.set(end_time)
+    try:
+        yield end_time
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def poll(seconds):
+    """ Шаг проверок вложенных ожиданий, для которых шаг не задан явно (None - шаг по умолчанию) """
+    token = _poll.set(seconds)
+    try:
+        yield seconds
+    finally:
+        _poll.reset(token)
+
+
+def remaining():
+    """ Остаток времени текущего бюджета операции (None - бюджет не задан) """
+    end_time = _deadline.get()
+    return None if end_time is None else max(end_time - time.time(), 0)
+
 
 class Wait:
-    def __init__(self, driver, timeout=Config.wait_timeout, poll_frequency=Config.pool_frequency):
+    def __init__(self, driver, timeout=Config.wait_timeout, poll_frequency=None, backend=None):
         self._driver = driver
         self._timeout = timeout
-        self._poll = poll_frequency if poll_frequency != 0 else Config.pool_frequency
+        self._poll = poll_frequency or _poll.get() or Config.pool_frequency
+        self._backend = backend or Config.wait_backend
 
     def until(self, method, message=''):
         if self._timeout != 0:
             end_time = time.time() + self._timeout
+            if _deadline.get() is not None:
+                end_time = min(end_time, _deadline.get())
             while True:
                 try:
                     value = method(self._driver)
@@ -21,7 +67,7 @@ class Wait:
                         return value
                 except:
                     pass
-                time.sleep(self._poll)
+                self._pause(min(self._poll, max(end_time - time.time(), 0)))
                 if time.time() > end_time:
                     break
             raise TimeoutException("""
@@ -35,3 +81,33 @@ class Wait:
                 return True
             except TimeoutException:
                 return False
+
+    def _pause(self, seconds):
+        """
+            Пауза между проверками. В режиме 'mutation' пауза прерывается первой же мутацией DOM страницы, так что
+            проверка повторяется сразу после изменения страницы, а не по истечении шага ожидания. Но не раньше, чем
+            через долю шага Config.mutation_min_pause: на постоянно меняющейся странице (спиннер, бегущая строка)
+            ожидание не превращается в непрерывные проверки
+        """
+        if self._backend == 'mutation' and seconds > 0:
+            start = time.time()
+            from ..core import driver
+            from .scripts import WAIT_MUTATION
+
+            # ожидание от драйвера - в нем, от элемента (ленивого или WebDriver-а) - в его браузере, а от списка - в
+            # текущем драйвере. parent элемента WebDriver-а - сам WebDriver, без асинхронных скриптов обертки
+            parent = getattr(self._driver, 'parent', None)
+            browser = driver.extended(self._driver) or driver.extended(parent) or \
+                (driver.current if parent is None else None)
+            if browser is not None and getattr(browser, 'async_scripts', False) is not False:
+                from .service import async_scripts_unsupported
+                try:
+                    browser.execute_async_script(WAIT_MUTATION, int(seconds * 1000))
+                    time.sleep(max(min(seconds, self._poll * Config.mutation_min_pause) - (time.time() - start), 0))
+                    return
+                except Exception as e:
+                    # например, нулевой таймаут асинхронных скриптов у сессии - больше не пробуем; а разовый сбой
+                    # (переход на другую страницу во время паузы) - только эта пауза обычная
+                    if async_scripts_unsupported(e):
+                        browser.async_scripts = False
+        time.sleep(seconds)
@@ -1,10 +1,9 @@
 import unittest
 import logging
 
-from selenium.common.exceptions import NoSuchElementException
-
+from lib.condition import visible
 from lib.core.finder import s, ss
-from lib.core.tools import get, refresh, title, close
+from lib.core.tools import get, refresh, title, close, extract
 from lib.core.driver import replace_current_driver
 from selenium import webdriver
 
@@ -59,9 +58,9 @@ class WorkTest(unittest.TestCase):
     def open_product_by_number_from_the_end(self, number):
         """ Открываем нужный продукт (по номеру) с конца """
         info("Открываем продукт под индексом " + str(number) + " с конца")
-        p_count = len(ss(class_name="product-info__title-link"))
-        p_click_index = p_count - number
-        ss(class_name="product-info__title-link")[p_click_index].click()
+        products = ss(class_name="product-info__title-link").freeze()
+        p_click_index = len(products) - number
+        products[p_click_index].click()
         info("Осуществлен переход на страницу \"" + title() + "\"")
 
     def get_test_property(self):
@@ -70,22 +69,29 @@ class WorkTest(unittest.TestCase):
         info("Открываем все характеристики продукта")
         self.click_with_href_javascript(s(xpath_text="Все характеристики"))
 
+        s(class_name="options-group").wait(visible)
+
         info("Собираем параметры продукта...")
-        p_dict = {
-            "Название": s(class_name="price_item_description").text,
-            "Цена": s(class_name="current-price-value").text,
-            "Срок гарантии": s(class_name="additional-info-block").ss(tag_name="span")[1].text,
-            "ОС": self.get_product_property(" Операционная система "),
-            "Модель процессора": self.get_product_property(" Модель процессора "),
-            "Количество ядер": self.get_product_property(" Количество ядер процессора "),
-            "Тактовая честота": self.get_product_property(" Частота процессора "),
-            "Модель дискретной видеокарты": self.get_product_property(" Модель дискретной видеокарты "),
-            "Объем видеопамяти": self.get_product_property(" Объем видеопамяти "),
-            "Размер оперативной памяти": self.get_product_property(" Размер оперативной памяти "),
-            "Тип оперативной памяти": self.get_product_property(" Тип оперативной памяти "),
-            "Объем дисков HDD": self.get_product_property(" Суммарный объем жестких дисков (HDD) "),
-            "Объем дисков SSD": self.get_product_property(" Объем твердотельного накопителя (SSD) ")
-        }
+        # все характеристики разбираются одним обращением к браузеру, отсутствующая характеристика - None.
+        # Значения, как и раньше, - innerHTML ячейки значения
+        props = s(class_name="options-group").s(xpath="..").as_key_values(html=True)
+        p_dict = extract({
+            "Название": s(class_name="price_item_description"),
+            "Цена": s(class_name="current-price-value"),
+            "Срок гарантии": s(class_name="additional-info-block").ss(tag_name="span")[1],
+        })
+        p_dict.update({
+            "ОС": props.get("Операционная система"),
+            "Модель процессора": props.get("Модель процессора"),
+            "Количество ядер": props.get("Количество ядер процессора"),
+            "Тактовая честота": props.get("Частота процессора"),
+            "Модель дискретной видеокарты": props.get("Модель дискретной видеокарты"),
+            "Объем видеопамяти": props.get("Объем видеопамяти"),
+            "Размер оперативной памяти": props.get("Размер оперативной памяти"),
+            "Тип оперативной памяти": props.get("Тип оперативной памяти"),
+            "Объем дисков HDD": props.get("Суммарный объем жестких дисков (HDD)"),
+            "Объем дисков SSD": props.get("Объем твердотельного накопителя (SSD)")
+        })
         info("Создан словарь параметров продукта: " + str(p_dict))
         return p_dict
 
@@ -95,13 +101,6 @@ class WorkTest(unittest.TestCase):
         self.click_with_href_javascript(s(class_name="pagination-widget__page-link_last").s(xpath=".."))
         refresh()  # Обновляю страницу чтобы корректно переопределить и найти элементы
 
-    def get_product_property(self, p_name):
-        """ Получаем характеристику продукта по названию характеристики """
-        try:
-            return s(class_name="options-group").s(xpath_text=p_name).s(xpath="..").s(xpath="..").s(xpath="..").ss(xpath="td")[1].inner_html
-        except NoSuchElementException:
-            print("Данной характеристики не найдено")
-
     def click_with_href_javascript(self, element):
         """ Оч костыльный метод клика по элементу element, содержащем в себе параметр href="javascript:". По
         непонятным мне причинам такой элемент иногда кликается с одной попытки, а иногда только со второй. Поэтому